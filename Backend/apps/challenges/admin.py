@@ -2,19 +2,24 @@
 Admin configuration for Challenges app
 """
 from django.contrib import admin
-from .models import Challenge, ChallengeParticipation
+
+from apps.core import jobs
+from .models import Challenge, ChallengeParticipation, ChallengeResult, TeamChallengeParticipation
+from .progress import CRITERIA_FIELDS, recompute_challenges
 
 @admin.register(Challenge)
 class ChallengeAdmin(admin.ModelAdmin):
     list_display = (
         'name', 'challenge_type', 'difficulty', 'target_type',
         'target_value', 'reward_points', 'start_date', 'end_date',
-        'is_active', 'participants_count'
+        'is_active', 'status', 'participants_count'
     )
-    list_filter = ('challenge_type', 'difficulty', 'is_active', 'start_date', 'end_date')
+    list_filter = ('status', 'challenge_type', 'difficulty', 'is_active', 'start_date', 'end_date')
     search_fields = ('name', 'description')
     date_hierarchy = 'start_date'
     ordering = ('-start_date',)
+    readonly_fields = ('status', 'finalized_at', 'participants_count')
+    actions = ['recount_participants', 'recompute_progress']
     
     fieldsets = (
         ('Basic Information', {
@@ -27,9 +32,29 @@ class ChallengeAdmin(admin.ModelAdmin):
             'fields': ('reward_points', 'badge_name')
         }),
         ('Schedule', {
-            'fields': ('start_date', 'end_date', 'is_active')
+            'fields': ('start_date', 'end_date', 'is_active', 'status', 'finalized_at')
+        }),
+        ('Statistics', {
+            'fields': ('participants_count',)
         }),
     )
+    
+    @admin.action(description='Recount participants')
+    def recount_participants(self, request, queryset):
+        count = Challenge.recount_participants(queryset)
+        self.message_user(request, f'Recounted participants of {count} challenges.')
+    
+    @admin.action(description="Recompute participants' progress (background)")
+    def recompute_progress(self, request, queryset):
+        challenge_ids = list(queryset.values_list('id', flat=True))
+        jobs.submit(recompute_challenges, challenge_ids)
+        self.message_user(request, f'Recomputing progress of {len(challenge_ids)} challenges in the background.')
+    
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change and set(CRITERIA_FIELDS).intersection(form.changed_data):
+            jobs.submit(recompute_challenges, [obj.pk])
+            self.message_user(request, 'Participant progress is being recomputed in the background.')
 
 @admin.register(ChallengeParticipation)
 class ChallengeParticipationAdmin(admin.ModelAdmin):
@@ -41,4 +66,26 @@ class ChallengeParticipationAdmin(admin.ModelAdmin):
     search_fields = ('user__username', 'challenge__name')
     date_hierarchy = 'joined_at'
     ordering = ('-joined_at',)
-    readonly_fields = ('joined_at',)
\ No newline at end of file
+    readonly_fields = ('joined_at',)
+    list_select_related = ('user', 'challenge')
+    raw_id_fields = ('user',)
+    show_full_result_count = False
+
+@admin.register(TeamChallengeParticipation)
+class TeamChallengeParticipationAdmin(admin.ModelAdmin):
+    list_display = ('team', 'challenge', 'contribution', 'is_completed', 'joined_at', 'completed_at')
+    list_filter = ('is_completed', 'challenge')
+    search_fields = ('team__name', 'challenge__name')
+    list_select_related = ('team', 'challenge')
+    raw_id_fields = ('team',)
+    readonly_fields = ('contribution', 'joined_at')
+    ordering = ('-joined_at',)
+
+@admin.register(ChallengeResult)
+class ChallengeResultAdmin(admin.ModelAdmin):
+    list_display = ('challenge', 'rank', 'user', 'team', 'value', 'is_completed')
+    list_filter = ('is_completed', 'challenge')
+    search_fields = ('user__username', 'team__name', 'challenge__name')
+    list_select_related = ('challenge', 'user', 'team')
+    raw_id_fields = ('user', 'team')
+    show_full_result_count = False
@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class ChallengesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.challenges'
-    label = 'apps_Challenges'
\ No newline at end of file
+    label = 'apps_Challenges'
+
+    def ready(self):
+        from . import signals  # noqa: F401
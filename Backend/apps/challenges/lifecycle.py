@@ -0,0 +1,117 @@
+"""
+Date-driven challenge lifecycle: upcoming -> ongoing -> finalized -> archived
+
+process_lifecycle() is run by the process_challenge_lifecycle command on
+a schedule. Each step is a bulk UPDATE over the challenges that crossed a
+date boundary; finalizing also brings every participant's progress up to
+date once more and freezes the standings into ChallengeResult. Every step
+only picks challenges still in the earlier state, so re-running is safe.
+"""
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core.versioning import CHALLENGES, touch_global, touch_users
+
+from .models import Challenge, ChallengeParticipation, ChallengeResult, TeamChallengeParticipation
+from .progress import CHUNK_SIZE, recompute_challenge
+from .summaries import BOARD_ORDER, TEAM_BOARD_ORDER
+
+
+def activate(today):
+    """Start upcoming challenges whose window has opened, returns them"""
+    due = list(Challenge.objects.filter(
+        status=Challenge.UPCOMING, start_date__lte=today, end_date__gte=today
+    ))
+    if due:
+        Challenge.objects.filter(id__in=[challenge.id for challenge in due]).update(status=Challenge.ONGOING)
+        for challenge in due:
+            challenge.status = Challenge.ONGOING
+            # Participants who joined early have no progress yet
+            recompute_challenge(challenge)
+    return due
+
+
+def _result_rows(challenge, chunk_size):
+    """Unsaved ChallengeResult objects in final board order"""
+    individuals = ChallengeParticipation.objects.filter(challenge=challenge).order_by(*BOARD_ORDER).values_list(
+        'user_id', 'progress', 'is_completed', 'completed_at'
+    )
+    for rank, (user_id, progress, is_completed, completed_at) in enumerate(
+        individuals.iterator(chunk_size=chunk_size), start=1
+    ):
+        yield ChallengeResult(
+            challenge=challenge, rank=rank, user_id=user_id,
+            value=progress, is_completed=is_completed, completed_at=completed_at,
+        )
+
+    teams = TeamChallengeParticipation.objects.filter(challenge=challenge).order_by(*TEAM_BOARD_ORDER).values_list(
+        'team_id', 'contribution', 'is_completed', 'completed_at'
+    )
+    for rank, (team_id, contribution, is_completed, completed_at) in enumerate(
+        teams.iterator(chunk_size=chunk_size), start=1
+    ):
+        yield ChallengeResult(
+            challenge=challenge, rank=rank, team_id=team_id,
+            value=contribution, is_completed=is_completed, completed_at=completed_at,
+        )
+
+
+def finalize(challenge, chunk_size=CHUNK_SIZE):
+    """Settle final progress and freeze the standings, returns the result count"""
+    recompute_challenge(challenge, chunk_size)
+    written = 0
+    with transaction.atomic():
+        ChallengeResult.objects.filter(challenge=challenge).delete()
+        rows = _result_rows(challenge, chunk_size)
+        while batch := list(islice(rows, chunk_size)):
+            ChallengeResult.objects.bulk_create(batch)
+            touch_users(*(result.user_id for result in batch if result.user_id))
+            written += len(batch)
+        challenge.status = Challenge.FINALIZED
+        challenge.finalized_at = timezone.now()
+        Challenge.objects.filter(pk=challenge.pk).update(
+            status=challenge.status, finalized_at=challenge.finalized_at
+        )
+    return written
+
+
+def archive(today, days):
+    """Archive challenges finalized more than `days` after their end, returns the count.
+
+    Team rows are dropped: their standings live in ChallengeResult. The
+    individual participations stay, as users' challenge history and stats
+    are read from them.
+    """
+    due = list(Challenge.objects.filter(
+        status=Challenge.FINALIZED, end_date__lt=today - timedelta(days=days)
+    ).values_list('id', flat=True))
+    if due:
+        with transaction.atomic():
+            TeamChallengeParticipation.objects.filter(challenge_id__in=due).delete()
+            Challenge.objects.filter(id__in=due).update(status=Challenge.ARCHIVED)
+    return len(due)
+
+
+def process_lifecycle(today=None, archive_days=None, chunk_size=CHUNK_SIZE):
+    """Run every due transition, returns {'activated': n, 'finalized': n, 'archived': n}"""
+    today = today or timezone.localdate()
+    archive_days = settings.CHALLENGE_ARCHIVE_DAYS if archive_days is None else archive_days
+
+    activated = activate(today)
+    # Includes challenges that ended before the job ever saw them start
+    ended = Challenge.objects.filter(
+        status__in=(Challenge.UPCOMING, Challenge.ONGOING), end_date__lt=today
+    ).order_by('end_date', 'id')
+    finalized = 0
+    for challenge in ended:
+        finalize(challenge, chunk_size)
+        finalized += 1
+    archived = archive(today, archive_days)
+
+    if activated or finalized or archived:
+        touch_global(CHALLENGES)
+    return {'activated': len(activated), 'finalized': finalized, 'archived': archived}
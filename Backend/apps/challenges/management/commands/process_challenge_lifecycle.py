@@ -0,0 +1,32 @@
+"""
+Advance challenges through their lifecycle at date boundaries
+
+    python manage.py process_challenge_lifecycle
+    python manage.py process_challenge_lifecycle --archive-days 60
+
+Meant to run from cron a few times a day (at least once shortly after
+local midnight). Starts challenges whose window opened, finalizes ended
+ones into ChallengeResult and archives old finalized ones; re-running is
+safe.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.challenges.lifecycle import process_lifecycle
+from apps.challenges.progress import CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Activate, finalize and archive challenges whose dates have passed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--archive-days', type=int, default=settings.CHALLENGE_ARCHIVE_DAYS)
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        counts = process_lifecycle(
+            archive_days=options['archive_days'], chunk_size=options['chunk_size']
+        )
+        self.stdout.write(
+            f"{counts['activated']} activated, {counts['finalized']} finalized, {counts['archived']} archived"
+        )
@@ -0,0 +1,41 @@
+"""
+Recompute progress of every participant of one or more challenges
+
+    python manage.py recompute_challenge_progress 12 15
+    python manage.py recompute_challenge_progress --ongoing
+
+Run after editing a challenge's dates or target, or when a challenge
+goes live. Newly completed participants get their points and
+notifications in bulk; re-running is safe.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.challenges.models import Challenge
+from apps.challenges.progress import CHUNK_SIZE, recompute_challenge
+
+
+class Command(BaseCommand):
+    help = 'Recompute challenge progress for all participants with set-based queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('challenge_ids', nargs='*', type=int)
+        parser.add_argument('--ongoing', action='store_true',
+                            help='All active challenges whose window includes today')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if options['ongoing']:
+            today = timezone.localdate()
+            challenges = Challenge.objects.filter(is_active=True, start_date__lte=today, end_date__gte=today)
+        elif options['challenge_ids']:
+            challenges = Challenge.objects.filter(id__in=options['challenge_ids'])
+            missing = set(options['challenge_ids']) - set(challenges.values_list('id', flat=True))
+            if missing:
+                raise CommandError(f'Unknown challenges: {", ".join(map(str, sorted(missing)))}')
+        else:
+            raise CommandError('Pass challenge ids or --ongoing')
+
+        for challenge in challenges.order_by('id'):
+            updated, completed = recompute_challenge(challenge, options['chunk_size'])
+            self.stdout.write(f'{challenge.name}: {updated} participations updated, {completed} completed')
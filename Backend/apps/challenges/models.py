@@ -2,9 +2,12 @@
 Challenge models for Carbon Karma
 """
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.conf import settings
 from django.utils import timezone
 
+from apps.core.dates import date_range_filter
+
 class Challenge(models.Model):
     """Model for challenges that users can participate in"""
     
@@ -19,6 +22,20 @@ class Challenge(models.Model):
         ('hard', 'Hard'),
     ]
     
+    # Lifecycle, advanced by the process_challenge_lifecycle command
+    UPCOMING = 'upcoming'
+    ONGOING = 'ongoing'
+    FINALIZED = 'finalized'
+    ARCHIVED = 'archived'
+    STATUSES = [
+        (UPCOMING, 'Upcoming'),
+        (ONGOING, 'Ongoing'),
+        (FINALIZED, 'Finalized'),
+        (ARCHIVED, 'Archived'),
+    ]
+    # Results are frozen in ChallengeResult; participations no longer change
+    CLOSED_STATUSES = (FINALIZED, ARCHIVED)
+    
     name = models.CharField(max_length=100)
     description = models.TextField()
     challenge_type = models.CharField(max_length=20, choices=CHALLENGE_TYPES)
@@ -37,24 +54,61 @@ class Challenge(models.Model):
     end_date = models.DateField()
     
     is_active = models.BooleanField(default=True)
+    status = models.CharField(max_length=20, choices=STATUSES, default=UPCOMING, editable=False)
+    finalized_at = models.DateTimeField(null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    # Maintained by apps.challenges.signals, rebuilt with recount_participants()
+    participants_count = models.PositiveIntegerField(default=0, editable=False)
+    
     class Meta:
         ordering = ['-start_date']
+        indexes = [
+            # Challenge list status filters
+            models.Index(fields=['status', '-start_date'], name='challenge_status_idx'),
+        ]
     
     def __str__(self):
         return self.name
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so save() can tell when an edit moved the window
+        instance._loaded_dates = (instance.__dict__.get('start_date'), instance.__dict__.get('end_date'))
+        return instance
+    
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            self.status = self.status_on(timezone.localdate())
+        elif self._dates_changed() and self.status == self.ONGOING:
+            # Moved into the future: upcoming again until the lifecycle job
+            # starts it. Moves the other way are left to that job as well,
+            # since activation brings early joiners' progress up to date.
+            self.status = self.status_on(timezone.localdate())
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'status'}
+        super().save(*args, **kwargs)
+        self._loaded_dates = (self.start_date, self.end_date)
+    
+    def _dates_changed(self):
+        loaded = getattr(self, '_loaded_dates', None)
+        return loaded is not None and loaded != (self.start_date, self.end_date)
+    
+    def status_on(self, day):
+        """Live status the dates give on `day`; finalizing is left to the lifecycle job"""
+        if day < self.start_date:
+            return self.UPCOMING
+        return self.ONGOING
+    
     @property
     def is_ongoing(self):
         """Check if challenge is currently active"""
-        today = timezone.now().date()
-        return self.start_date <= today <= self.end_date
+        return self.status == self.ONGOING
     
     @property
-    def participants_count(self):
-        """Get number of participants"""
-        return self.challengeparticipation_set.count()
+    def is_closed(self):
+        return self.status in self.CLOSED_STATUSES
     
     @property
     def completion_rate(self):
@@ -62,8 +116,22 @@ class Challenge(models.Model):
         total = self.participants_count
         if total == 0:
             return 0
-        completed = self.challengeparticipation_set.filter(is_completed=True).count()
+        # List views annotate completed_total to avoid a count per challenge
+        completed = getattr(self, 'completed_total', None)
+        if completed is None:
+            completed = self.challengeparticipation_set.filter(is_completed=True).count()
         return round((completed / total) * 100, 1)
+    
+    @classmethod
+    def recount_participants(cls, queryset=None):
+        """Rebuild participants_count from the participation rows with one UPDATE"""
+        counts = ChallengeParticipation.objects.filter(
+            challenge=models.OuterRef('pk')
+        ).order_by().values('challenge').annotate(total=models.Count('id')).values('total')
+        queryset = cls.objects.all() if queryset is None else queryset
+        return queryset.update(
+            participants_count=Coalesce(models.Subquery(counts), 0)
+        )
 
 class ChallengeParticipation(models.Model):
     """Track user participation in challenges"""
@@ -80,6 +148,10 @@ class ChallengeParticipation(models.Model):
     class Meta:
         unique_together = ['challenge', 'user']
         ordering = ['-joined_at']
+        indexes = [
+            # Challenge leaderboard: participants by progress, earliest first on ties
+            models.Index(fields=['challenge', '-progress', 'joined_at'], name='participation_board_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.challenge.name}"
@@ -90,14 +162,14 @@ class ChallengeParticipation(models.Model):
         
         challenge = self.challenge
         user = self.user
+        period = date_range_filter(challenge.start_date, challenge.end_date)
         
         if challenge.target_type == 'co2_saved':
             # Calculate CO2 saved during challenge period
             activities = Activity.objects.filter(
                 user=user,
-                timestamp__date__gte=challenge.start_date,
-                timestamp__date__lte=challenge.end_date,
-                co2_impact__gt=0
+                co2_impact__gt=0,
+                **period
             )
             total_saved = sum(a.co2_impact for a in activities)
             self.progress = min((total_saved / challenge.target_value) * 100, 100)
@@ -105,8 +177,7 @@ class ChallengeParticipation(models.Model):
         elif challenge.target_type == 'activities_count':
             count = Activity.objects.filter(
                 user=user,
-                timestamp__date__gte=challenge.start_date,
-                timestamp__date__lte=challenge.end_date
+                **period
             ).count()
             self.progress = min((count / challenge.target_value) * 100, 100)
         
@@ -130,10 +201,89 @@ class ChallengeParticipation(models.Model):
                 message=f'Congratulations! You completed the {challenge.name} challenge and earned {challenge.reward_points} points!',
                 related_id=challenge.id
             )
+            
+            from apps.realtime.events import publish_to_user
+            publish_to_user(user.id, 'challenge_completed', {
+                'challenge_id': challenge.id,
+                'challenge_name': challenge.name,
+                'reward_points': challenge.reward_points,
+            })
         
         self.save()
     
     @property
     def progress_percentage(self):
         """Get progress as percentage"""
-        return round(self.progress, 1)
\ No newline at end of file
+        return round(self.progress, 1)
+
+class TeamChallengeParticipation(models.Model):
+    """A team entered in a team challenge.
+
+    contribution is the sum of the current members' CO2 saved or activity
+    count inside the challenge window. It is updated incrementally as
+    members log activities (apps.challenges.signals) and rebuilt by
+    apps.challenges.progress.recompute_challenge().
+    """
+    
+    # Target types whose per-member values can be summed into a team total
+    TEAM_TARGET_TYPES = ('co2_saved', 'activities_count')
+    
+    challenge = models.ForeignKey(Challenge, on_delete=models.CASCADE, related_name='team_participations')
+    team = models.ForeignKey('apps_Leaderboard.Team', on_delete=models.CASCADE, related_name='challenge_participations')
+    
+    contribution = models.FloatField(default=0.0)
+    is_completed = models.BooleanField(default=False)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    joined_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ['challenge', 'team']
+        ordering = ['-joined_at']
+        indexes = [
+            # Team leaderboard; the target is fixed per challenge so contribution orders like progress
+            models.Index(fields=['challenge', '-contribution', 'joined_at'], name='team_participation_board_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.team.name} - {self.challenge.name}"
+    
+    @property
+    def progress(self):
+        """Percentage of the challenge target reached, capped at 100"""
+        if self.challenge.target_value <= 0:
+            return 0
+        return min((self.contribution / self.challenge.target_value) * 100, 100)
+    
+    @property
+    def progress_percentage(self):
+        return round(self.progress, 1)
+
+class ChallengeResult(models.Model):
+    """Final standing of one participant (or team) in a finalized challenge.
+
+    Written once by apps.challenges.lifecycle when the challenge ends, so
+    leaderboards of past challenges read ranks instead of recomputing them.
+    value is the final progress percentage for individuals and the
+    contribution for teams.
+    """
+    
+    challenge = models.ForeignKey(Challenge, on_delete=models.CASCADE, related_name='results')
+    rank = models.PositiveIntegerField()
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True, related_name='challenge_results')
+    team = models.ForeignKey('apps_Leaderboard.Team', on_delete=models.CASCADE, null=True, blank=True, related_name='challenge_results')
+    
+    value = models.FloatField()
+    is_completed = models.BooleanField(default=False)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['challenge', 'rank']
+        indexes = [
+            models.Index(fields=['challenge', 'rank'], name='challenge_result_rank_idx'),
+            models.Index(fields=['user', 'challenge'], name='challenge_result_user_idx'),
+        ]
+    
+    def __str__(self):
+        entrant = self.user or self.team
+        return f"#{self.rank} {entrant} - {self.challenge.name}"
@@ -0,0 +1,268 @@
+"""
+Set-based progress recompute for every participant of a challenge
+
+ChallengeParticipation.update_progress() is the per-user path used after
+each activity. When a challenge's dates or target change, or it goes
+live, recompute_challenge() brings all participants up to date with one
+grouped aggregate per chunk, bulk updates, and bulk completion awards.
+
+Team challenges keep one TeamChallengeParticipation per team whose
+contribution is adjusted by each member activity (add_team_contribution)
+and rebuilt here from a single aggregate grouped by team.
+"""
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from apps.core.dates import date_range_filter
+from apps.core.versioning import LEADERBOARD, touch_global, touch_users
+
+from .models import Challenge, ChallengeParticipation, TeamChallengeParticipation
+
+CHUNK_SIZE = 1000
+
+# Edits to these fields change every participant's progress
+CRITERIA_FIELDS = ('target_type', 'target_value', 'start_date', 'end_date', 'is_active')
+
+
+def _value_aggregate(target_type):
+    if target_type == 'co2_saved':
+        return Sum('co2_impact', filter=Q(co2_impact__gt=0))
+    if target_type == 'activities_count':
+        return Count('id')
+    return None
+
+
+def participant_values(challenge, user_ids):
+    """{user_id: measured value} for the challenge's target type"""
+    from apps.tracking.models import Activity
+    from apps.users.models import User
+
+    if challenge.target_type == 'streak':
+        return dict(User.objects.filter(id__in=user_ids).values_list('id', 'current_streak'))
+
+    aggregate = _value_aggregate(challenge.target_type)
+    if aggregate is None:
+        return {}
+
+    rows = Activity.objects.filter(
+        user_id__in=user_ids, **date_range_filter(challenge.start_date, challenge.end_date)
+    ).order_by().values('user_id').annotate(value=aggregate).values_list('user_id', 'value')
+    return {user_id: value or 0 for user_id, value in rows}
+
+
+def _award_completions(challenge, user_ids):
+    """Points, notifications and live events for newly completed participants"""
+    from apps.gamification.models import Notification
+    from apps.gamification.notifications import bulk_notify
+    from apps.realtime.events import publish_points_changed, publish_to_user
+    from apps.users.models import User
+
+    # Same rule as User.add_points: one level per 1000 points, never down
+    points = F('carbon_points') + challenge.reward_points
+    User.objects.filter(id__in=user_ids).update(
+        carbon_points=points, level=Greatest(F('level'), points / 1000 + 1)
+    )
+    # update() skips User.save(), so the leaderboard and rank events too
+    publish_points_changed(user_ids)
+    bulk_notify([
+        Notification(
+            user_id=user_id,
+            notification_type='challenge',
+            title=f'Challenge Completed: {challenge.name}',
+            message=f'Congratulations! You completed the {challenge.name} challenge and earned {challenge.reward_points} points!',
+            related_id=challenge.id,
+        )
+        for user_id in user_ids
+    ])
+    for user_id in user_ids:
+        publish_to_user(user_id, 'challenge_completed', {
+            'challenge_id': challenge.id,
+            'challenge_name': challenge.name,
+            'reward_points': challenge.reward_points,
+        })
+
+
+def team_contributions(challenge, team_ids):
+    """{team_id: sum of the current members' values in the challenge window}"""
+    from apps.tracking.models import Activity
+
+    aggregate = _value_aggregate(challenge.target_type)
+    if aggregate is None:
+        return {}
+    rows = Activity.objects.filter(
+        user__teams__in=team_ids, **date_range_filter(challenge.start_date, challenge.end_date)
+    ).order_by().values('user__teams').annotate(value=aggregate).values_list('user__teams', 'value')
+    return {team_id: value or 0 for team_id, value in rows}
+
+
+def _award_team_completions(challenge, team_ids):
+    """Every current member of a newly completed team earns the reward"""
+    from apps.leaderboard.models import Team
+
+    # A member of several completed teams is rewarded once
+    member_ids = list(
+        Team.members.through.objects.filter(team_id__in=team_ids)
+        .order_by().values_list('user_id', flat=True).distinct()
+    )
+    if member_ids:
+        _award_completions(challenge, member_ids)
+        touch_global(LEADERBOARD)
+
+
+def _complete_teams(challenge, rows):
+    """Mark rows that reached the target as completed, award them and return them"""
+    now = timezone.now()
+    newly_completed = []
+    for row in rows:
+        if not row.is_completed and row.contribution >= challenge.target_value:
+            row.is_completed = True
+            row.completed_at = now
+            newly_completed.append(row)
+    if newly_completed:
+        _award_team_completions(challenge, [row.team_id for row in newly_completed])
+    return newly_completed
+
+
+def recompute_team_challenge(challenge, team_ids=None, chunk_size=CHUNK_SIZE):
+    """Rebuild team contributions of a team challenge, returns (updated, completed)"""
+    updated = completed = 0
+    if challenge.challenge_type != 'team' or challenge.target_value <= 0 or challenge.is_closed:
+        return updated, completed
+    rows_qs = TeamChallengeParticipation.objects.filter(challenge=challenge)
+    if team_ids is not None:
+        rows_qs = rows_qs.filter(team_id__in=team_ids)
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            rows = list(rows_qs.select_for_update().filter(id__gt=last_id).order_by('id')[:chunk_size])
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            contributions = team_contributions(challenge, [row.team_id for row in rows])
+            changed = {}
+            for row in rows:
+                contribution = contributions.get(row.team_id, 0)
+                if contribution != row.contribution:
+                    row.contribution = contribution
+                    changed[row.id] = row
+            newly_completed = _complete_teams(challenge, rows)
+            changed.update((row.id, row) for row in newly_completed)
+            changed = list(changed.values())
+            if changed:
+                TeamChallengeParticipation.objects.bulk_update(
+                    changed, ['contribution', 'is_completed', 'completed_at']
+                )
+
+        updated += len(changed)
+        completed += len(newly_completed)
+    return updated, completed
+
+
+def add_team_contribution(user_id, day, co2_saved, activities):
+    """Adjust the rows of the user's teams in team challenges running on `day`.
+
+    Called for each logged (positive) or deleted (negative) activity; costs
+    one query when the user's teams are in no running team challenge.
+    Returns the rows this change completed.
+    """
+    from apps.leaderboard.models import Team
+
+    rows = list(TeamChallengeParticipation.objects.filter(
+        team_id__in=Team.members.through.objects.filter(user_id=user_id).values('team_id'),
+        challenge__challenge_type='team',
+        challenge__is_active=True,
+        challenge__status__in=(Challenge.UPCOMING, Challenge.ONGOING),
+        challenge__start_date__lte=day,
+        challenge__end_date__gte=day,
+    ).values_list('id', 'challenge__target_type'))
+    deltas = {'co2_saved': co2_saved, 'activities_count': activities}
+    by_delta = {}
+    for row_id, target_type in rows:
+        if deltas.get(target_type):
+            by_delta.setdefault(deltas[target_type], []).append(row_id)
+    if not by_delta:
+        return []
+
+    for delta, row_ids in by_delta.items():
+        TeamChallengeParticipation.objects.filter(id__in=row_ids).update(
+            contribution=F('contribution') + delta
+        )
+    changed_ids = [row_id for row_ids in by_delta.values() for row_id in row_ids]
+    reached = TeamChallengeParticipation.objects.filter(
+        id__in=changed_ids, is_completed=False, contribution__gte=F('challenge__target_value')
+    ).select_related('challenge')
+    # Rows of one challenge are completed together so a member of several
+    # teams is rewarded once
+    by_challenge = {}
+    for row in reached:
+        by_challenge.setdefault(row.challenge_id, []).append(row)
+    completed = []
+    for rows in by_challenge.values():
+        completed += _complete_teams(rows[0].challenge, rows)
+    if completed:
+        TeamChallengeParticipation.objects.bulk_update(completed, ['is_completed', 'completed_at'])
+    return completed
+
+
+def recompute_challenge(challenge, chunk_size=CHUNK_SIZE):
+    """Recompute progress of every participant, returns (updated, completed).
+
+    Completed participations keep their completion; progress of a
+    participation never reopens it, matching update_progress(). Team
+    challenges also get their team rows rebuilt. Finalized challenges are
+    frozen and left alone.
+    """
+    updated = completed = 0
+    if challenge.target_value <= 0 or challenge.is_closed:
+        return updated, completed
+    if challenge.challenge_type == 'team':
+        updated, completed = recompute_team_challenge(challenge, chunk_size=chunk_size)
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            chunk = list(
+                ChallengeParticipation.objects.select_for_update()
+                .filter(challenge=challenge, id__gt=last_id)
+                .order_by('id')
+                .only('id', 'user_id', 'progress', 'is_completed', 'completed_at')[:chunk_size]
+            )
+            if not chunk:
+                break
+            last_id = chunk[-1].id
+
+            values = participant_values(challenge, [p.user_id for p in chunk])
+            now = timezone.now()
+            changed, newly_completed = [], []
+            for participation in chunk:
+                value = values.get(participation.user_id, 0)
+                progress = min((value / challenge.target_value) * 100, 100)
+                if progress == participation.progress and (participation.is_completed or progress < 100):
+                    continue
+                participation.progress = progress
+                if progress >= 100 and not participation.is_completed:
+                    participation.is_completed = True
+                    participation.completed_at = now
+                    newly_completed.append(participation.user_id)
+                changed.append(participation)
+
+            if changed:
+                ChallengeParticipation.objects.bulk_update(
+                    changed, ['progress', 'is_completed', 'completed_at']
+                )
+                touch_users(*(participation.user_id for participation in changed))
+            if newly_completed:
+                _award_completions(challenge, newly_completed)
+                touch_global(LEADERBOARD)
+
+        updated += len(changed)
+        completed += len(newly_completed)
+    return updated, completed
+
+
+def recompute_challenges(challenge_ids):
+    """Background job entry point: recompute each challenge by id"""
+    for challenge in Challenge.objects.filter(id__in=challenge_ids).order_by('id'):
+        recompute_challenge(challenge)
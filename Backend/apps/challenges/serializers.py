@@ -22,37 +22,33 @@ class ChallengeSerializer(serializers.ModelSerializer):
             'id', 'name', 'description', 'challenge_type', 'challenge_type_display',
             'difficulty', 'difficulty_display', 'target_type', 'target_value',
             'reward_points', 'badge_name', 'start_date', 'end_date',
-            'is_active', 'is_ongoing', 'participants_count', 'completion_rate',
+            'is_active', 'status', 'is_ongoing', 'participants_count', 'completion_rate',
             'is_participating', 'user_progress', 'created_at'
         )
     
+    def _user_participation(self, obj):
+        """The current user's participation, prefetched by the list views when possible"""
+        request = self.context.get('request')
+        if not (request and request.user.is_authenticated):
+            return None
+        if hasattr(obj, 'user_participations'):
+            return obj.user_participations[0] if obj.user_participations else None
+        return ChallengeParticipation.objects.filter(challenge=obj, user=request.user).first()
+    
     def get_is_participating(self, obj):
         """Check if the current user is participating in this challenge"""
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return ChallengeParticipation.objects.filter(
-                challenge=obj,
-                user=request.user
-            ).exists()
-        return False
+        return self._user_participation(obj) is not None
     
     def get_user_progress(self, obj):
         """Get current user's progress in this challenge"""
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            try:
-                participation = ChallengeParticipation.objects.get(
-                    challenge=obj,
-                    user=request.user
-                )
-                return {
-                    'progress': participation.progress,
-                    'is_completed': participation.is_completed,
-                    'completed_at': participation.completed_at
-                }
-            except ChallengeParticipation.DoesNotExist:
-                pass
-        return None
+        participation = self._user_participation(obj)
+        if participation is None:
+            return None
+        return {
+            'progress': participation.progress,
+            'is_completed': participation.is_completed,
+            'completed_at': participation.completed_at
+        }
 
 class ChallengeParticipationSerializer(serializers.ModelSerializer):
     """Serializer for ChallengeParticipation model"""
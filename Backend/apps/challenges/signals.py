@@ -0,0 +1,76 @@
+"""
+Keep Challenge.participants_count and team challenge contributions in
+step with the rows they are derived from
+"""
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.leaderboard.models import Team
+from apps.tracking.models import Activity
+
+from .models import Challenge, ChallengeParticipation
+from .progress import add_team_contribution, recompute_team_challenge
+
+
+@receiver(post_save, sender=ChallengeParticipation)
+def participation_created(sender, instance, created, **kwargs):
+    if created:
+        Challenge.objects.filter(pk=instance.challenge_id).update(
+            participants_count=F('participants_count') + 1
+        )
+
+
+@receiver(post_delete, sender=ChallengeParticipation)
+def participation_deleted(sender, instance, **kwargs):
+    Challenge.objects.filter(pk=instance.challenge_id, participants_count__gt=0).update(
+        participants_count=F('participants_count') - 1
+    )
+
+
+@receiver(post_save, sender=Activity)
+def activity_logged(sender, instance, created, **kwargs):
+    """Count a member's new activity towards their teams' challenges"""
+    if created:
+        saved = instance.co2_impact if instance.co2_impact > 0 else 0
+        day = timezone.localtime(instance.timestamp).date()
+        completed = add_team_contribution(instance.user_id, day, saved, 1)
+        if completed and 'user' in instance._state.fields_cache:
+            # Activity.save() adds points to this cached user next; reload the
+            # reward just written by UPDATE so that save does not overwrite it
+            instance.user.refresh_from_db(fields=['carbon_points', 'level'])
+
+
+@receiver(post_delete, sender=Activity)
+def activity_deleted(sender, instance, **kwargs):
+    saved = instance.co2_impact if instance.co2_impact > 0 else 0
+    add_team_contribution(instance.user_id, timezone.localtime(instance.timestamp).date(), -saved, -1)
+
+
+@receiver(m2m_changed, sender=Team.members.through)
+def team_members_changed(sender, instance, action, pk_set=None, **kwargs):
+    """A team's contribution is its current members' total, rebuild it"""
+    if action == 'pre_clear' and not isinstance(instance, Team):
+        # The user's memberships are gone by post_clear, which gets no pk_set
+        instance._cleared_team_ids = list(
+            Team.members.through.objects.filter(user_id=instance.pk).values_list('team_id', flat=True)
+        )
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if isinstance(instance, Team):
+        team_ids = [instance.pk]
+    elif action == 'post_clear':
+        team_ids = instance.__dict__.pop('_cleared_team_ids', [])
+    else:
+        # Changed from the user side: instance is the user, pk_set the teams
+        team_ids = list(pk_set)
+    if not team_ids:
+        return
+    challenges = Challenge.objects.filter(
+        challenge_type='team', is_active=True, status__in=(Challenge.UPCOMING, Challenge.ONGOING),
+        team_participations__team_id__in=team_ids,
+    ).distinct()
+    for challenge in challenges:
+        recompute_team_challenge(challenge, team_ids=team_ids)
@@ -0,0 +1,243 @@
+"""
+Summary builders shared by the challenge endpoints and the dashboard
+"""
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .models import ChallengeParticipation, ChallengeResult, TeamChallengeParticipation
+
+
+def participation_totals(user):
+    """Count a user's participations by state in one conditional aggregate"""
+    today = timezone.now().date()
+    totals = ChallengeParticipation.objects.filter(user=user).aggregate(
+        total_joined=Count('id'),
+        total_completed=Count('id', filter=Q(is_completed=True)),
+        # Joined and unfinished challenges that are still switched on
+        in_progress=Count('id', filter=Q(is_completed=False, challenge__is_active=True)),
+        # ... of which the challenge window has not closed yet
+        active_challenges=Count('id', filter=Q(
+            is_completed=False,
+            challenge__is_active=True,
+            challenge__end_date__gte=today
+        )),
+        total_points_earned=Sum('challenge__reward_points', filter=Q(is_completed=True)),
+    )
+    totals['total_points_earned'] = totals['total_points_earned'] or 0
+    return totals
+
+
+def build_challenge_stats(user, totals=None):
+    """Joined/completed/active counts and points earned from challenges"""
+    if totals is None:
+        totals = participation_totals(user)
+
+    total_joined = totals['total_joined']
+    total_completed = totals['total_completed']
+    return {
+        'total_joined': total_joined,
+        'total_completed': total_completed,
+        'active_challenges': totals['active_challenges'],
+        'completion_rate': round((total_completed / total_joined * 100) if total_joined > 0 else 0, 1),
+        'total_points_earned': totals['total_points_earned']
+    }
+
+
+# Leaderboard order, matching participation_board_idx (id breaks exact ties)
+BOARD_ORDER = ('-progress', 'joined_at', 'id')
+BOARD_ORDER_REVERSED = ('progress', '-joined_at', '-id')
+
+
+def ranked_ahead_of(participation):
+    """Participations of the same challenge placed above `participation`.
+
+    The challenge is repeated in every branch so each one is an index range
+    on participation_board_idx.
+    """
+    challenge_id, progress = participation.challenge_id, participation.progress
+    return Q(challenge_id=challenge_id, progress__gt=progress) | Q(
+        challenge_id=challenge_id, progress=progress, joined_at__lt=participation.joined_at
+    ) | Q(
+        challenge_id=challenge_id, progress=progress,
+        joined_at=participation.joined_at, id__lt=participation.id
+    )
+
+
+def ranked_behind(participation):
+    """Participations of the same challenge placed below `participation`"""
+    challenge_id, progress = participation.challenge_id, participation.progress
+    return Q(challenge_id=challenge_id, progress__lt=progress) | Q(
+        challenge_id=challenge_id, progress=progress, joined_at__gt=participation.joined_at
+    ) | Q(
+        challenge_id=challenge_id, progress=progress,
+        joined_at=participation.joined_at, id__gt=participation.id
+    )
+
+
+def board_row(participation, rank):
+    user = participation.user
+    return {
+        'user_id': user.id,
+        'username': user.username,
+        'avatar': user.avatar.url if user.avatar else None,
+        'progress': participation.progress,
+        'is_completed': participation.is_completed,
+        'rank': rank,
+    }
+
+
+def build_challenge_leaderboard(challenge, user, limit=50, offset=0, around_me=False):
+    """One page of a challenge leaderboard plus the caller's rank.
+
+    Pages are read in index order; around_me returns up to `limit`
+    participants on each side of the caller using keyset lookups, so the
+    cost does not grow with the caller's position. The caller's rank is a
+    single count of the participants ahead of them.
+    """
+    board = ChallengeParticipation.objects.filter(challenge=challenge).select_related('user').only(
+        'id', 'progress', 'is_completed', 'joined_at',
+        'user__id', 'user__username', 'user__avatar',
+    )
+
+    mine = None
+    your_rank = None
+    if user is not None and user.is_authenticated:
+        mine = board.filter(user=user).first()
+    if mine is not None:
+        your_rank = ChallengeParticipation.objects.filter(ranked_ahead_of(mine)).count() + 1
+
+    if around_me and mine is not None:
+        # The progress bound lets the index walk start at the caller's position
+        above = board.filter(ranked_ahead_of(mine), progress__gte=mine.progress)
+        below = board.filter(ranked_behind(mine), progress__lte=mine.progress)
+        above = list(above.order_by(*BOARD_ORDER_REVERSED)[:limit])[::-1]
+        below = list(below.order_by(*BOARD_ORDER)[:limit])
+        first_rank = your_rank - len(above)
+        rows = [
+            board_row(participation, first_rank + index)
+            for index, participation in enumerate(above + [mine] + below)
+        ]
+    else:
+        page = board.order_by(*BOARD_ORDER)[offset:offset + limit]
+        rows = [board_row(participation, offset + index) for index, participation in enumerate(page, start=1)]
+
+    return {
+        'leaderboard': rows,
+        'total_participants': challenge.participants_count,
+        'your_rank': your_rank,
+        'your_progress': mine.progress if mine is not None else None,
+    }
+
+
+TEAM_BOARD_ORDER = ('-contribution', 'joined_at', 'id')
+
+
+def build_team_leaderboard(challenge, user, limit=50, offset=0):
+    """One page of a team challenge leaderboard plus the caller's teams.
+
+    Reads only TeamChallengeParticipation rows, so the cost follows the
+    number of teams, not members or activities.
+    """
+    board = TeamChallengeParticipation.objects.filter(challenge=challenge)
+    target = challenge.target_value
+
+    def row(entry, rank):
+        progress = min((entry.contribution / target) * 100, 100) if target > 0 else 0
+        return {
+            'team_id': entry.team_id,
+            'name': entry.team.name,
+            'avatar': entry.team.avatar,
+            'contribution': round(entry.contribution, 2),
+            'progress': round(progress, 1),
+            'is_completed': entry.is_completed,
+            'rank': rank,
+        }
+
+    page = board.select_related('team').only(
+        'id', 'team_id', 'contribution', 'is_completed', 'joined_at', 'team__name', 'team__avatar'
+    ).order_by(*TEAM_BOARD_ORDER)[offset:offset + limit]
+    rows = [row(entry, offset + index) for index, entry in enumerate(page, start=1)]
+
+    your_teams = []
+    if user is not None and user.is_authenticated:
+        mine = board.filter(team__members=user).select_related('team')
+        for entry in mine:
+            ahead = board.filter(
+                Q(contribution__gt=entry.contribution)
+                | Q(contribution=entry.contribution, joined_at__lt=entry.joined_at)
+                | Q(contribution=entry.contribution, joined_at=entry.joined_at, id__lt=entry.id)
+            ).count()
+            your_teams.append(row(entry, ahead + 1))
+
+    return {
+        'leaderboard': rows,
+        'total_teams': board.count(),
+        'your_teams': your_teams,
+    }
+
+
+def _result_page(results, limit, offset):
+    # Ranks are dense from 1, so a page is a range on challenge_result_rank_idx
+    return results.filter(rank__gt=offset, rank__lte=offset + limit).order_by('rank')
+
+
+def build_result_leaderboard(challenge, user, limit=50, offset=0, around_me=False):
+    """build_challenge_leaderboard() for a finalized challenge, read from its frozen results"""
+    results = ChallengeResult.objects.filter(challenge=challenge, user__isnull=False).select_related('user').only(
+        'rank', 'value', 'is_completed', 'user__id', 'user__username', 'user__avatar',
+    )
+
+    mine = None
+    if user is not None and user.is_authenticated:
+        mine = results.filter(user=user).first()
+    if around_me and mine is not None:
+        page = results.filter(rank__gte=max(mine.rank - limit, 1), rank__lte=mine.rank + limit).order_by('rank')
+    else:
+        page = _result_page(results, limit, offset)
+
+    rows = [
+        {
+            'user_id': result.user.id,
+            'username': result.user.username,
+            'avatar': result.user.avatar.url if result.user.avatar else None,
+            'progress': result.value,
+            'is_completed': result.is_completed,
+            'rank': result.rank,
+        }
+        for result in page
+    ]
+    return {
+        'leaderboard': rows,
+        'total_participants': challenge.participants_count,
+        'your_rank': mine.rank if mine is not None else None,
+        'your_progress': mine.value if mine is not None else None,
+    }
+
+
+def build_team_result_leaderboard(challenge, user, limit=50, offset=0):
+    """build_team_leaderboard() for a finalized challenge, read from its frozen results"""
+    results = ChallengeResult.objects.filter(challenge=challenge, team__isnull=False).select_related('team').only(
+        'rank', 'value', 'is_completed', 'team__id', 'team__name', 'team__avatar',
+    )
+    target = challenge.target_value
+
+    def row(result):
+        progress = min((result.value / target) * 100, 100) if target > 0 else 0
+        return {
+            'team_id': result.team.id,
+            'name': result.team.name,
+            'avatar': result.team.avatar,
+            'contribution': round(result.value, 2),
+            'progress': round(progress, 1),
+            'is_completed': result.is_completed,
+            'rank': result.rank,
+        }
+
+    your_teams = []
+    if user is not None and user.is_authenticated:
+        your_teams = [row(result) for result in results.filter(team__members=user).order_by('rank')]
+    return {
+        'leaderboard': [row(result) for result in _result_page(results, limit, offset)],
+        'total_teams': results.count(),
+        'your_teams': your_teams,
+    }
@@ -1,3 +1,136 @@
+from datetime import timedelta
+
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.leaderboard.models import Team
+from apps.tracking.models import Activity
+from apps.users.models import User
+
+from .lifecycle import process_lifecycle
+from .models import Challenge, ChallengeParticipation, ChallengeResult, TeamChallengeParticipation
+
+
+def make_challenge(challenge_type='individual', start=-1, end=5, **fields):
+    today = timezone.localdate()
+    return Challenge.objects.create(**{
+        'name': f'{challenge_type} challenge', 'description': 'Log activities',
+        'challenge_type': challenge_type, 'target_type': 'activities_count', 'target_value': 2,
+        'reward_points': 100, 'start_date': today + timedelta(days=start),
+        'end_date': today + timedelta(days=end),
+        **fields,
+    })
+
+
+def log_walk(user):
+    return Activity.objects.create(
+        user=user, activity_type='transport', transport_mode='walk', distance_km=2, description='Walk'
+    )
+
+
+class TeamChallengeTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='pass12345')
+        self.bob = User.objects.create_user(username='bob', password='pass12345')
+        self.challenge = make_challenge('team')
+        self.teams = []
+        for name in ('Red', 'Blue'):
+            team = Team.objects.create(name=name, created_by=self.alice)
+            team.members.add(self.alice, self.bob)
+            TeamChallengeParticipation.objects.create(challenge=self.challenge, team=team)
+            self.teams.append(team)
+
+    def entry(self, team):
+        return TeamChallengeParticipation.objects.get(challenge=self.challenge, team=team)
+
+    def test_individuals_cannot_join_team_challenges(self):
+        client = APIClient()
+        client.force_authenticate(self.alice)
+        response = client.post(f'/api/challenges/{self.challenge.pk}/join/')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(self.alice.challenge_participations.exists())
+
+    def test_members_of_several_completed_teams_are_rewarded_once(self):
+        log_walk(self.alice)
+        log_walk(self.bob)
+        self.assertTrue(all(self.entry(team).is_completed for team in self.teams))
+        self.alice.refresh_from_db()
+        self.bob.refresh_from_db()
+        walk_points = Activity.objects.filter(user=self.bob).get().points_earned
+        self.assertEqual(self.bob.carbon_points, walk_points + self.challenge.reward_points)
+        self.assertEqual(self.alice.carbon_points, walk_points + self.challenge.reward_points)
+
+    def test_clearing_a_users_teams_rebuilds_their_contributions(self):
+        log_walk(self.bob)
+        self.assertEqual(self.entry(self.teams[0]).contribution, 1)
+        self.bob.teams.clear()
+        for team in self.teams:
+            self.assertEqual(self.entry(team).contribution, 0)
+
+
+class LifecycleTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='pass12345')
+        self.bob = User.objects.create_user(username='bob', password='pass12345')
+
+    def test_upcoming_challenges_start_with_the_progress_so_far(self):
+        challenge = make_challenge(start=0)
+        # Created before its start date, and joined early
+        Challenge.objects.filter(pk=challenge.pk).update(status=Challenge.UPCOMING)
+        ChallengeParticipation.objects.create(challenge=challenge, user=self.alice)
+        log_walk(self.alice)
+        counts = process_lifecycle()
+        self.assertEqual(counts['activated'], 1)
+        challenge.refresh_from_db()
+        self.assertEqual(challenge.status, Challenge.ONGOING)
+        self.assertEqual(ChallengeParticipation.objects.get(challenge=challenge).progress, 50)
+
+    def test_moving_the_start_into_the_future_makes_it_upcoming_again(self):
+        challenge = make_challenge(start=-1)
+        self.assertEqual(challenge.status, Challenge.ONGOING)
+        challenge = Challenge.objects.get(pk=challenge.pk)
+        challenge.start_date = timezone.localdate() + timedelta(days=2)
+        challenge.save(update_fields=['start_date'])
+        challenge.refresh_from_db()
+        self.assertEqual(challenge.status, Challenge.UPCOMING)
+        self.assertEqual(process_lifecycle()['activated'], 0)
+
+        # Moving it back is left to the lifecycle job, which activates it
+        challenge.start_date = timezone.localdate() - timedelta(days=1)
+        challenge.save()
+        challenge.name = 'Renamed'
+        challenge.save()
+        self.assertEqual(Challenge.objects.get(pk=challenge.pk).status, Challenge.UPCOMING)
+        self.assertEqual(process_lifecycle()['activated'], 1)
+
+    def test_ended_challenges_are_finalized_into_ranked_results(self):
+        challenge = make_challenge(start=-1, end=0)
+        for user in (self.alice, self.bob):
+            ChallengeParticipation.objects.create(challenge=challenge, user=user)
+        log_walk(self.bob)
+        log_walk(self.bob)
+
+        counts = process_lifecycle(today=timezone.localdate() + timedelta(days=1))
+        self.assertEqual(counts['finalized'], 1)
+        challenge.refresh_from_db()
+        self.assertEqual(challenge.status, Challenge.FINALIZED)
+        self.assertIsNotNone(challenge.finalized_at)
+        results = list(challenge.results.values_list('rank', 'user_id', 'value', 'is_completed'))
+        self.assertEqual(results, [(1, self.bob.pk, 100, True), (2, self.alice.pk, 0, False)])
+
+        # Re-running leaves finalized challenges alone
+        self.assertEqual(process_lifecycle(today=timezone.localdate() + timedelta(days=1))['finalized'], 0)
+        self.assertEqual(ChallengeResult.objects.count(), 2)
+
+    def test_old_finalized_challenges_are_archived_without_team_rows(self):
+        challenge = make_challenge('team', start=-40, end=-35)
+        team = Team.objects.create(name='Red', created_by=self.alice)
+        TeamChallengeParticipation.objects.create(challenge=challenge, team=team)
 
-# Create your tests here.
+        counts = process_lifecycle(archive_days=30)
+        self.assertEqual((counts['finalized'], counts['archived']), (1, 1))
+        challenge.refresh_from_db()
+        self.assertEqual(challenge.status, Challenge.ARCHIVED)
+        self.assertFalse(challenge.team_participations.exists())
+        self.assertEqual(challenge.results.get().team_id, team.pk)
@@ -14,10 +14,12 @@ urlpatterns = [
     
     # Challenge actions
     path('<int:challenge_id>/join/', views.join_challenge, name='join-challenge'),
+    path('<int:challenge_id>/join-team/', views.join_team_challenge, name='join-team-challenge'),
     path('<int:challenge_id>/leave/', views.leave_challenge, name='leave-challenge'),
     path('<int:challenge_id>/update-progress/', views.update_challenge_progress, name='update-progress'),
     
     # Leaderboard and stats
     path('<int:challenge_id>/leaderboard/', views.challenge_leaderboard, name='challenge-leaderboard'),
+    path('<int:challenge_id>/team-leaderboard/', views.team_challenge_leaderboard, name='team-challenge-leaderboard'),
     path('stats/', views.challenge_stats, name='challenge-stats'),
 ]
\ No newline at end of file
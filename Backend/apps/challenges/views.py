@@ -6,37 +6,68 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Count, Prefetch, Q
 
-from .models import Challenge, ChallengeParticipation
+from apps.core.replicas import read_from_replica
+
+from apps.leaderboard.models import Team
+
+from .models import Challenge, ChallengeParticipation, TeamChallengeParticipation
 from .serializers import (
     ChallengeSerializer,
     ChallengeParticipationSerializer,
     ChallengeLeaderboardSerializer
 )
+from .progress import recompute_team_challenge
+from .summaries import (
+    build_challenge_leaderboard,
+    build_challenge_stats,
+    build_result_leaderboard,
+    build_team_leaderboard,
+    build_team_result_leaderboard,
+)
+
+MAX_LEADERBOARD_LIMIT = 100
+
+
+def with_user_state(queryset, user):
+    """Load completion counts and the user's own participation with the
+    challenges, so ChallengeSerializer needs no query per row"""
+    queryset = queryset.annotate(
+        completed_total=Count('challengeparticipation', filter=Q(challengeparticipation__is_completed=True))
+    ).order_by(*Challenge._meta.ordering, 'id')
+    if user.is_authenticated:
+        queryset = queryset.prefetch_related(Prefetch(
+            'challengeparticipation_set',
+            queryset=ChallengeParticipation.objects.filter(user=user),
+            to_attr='user_participations'
+        ))
+    return queryset
 
 class ChallengeListView(generics.ListAPIView):
     """
     GET /api/challenges/
-    List all active challenges
+    List all active challenges, archived ones only when asked for
     """
     serializer_class = ChallengeSerializer
     permission_classes = []  # Allow public access
     
     def get_queryset(self):
-        queryset = Challenge.objects.filter(is_active=True)
+        queryset = with_user_state(Challenge.objects.filter(is_active=True), self.request.user)
         
-        # Filter by status
+        # Filter by status, as kept by process_challenge_lifecycle
         status_filter = self.request.query_params.get('status')
         if status_filter == 'ongoing':
-            today = timezone.now().date()
-            queryset = queryset.filter(start_date__lte=today, end_date__gte=today)
+            queryset = queryset.filter(status=Challenge.ONGOING)
         elif status_filter == 'upcoming':
-            today = timezone.now().date()
-            queryset = queryset.filter(start_date__gt=today)
+            queryset = queryset.filter(status=Challenge.UPCOMING)
         elif status_filter == 'completed':
-            today = timezone.now().date()
-            queryset = queryset.filter(end_date__lt=today)
+            queryset = queryset.filter(status__in=Challenge.CLOSED_STATUSES)
+        elif status_filter == 'archived':
+            queryset = queryset.filter(status=Challenge.ARCHIVED)
+        else:
+            queryset = queryset.exclude(status=Challenge.ARCHIVED)
         
         # Filter by difficulty
         difficulty = self.request.query_params.get('difficulty')
@@ -55,9 +86,11 @@ class ChallengeDetailView(generics.RetrieveAPIView):
     GET /api/challenges/<id>/
     Get challenge details
     """
-    queryset = Challenge.objects.filter(is_active=True)
     serializer_class = ChallengeSerializer
     permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        return with_user_state(Challenge.objects.filter(is_active=True), self.request.user)
 
 class MyChallengesView(generics.ListAPIView):
     """
@@ -74,6 +107,7 @@ class MyChallengesView(generics.ListAPIView):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@transaction.atomic
 def join_challenge(request, challenge_id):
     """
     POST /api/challenges/<id>/join/
@@ -87,11 +121,18 @@ def join_challenge(request, challenge_id):
             status=status.HTTP_404_NOT_FOUND
         )
     
+    # Team challenges reward every member through the team entry
+    if challenge.challenge_type == 'team':
+        return Response(
+            {'error': 'Team challenges are joined by a team, see join-team'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
     # Check if challenge is ongoing or upcoming
     if not challenge.is_ongoing and challenge.start_date > timezone.now().date():
         # Can join upcoming challenges
         pass
-    elif challenge.end_date < timezone.now().date():
+    elif challenge.is_closed or challenge.end_date < timezone.now().date():
         return Response(
             {'error': 'This challenge has already ended'},
             status=status.HTTP_400_BAD_REQUEST
@@ -124,6 +165,67 @@ def join_challenge(request, challenge_id):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@transaction.atomic
+def join_team_challenge(request, challenge_id):
+    """
+    POST /api/challenges/<id>/join-team/
+    Enter a team in a team challenge (team creator only)
+    Body: {"team_id": 3}
+    """
+    try:
+        challenge = Challenge.objects.get(id=challenge_id, is_active=True, challenge_type='team')
+    except Challenge.DoesNotExist:
+        return Response(
+            {'error': 'Team challenge not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    if challenge.is_closed or challenge.end_date < timezone.localdate():
+        return Response(
+            {'error': 'This challenge has already ended'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if challenge.target_type not in TeamChallengeParticipation.TEAM_TARGET_TYPES:
+        return Response(
+            {'error': 'This challenge cannot be played as a team'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        team = Team.objects.get(id=request.data.get('team_id'))
+    except (Team.DoesNotExist, ValueError, TypeError):
+        return Response(
+            {'error': 'Team not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    if team.created_by_id != request.user.id:
+        return Response(
+            {'error': 'Only the team creator can enter the team in a challenge'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
+    entry, created = TeamChallengeParticipation.objects.get_or_create(challenge=challenge, team=team)
+    if not created:
+        return Response(
+            {'error': 'This team is already participating in this challenge'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    # Members' activities already inside the window count from the start
+    recompute_team_challenge(challenge, team_ids=[team.id])
+    entry.refresh_from_db()
+    
+    return Response({
+        'message': f'{team.name} joined {challenge.name}!',
+        'team_id': team.id,
+        'contribution': round(entry.contribution, 2),
+        'progress': entry.progress_percentage,
+    }, status=status.HTTP_201_CREATED)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@transaction.atomic
 def leave_challenge(request, challenge_id):
     """
     POST /api/challenges/<id>/leave/
@@ -142,6 +244,13 @@ def leave_challenge(request, challenge_id):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        # Final standings are frozen
+        if participation.challenge.is_closed:
+            return Response(
+                {'error': 'Cannot leave a finished challenge'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
         challenge_name = participation.challenge.name
         participation.delete()
         
@@ -156,17 +265,24 @@ def leave_challenge(request, challenge_id):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@transaction.atomic
 def update_challenge_progress(request, challenge_id):
     """
     POST /api/challenges/<id>/update-progress/
     Manually update progress for a challenge
     """
     try:
-        participation = ChallengeParticipation.objects.get(
+        participation = ChallengeParticipation.objects.select_related('challenge').get(
             challenge_id=challenge_id,
             user=request.user
         )
         
+        if participation.challenge.is_closed:
+            return Response(
+                {'error': 'This challenge has been finalized'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
         participation.update_progress()
         
         return Response({
@@ -181,10 +297,13 @@ def update_challenge_progress(request, challenge_id):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@read_from_replica
 def challenge_leaderboard(request, challenge_id):
     """
-    GET /api/challenges/<id>/leaderboard/
-    Get leaderboard for a specific challenge
+    GET /api/challenges/<id>/leaderboard/?limit=50&offset=0
+    GET /api/challenges/<id>/leaderboard/?around=me&limit=5
+    Get a page of a challenge leaderboard, or the participants around
+    the caller (limit on each side), with the caller's rank
     """
     try:
         challenge = Challenge.objects.get(id=challenge_id, is_active=True)
@@ -194,62 +313,63 @@ def challenge_leaderboard(request, challenge_id):
             status=status.HTTP_404_NOT_FOUND
         )
     
-    # Get all participants ordered by progress
-    participants = ChallengeParticipation.objects.filter(
-        challenge=challenge
-    ).select_related('user').order_by('-progress', 'joined_at')
-    
-    leaderboard_data = []
-    for rank, participation in enumerate(participants, start=1):
-        leaderboard_data.append({
-            'user_id': participation.user.id,
-            'username': participation.user.username,
-            'avatar': participation.user.avatar,
-            'progress': participation.progress,
-            'is_completed': participation.is_completed,
-            'rank': rank
-        })
+    try:
+        limit = min(max(int(request.query_params.get('limit', 50)), 1), MAX_LEADERBOARD_LIMIT)
+        offset = max(int(request.query_params.get('offset', 0)), 0)
+    except ValueError:
+        return Response(
+            {'error': 'limit and offset must be integers'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    around_me = request.query_params.get('around') == 'me'
     
+    # Finished challenges are served from their frozen results
+    build = build_result_leaderboard if challenge.is_closed else build_challenge_leaderboard
+    data = build(challenge, request.user, limit, offset, around_me)
     return Response({
         'challenge': ChallengeSerializer(challenge, context={'request': request}).data,
-        'leaderboard': leaderboard_data,
-        'total_participants': len(leaderboard_data)
+        **data
     })
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-def challenge_stats(request):
+@read_from_replica
+def team_challenge_leaderboard(request, challenge_id):
     """
-    GET /api/challenges/stats/
-    Get user's challenge statistics
+    GET /api/challenges/<id>/team-leaderboard/?limit=50&offset=0
+    Get a page of the team ranking of a team challenge, with the
+    caller's teams
     """
-    user = request.user
-    
-    total_joined = ChallengeParticipation.objects.filter(user=user).count()
-    total_completed = ChallengeParticipation.objects.filter(
-        user=user,
-        is_completed=True
-    ).count()
-    
-    active_challenges = ChallengeParticipation.objects.filter(
-        user=user,
-        is_completed=False,
-        challenge__is_active=True,
-        challenge__end_date__gte=timezone.now().date()
-    ).count()
+    try:
+        challenge = Challenge.objects.get(id=challenge_id, is_active=True, challenge_type='team')
+    except Challenge.DoesNotExist:
+        return Response(
+            {'error': 'Team challenge not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
     
-    total_points_earned = sum(
-        p.challenge.reward_points
-        for p in ChallengeParticipation.objects.filter(
-            user=user,
-            is_completed=True
+    try:
+        limit = min(max(int(request.query_params.get('limit', 50)), 1), MAX_LEADERBOARD_LIMIT)
+        offset = max(int(request.query_params.get('offset', 0)), 0)
+    except ValueError:
+        return Response(
+            {'error': 'limit and offset must be integers'},
+            status=status.HTTP_400_BAD_REQUEST
         )
-    )
     
+    build = build_team_result_leaderboard if challenge.is_closed else build_team_leaderboard
+    data = build(challenge, request.user, limit, offset)
     return Response({
-        'total_joined': total_joined,
-        'total_completed': total_completed,
-        'active_challenges': active_challenges,
-        'completion_rate': round((total_completed / total_joined * 100) if total_joined > 0 else 0, 1),
-        'total_points_earned': total_points_earned
-    })
\ No newline at end of file
+        'challenge': ChallengeSerializer(challenge, context={'request': request}).data,
+        **data
+    })
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@read_from_replica
+def challenge_stats(request):
+    """
+    GET /api/challenges/stats/
+    Get user's challenge statistics
+    """
+    return Response(build_challenge_stats(request.user))
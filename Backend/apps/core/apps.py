@@ -0,0 +1,16 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.core'
+    label = 'apps_Core'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        from django.conf import settings
+        if getattr(settings, 'METRICS_JSON_PATH', ''):
+            import atexit
+            from .metrics import registry
+            atexit.register(registry.dump_json, settings.METRICS_JSON_PATH)
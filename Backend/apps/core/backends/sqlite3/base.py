@@ -0,0 +1,44 @@
+"""
+SQLite backend tuned for concurrent writers on a single node
+
+Adds two OPTIONS on top of django.db.backends.sqlite3 (both arrive
+natively in Django 5.1 as init_command / transaction_mode):
+
+    'pragmas'           mapping of PRAGMA name -> value applied to every
+                        new connection, e.g. journal_mode=WAL
+    'transaction_mode'  'DEFERRED' (SQLite's default), 'IMMEDIATE' or
+                        'EXCLUSIVE' for the BEGIN issued by atomic()
+
+With IMMEDIATE, an atomic block takes the write lock up front and waits
+up to the busy timeout for it. Under the default DEFERRED mode a
+transaction that reads first and writes later fails with "database is
+locked" at once when another writer holds the lock.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+TRANSACTION_MODES = {'DEFERRED', 'IMMEDIATE', 'EXCLUSIVE'}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    pragmas = {}
+    transaction_mode = 'DEFERRED'
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pragmas = params.pop('pragmas', {})
+        self.transaction_mode = params.pop('transaction_mode', 'DEFERRED').upper()
+        if self.transaction_mode not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f"transaction_mode must be one of {', '.join(sorted(TRANSACTION_MODES))}"
+            )
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(f'BEGIN {self.transaction_mode}')
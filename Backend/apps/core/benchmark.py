@@ -0,0 +1,365 @@
+"""
+Synthetic dataset and in-process load driver for the API benchmarks
+
+Used by the seed_benchmark_data and benchmark_api management commands.
+All seeded users share the BENCH_USER_PREFIX so a dataset can be removed
+again without touching real accounts.
+"""
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, connections, transaction
+from django.db.models import Count, Q, Sum
+from django.test import Client
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.challenges.models import Challenge, ChallengeParticipation
+from apps.gamification.models import Badge, Notification, UserBadge
+from apps.leaderboard.models import Team
+from apps.tracking.carbon_calculator import calculate_co2_impact
+from apps.tracking.models import Activity, DailySummary
+from .metrics import QueryCollector
+
+User = get_user_model()
+
+BENCH_USER_PREFIX = 'bench_'
+BENCH_PASSWORD = 'bench-password-123'
+BATCH_SIZE = 2000
+
+# Activity templates: (activity_type, field overrides, description)
+ACTIVITY_TEMPLATES = [
+    ('transport', {'transport_mode': 'walk', 'distance_km': 2.0}, 'Walked to work'),
+    ('transport', {'transport_mode': 'bicycle', 'distance_km': 5.0}, 'Cycled to work'),
+    ('transport', {'transport_mode': 'bus', 'distance_km': 8.0}, 'Took the bus'),
+    ('transport', {'transport_mode': 'motorcycle', 'distance_km': 12.0}, 'Rode a motorcycle'),
+    ('food', {'meal_type': 'vegetarian', 'servings': 1}, 'Vegetarian lunch'),
+    ('food', {'meal_type': 'dal_bhat', 'servings': 1}, 'Dal bhat dinner'),
+    ('food', {'meal_type': 'chicken', 'servings': 1}, 'Chicken curry'),
+    ('energy', {'energy_type': 'lights_off', 'hours': 2}, 'Turned off lights'),
+    ('energy', {'energy_type': 'solar_used', 'hours': 3}, 'Used solar power'),
+    ('waste', {'waste_type': 'recycled', 'weight_kg': 0.5}, 'Recycled waste'),
+    ('waste', {'waste_type': 'composted', 'weight_kg': 1.0}, 'Composted kitchen waste'),
+]
+
+# name -> (method, path, body)
+SCENARIOS = {
+    'profile': ('GET', '/api/users/profile/', None),
+    'dashboard_stats': ('GET', '/api/users/dashboard-stats/', None),
+    'activities': ('GET', '/api/tracking/activities/', None),
+    'weekly_summary': ('GET', '/api/tracking/weekly-summary/', None),
+    'monthly_summary': ('GET', '/api/tracking/monthly-summary/', None),
+    'activity_stats': ('GET', '/api/tracking/stats/', None),
+    'daily_summary': ('GET', '/api/tracking/daily-summary/', None),
+    'gamification_summary': ('GET', '/api/gamification/summary/', None),
+    'my_badges': ('GET', '/api/gamification/my-badges/', None),
+    'notifications': ('GET', '/api/gamification/notifications/', None),
+    'challenges': ('GET', '/api/challenges/', None),
+    'challenge_stats': ('GET', '/api/challenges/stats/', None),
+    'global_leaderboard': ('GET', '/api/leaderboard/global/', None),
+    'teams': ('GET', '/api/leaderboard/teams/', None),
+    'rewards': ('GET', '/api/rewards/', None),
+    'redemption_stats': ('GET', '/api/rewards/stats/', None),
+    'dashboard': ('GET', '/api/dashboard/', None),
+    'quick_log': ('POST', '/api/tracking/quick-log/', {'template': 'walked_to_work'}),
+    'log_activity': ('POST', '/api/tracking/activities/', {
+        'activity_type': 'transport', 'transport_mode': 'bicycle',
+        'distance_km': 4.0, 'description': 'Cycled to work',
+    }),
+}
+
+# Concurrent writers, for comparing database and transaction settings
+WRITE_SCENARIOS = [name for name, (method, _, _) in SCENARIOS.items() if method != 'GET']
+
+DEFAULT_SCENARIOS = [name for name, (method, _, _) in SCENARIOS.items() if method == 'GET']
+
+
+def _batched(objects, size=BATCH_SIZE):
+    for start in range(0, len(objects), size):
+        yield objects[start:start + size]
+
+
+def clear_dataset(stdout=None):
+    """Delete every seeded user and the data hanging off them"""
+    users = User.objects.filter(username__startswith=BENCH_USER_PREFIX)
+    Team.objects.filter(name__startswith=BENCH_USER_PREFIX).delete()
+    Challenge.objects.filter(name__startswith=BENCH_USER_PREFIX).delete()
+    Badge.objects.filter(name__startswith=BENCH_USER_PREFIX).delete()
+    deleted, _ = users.delete()
+    if stdout:
+        stdout.write(f'Removed {deleted} benchmark rows')
+
+
+def seed_dataset(users=100, activities_per_user=200, teams=10, challenges=5,
+                 badges=10, days=180, seed=42, stdout=None):
+    """Create a reproducible synthetic dataset of the requested size"""
+    rng = random.Random(seed)
+    now = timezone.now()
+
+    def log(message):
+        if stdout:
+            stdout.write(message)
+
+    with transaction.atomic():
+        password = make_password(BENCH_PASSWORD)
+        start_index = User.objects.filter(username__startswith=BENCH_USER_PREFIX).count()
+        user_objects = [
+            User(
+                username=f'{BENCH_USER_PREFIX}{start_index + i}',
+                email=f'{BENCH_USER_PREFIX}{start_index + i}@example.com',
+                password=password,
+                first_name='Bench',
+                last_name=str(start_index + i),
+            )
+            for i in range(users)
+        ]
+        User.objects.bulk_create(user_objects, batch_size=BATCH_SIZE)
+        user_objects = list(
+            User.objects.filter(username__in=[u.username for u in user_objects])
+        )
+        log(f'Created {len(user_objects)} users')
+
+        # Activities, bypassing Activity.save so stats can be set in bulk below
+        activities = []
+        for user in user_objects:
+            for _ in range(activities_per_user):
+                activity_type, fields, description = rng.choice(ACTIVITY_TEMPLATES)
+                activity = Activity(
+                    user=user, activity_type=activity_type,
+                    description=description, co2_impact=0, **fields
+                )
+                activity.co2_impact = calculate_co2_impact(activity)
+                activity.points_earned = int(activity.co2_impact * 10) if activity.co2_impact > 0 else 0
+                activity.timestamp = now - timedelta(
+                    days=rng.randrange(days), seconds=rng.randrange(86400)
+                )
+                activities.append(activity)
+
+        timestamps = [activity.timestamp for activity in activities]
+        for batch in _batched(activities):
+            Activity.objects.bulk_create(batch)
+        # auto_now_add overwrote the timestamps on insert; restore the spread
+        for activity, timestamp in zip(activities, timestamps):
+            activity.timestamp = timestamp
+        for batch in _batched(activities):
+            Activity.objects.bulk_update(batch, ['timestamp'])
+        log(f'Created {len(activities)} activities')
+
+        _rebuild_user_stats(user_objects, rng)
+        _rebuild_daily_summaries(user_objects)
+        log('Rebuilt user stats and daily summaries')
+
+        team_objects = Team.objects.bulk_create([
+            Team(
+                name=f'{BENCH_USER_PREFIX}team_{start_index}_{i}',
+                created_by=rng.choice(user_objects),
+                max_members=max(50, users),
+            )
+            for i in range(teams)
+        ])
+        memberships = []
+        for user in user_objects:
+            if team_objects and rng.random() < 0.8:
+                team = rng.choice(team_objects)
+                memberships.append(Team.members.through(team_id=team.id, user_id=user.id))
+        Team.members.through.objects.bulk_create(memberships, batch_size=BATCH_SIZE)
+        for team in team_objects:
+            team.update_stats()
+        log(f'Created {len(team_objects)} teams')
+
+        today = timezone.now().date()
+        challenge_objects = Challenge.objects.bulk_create([
+            Challenge(
+                name=f'{BENCH_USER_PREFIX}challenge_{start_index}_{i}',
+                description='Synthetic benchmark challenge',
+                challenge_type='individual',
+                target_type=rng.choice(['co2_saved', 'activities_count']),
+                target_value=rng.choice([10, 25, 50]),
+                reward_points=rng.choice([100, 250, 500]),
+                start_date=today - timedelta(days=rng.randrange(30)),
+                end_date=today + timedelta(days=rng.randrange(1, 30)),
+                status=Challenge.ONGOING,
+            )
+            for i in range(challenges)
+        ])
+        participations = [
+            ChallengeParticipation(
+                challenge=challenge, user=user,
+                progress=round(rng.random() * 100, 1),
+            )
+            for challenge in challenge_objects
+            for user in user_objects
+            if rng.random() < 0.5
+        ]
+        ChallengeParticipation.objects.bulk_create(participations, batch_size=BATCH_SIZE)
+        Challenge.recount_participants(Challenge.objects.filter(pk__in=[c.pk for c in challenge_objects]))
+        log(f'Created {len(challenge_objects)} challenges, {len(participations)} participations')
+
+        badge_objects = Badge.objects.bulk_create([
+            Badge(
+                name=f'{BENCH_USER_PREFIX}badge_{start_index}_{i}',
+                description='Synthetic benchmark badge',
+                category=rng.choice(['streak', 'co2', 'activity']),
+                requirement_type='points',
+                requirement_value=(i + 1) * 100,
+                points_reward=50,
+            )
+            for i in range(badges)
+        ])
+        user_badges = [
+            UserBadge(user=user, badge=badge)
+            for user in user_objects
+            for badge in badge_objects
+            if rng.random() < 0.3
+        ]
+        UserBadge.objects.bulk_create(user_badges, batch_size=BATCH_SIZE)
+        Notification.objects.bulk_create([
+            Notification(
+                user=user_badge.user, notification_type='badge',
+                title='Badge Unlocked', message='Synthetic benchmark notification',
+                related_id=user_badge.badge_id,
+            )
+            for user_badge in user_badges
+        ], batch_size=BATCH_SIZE)
+        log(f'Created {len(badge_objects)} badges, {len(user_badges)} awards')
+
+    return user_objects
+
+
+def _rebuild_user_stats(users, rng):
+    totals = {
+        row['user']: row
+        for row in Activity.objects.filter(user__in=users).order_by().values('user').annotate(
+            points=Sum('points_earned'),
+            saved=Sum('co2_impact', filter=Q(co2_impact__gt=0)),
+            count=Count('id'),
+        )
+    }
+    for user in users:
+        row = totals.get(user.id, {})
+        user.carbon_points = row.get('points') or 0
+        user.total_co2_saved = row.get('saved') or 0.0
+        user.total_activities = row.get('count') or 0
+        user.level = user.carbon_points // 1000 + 1
+        user.last_activity_date = timezone.now().date()
+        user.current_streak = rng.randint(0, 30)
+        user.longest_streak = user.current_streak + rng.randint(0, 30)
+    User.objects.bulk_update(
+        users,
+        ['carbon_points', 'total_co2_saved', 'total_activities', 'level',
+         'last_activity_date', 'current_streak', 'longest_streak'],
+        batch_size=BATCH_SIZE
+    )
+
+
+def _rebuild_daily_summaries(users):
+    summaries = {}
+    rows = Activity.objects.filter(user__in=users).values_list(
+        'user_id', 'timestamp', 'activity_type', 'co2_impact', 'points_earned'
+    )
+    for user_id, timestamp, activity_type, co2_impact, points_earned in rows.iterator(chunk_size=BATCH_SIZE):
+        key = (user_id, timezone.localtime(timestamp).date())
+        summary = summaries.get(key)
+        if summary is None:
+            summary = summaries[key] = DailySummary(user_id=key[0], date=key[1])
+        summary.activities_count += 1
+        summary.total_points += points_earned
+        summary.net_co2_impact += co2_impact
+        if co2_impact > 0:
+            summary.total_co2_saved += co2_impact
+        else:
+            summary.total_co2_emitted += abs(co2_impact)
+        setattr(summary, f'{activity_type}_co2', getattr(summary, f'{activity_type}_co2') + co2_impact)
+        setattr(summary, f'{activity_type}_count', getattr(summary, f'{activity_type}_count') + 1)
+    DailySummary.objects.bulk_create(summaries.values(), batch_size=BATCH_SIZE)
+
+
+def dataset_size():
+    """Row counts describing the dataset a benchmark ran against"""
+    return {
+        'users': User.objects.count(),
+        'activities': Activity.objects.count(),
+        'daily_summaries': DailySummary.objects.count(),
+        'teams': Team.objects.count(),
+        'challenges': Challenge.objects.count(),
+        'participations': ChallengeParticipation.objects.count(),
+        'badges': Badge.objects.count(),
+        'user_badges': UserBadge.objects.count(),
+    }
+
+
+def _percentile(sorted_values, percent):
+    if not sorted_values:
+        return 0.0
+    index = max(0, int(round(percent / 100 * len(sorted_values))) - 1)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def run_scenario(name, tokens, requests, concurrency):
+    """Drive one endpoint through the full Django stack from a thread pool"""
+    method, path, body = SCENARIOS[name]
+    latencies = []
+    query_counts = []
+    errors = 0
+    lock = threading.Lock()
+    local = threading.local()
+
+    def one_request(index):
+        nonlocal errors
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = Client()
+        token = tokens[index % len(tokens)]
+        collector = QueryCollector(time.perf_counter)
+        started = time.perf_counter()
+        with connection.execute_wrapper(collector):
+            if method == 'GET':
+                response = client.get(path, HTTP_AUTHORIZATION=f'Bearer {token}')
+            else:
+                response = client.post(
+                    path, body, content_type='application/json',
+                    HTTP_AUTHORIZATION=f'Bearer {token}'
+                )
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            query_counts.append(collector.count)
+            if response.status_code >= 400:
+                errors += 1
+
+    def worker_cleanup(_):
+        connections.close_all()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one_request, range(requests)))
+        # Close the per-thread connections opened by the workers
+        list(pool.map(worker_cleanup, range(concurrency)))
+    wall_seconds = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'method': method,
+        'path': path,
+        'requests': requests,
+        'errors': errors,
+        'p50_ms': round(_percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(_percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(_percentile(latencies, 99) * 1000, 3),
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+        'throughput_rps': round(requests / wall_seconds, 2) if wall_seconds else 0.0,
+        'queries_avg': round(statistics.fmean(query_counts), 2) if query_counts else 0.0,
+        'queries_max': max(query_counts, default=0),
+    }
+
+
+def bench_tokens(limit):
+    """Access tokens for up to `limit` seeded users"""
+    users = User.objects.filter(username__startswith=BENCH_USER_PREFIX).order_by('id')[:limit]
+    return [str(RefreshToken.for_user(user).access_token) for user in users]
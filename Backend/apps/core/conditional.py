@@ -0,0 +1,109 @@
+"""
+Conditional GET support (ETag / Last-Modified) for per-user read endpoints
+
+Validators are derived from data version tokens, so a request carrying a
+matching If-None-Match is answered with 304 before the view runs any
+aggregation.
+"""
+import hashlib
+from functools import wraps
+
+from django.utils import timezone
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+from . import versioning
+
+
+def _collect_versions(request, scopes):
+    versions = []
+    for scope in scopes:
+        if scope == 'user':
+            if request.user.is_authenticated:
+                versions.append(versioning.get_user_version(request.user.pk))
+        else:
+            versions.append(versioning.get_global_version(scope))
+    return versions
+
+
+def get_validators(request, scopes, view_key):
+    """Build the (etag, last_modified) pair for a request"""
+    versions = _collect_versions(request, scopes)
+    parts = [
+        view_key,
+        request.get_full_path(),
+        str(request.user.pk),
+        # Summaries depend on "today", so validators roll over at midnight
+        timezone.localdate().isoformat(),
+    ]
+    parts.extend(token for token, _ in versions)
+    digest = hashlib.md5('|'.join(parts).encode(), usedforsecurity=False).hexdigest()
+
+    last_modified = max((int(ts) for _, ts in versions), default=None)
+    return f'"{digest}"', last_modified
+
+
+def _is_not_modified(request, etag, last_modified):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        return '*' in etags or etag in etags
+
+    if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    if if_modified_since is not None and last_modified is not None:
+        return last_modified <= if_modified_since
+    return False
+
+
+def _set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ('Authorization',))
+    return response
+
+
+def conditional_response(request, scopes, view_key, get_response):
+    """Answer with 304 when the client's copy is current, else call get_response"""
+    etag, last_modified = get_validators(request, scopes, view_key)
+    if _is_not_modified(request, etag, last_modified):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = get_response()
+        if response.status_code != status.HTTP_200_OK:
+            return response
+    return _set_validators(response, etag, last_modified)
+
+
+def conditional_on_user_data(*scopes):
+    """Decorator for @api_view GET functions.
+
+    Scopes name the data the response depends on: 'user' for the
+    requesting user's own data, or a global version name such as
+    versioning.LEADERBOARD. Place it below @api_view/@permission_classes.
+    """
+    scopes = scopes or ('user',)
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            return conditional_response(
+                request, scopes, view_func.__qualname__,
+                lambda: view_func(request, *args, **kwargs)
+            )
+        return wrapper
+    return decorator
+
+
+class ConditionalUserDataMixin:
+    """Conditional GET for generic views, see conditional_on_user_data"""
+    conditional_scopes = ('user',)
+
+    def get(self, request, *args, **kwargs):
+        return conditional_response(
+            request, self.conditional_scopes, type(self).__qualname__,
+            lambda: super(ConditionalUserDataMixin, self).get(request, *args, **kwargs)
+        )
@@ -0,0 +1,41 @@
+"""
+Local-date windows as half-open datetime ranges
+
+Filtering with `timestamp__date` casts the column to a date in the current
+time zone, which hides it from any index on timestamp. These helpers turn a
+window of local dates (TIME_ZONE, Asia/Kathmandu) into
+`start <= timestamp < end` so the database can range-scan the index.
+"""
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+
+def local_midnight(day):
+    """Aware datetime for the start of `day` in the current time zone"""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def date_range(start_date, end_date=None):
+    """(start, end) datetimes covering the local dates start_date..end_date.
+
+    Both dates are inclusive; end is exclusive midnight of the following
+    day. end is None when end_date is None (open-ended window).
+    """
+    start = local_midnight(start_date)
+    end = local_midnight(end_date + timedelta(days=1)) if end_date is not None else None
+    return start, end
+
+
+def date_range_filter(start_date, end_date=None, field='timestamp'):
+    """Lookup kwargs equivalent to field__date__gte/lte, but sargable"""
+    start, end = date_range(start_date, end_date)
+    lookups = {f'{field}__gte': start}
+    if end is not None:
+        lookups[f'{field}__lt'] = end
+    return lookups
+
+
+def day_filter(day, field='timestamp'):
+    """Lookup kwargs equivalent to field__date=day"""
+    return date_range_filter(day, day, field)
@@ -0,0 +1,56 @@
+"""
+In-process background jobs
+
+Admin actions hand long-running work to a small thread pool so the request
+returns immediately. Jobs are queued when the surrounding transaction
+commits and each one closes its own database connections. Like the login
+event buffer, queued jobs do not survive a worker restart; everything run
+here must be safe to re-run.
+
+Set BACKGROUND_JOBS_INLINE to run jobs synchronously (scripts, debugging).
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.BACKGROUND_JOB_WORKERS, thread_name_prefix='job'
+            )
+        return _executor
+
+
+def _run(name, func, args, kwargs):
+    close_old_connections()
+    try:
+        func(*args, **kwargs)
+        logger.info('Background job %s finished', name)
+    except Exception:
+        logger.exception('Background job %s failed', name)
+    finally:
+        connections.close_all()
+
+
+def submit(func, *args, **kwargs):
+    """Run func(*args, **kwargs) in the background once the current transaction commits"""
+    name = getattr(func, '__qualname__', repr(func))
+
+    def enqueue():
+        if settings.BACKGROUND_JOBS_INLINE:
+            func(*args, **kwargs)
+        else:
+            _get_executor().submit(_run, name, func, args, kwargs)
+
+    transaction.on_commit(enqueue)
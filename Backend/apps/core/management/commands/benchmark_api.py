@@ -0,0 +1,123 @@
+"""
+Drive the key API endpoints in-process and report latency and query counts
+
+    python manage.py benchmark_api --requests 200 --concurrency 8 --output bench.json
+    python manage.py benchmark_api --compare bench.json
+
+Run seed_benchmark_data first. Results are JSON so runs from different
+commits can be diffed with --compare.
+"""
+import json
+import subprocess
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from apps.core.benchmark import (
+    DEFAULT_SCENARIOS, SCENARIOS, WRITE_SCENARIOS, bench_tokens, dataset_size, run_scenario
+)
+
+COMPARED_METRICS = ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps', 'queries_avg')
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = 'Benchmark API endpoints against the seeded dataset'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenarios', default=','.join(DEFAULT_SCENARIOS),
+                            help=f'Comma separated, from: {", ".join(SCENARIOS)}')
+        parser.add_argument('--writes', action='store_true',
+                            help=f'Run the write scenarios ({", ".join(WRITE_SCENARIOS)}) instead')
+        parser.add_argument('--requests', type=int, default=100,
+                            help='Requests per scenario')
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--users', type=int, default=50,
+                            help='Number of seeded users to spread requests across')
+        parser.add_argument('--warmup', type=int, default=5,
+                            help='Unmeasured requests per scenario before timing')
+        parser.add_argument('--output', help='Write the JSON report to this path')
+        parser.add_argument('--compare', help='Baseline JSON report to diff against')
+
+    def handle(self, *args, **options):
+        if options['writes']:
+            names = WRITE_SCENARIOS
+        else:
+            names = [name.strip() for name in options['scenarios'].split(',') if name.strip()]
+        unknown = [name for name in names if name not in SCENARIOS]
+        if unknown:
+            raise CommandError(f'Unknown scenarios: {", ".join(unknown)}')
+
+        tokens = bench_tokens(options['users'])
+        if not tokens:
+            raise CommandError('No benchmark users found, run seed_benchmark_data first')
+
+        report = {
+            'meta': {
+                'commit': _git_commit(),
+                'timestamp': timezone.now().isoformat(),
+                'requests': options['requests'],
+                'concurrency': options['concurrency'],
+                'users': len(tokens),
+                'database': settings.DATABASES['default']['ENGINE'],
+                'database_options': {
+                    key: str(value) for key, value in settings.DATABASES['default'].get('OPTIONS', {}).items()
+                },
+                'dataset': dataset_size(),
+            },
+            'scenarios': {},
+        }
+
+        allowed_hosts = list(settings.ALLOWED_HOSTS) + ['testserver']
+        with override_settings(ALLOWED_HOSTS=allowed_hosts):
+            for name in names:
+                if options['warmup']:
+                    run_scenario(name, tokens, options['warmup'], 1)
+                result = run_scenario(name, tokens, options['requests'], options['concurrency'])
+                report['scenarios'][name] = result
+                self.stdout.write(
+                    f'{name:<22} p50 {result["p50_ms"]:>8.2f}ms  p95 {result["p95_ms"]:>8.2f}ms  '
+                    f'p99 {result["p99_ms"]:>8.2f}ms  {result["throughput_rps"]:>8.1f} req/s  '
+                    f'queries {result["queries_avg"]:>5.1f}  errors {result["errors"]}'
+                )
+
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump(report, handle, indent=2, sort_keys=True)
+            self.stdout.write(self.style.SUCCESS(f'Report written to {options["output"]}'))
+        else:
+            self.stdout.write(json.dumps(report, indent=2, sort_keys=True))
+
+        if options['compare']:
+            self._compare(options['compare'], report)
+
+    def _compare(self, path, report):
+        try:
+            with open(path) as handle:
+                baseline = json.load(handle)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f'Cannot read baseline {path}: {exc}')
+
+        self.stdout.write(f'\nCompared with {baseline["meta"].get("commit")} ({path}):')
+        for name, result in report['scenarios'].items():
+            before = baseline['scenarios'].get(name)
+            if before is None:
+                self.stdout.write(f'{name:<22} (not in baseline)')
+                continue
+            deltas = []
+            for metric in COMPARED_METRICS:
+                old, new = before.get(metric, 0), result[metric]
+                change = f'{(new - old) / old * 100:+.1f}%' if old else 'n/a'
+                deltas.append(f'{metric} {old} -> {new} ({change})')
+            self.stdout.write(f'{name:<22} ' + '  '.join(deltas))
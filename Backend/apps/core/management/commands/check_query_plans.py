@@ -0,0 +1,108 @@
+"""
+Flag full table scans in the queries behind the hot endpoints
+
+    python manage.py check_query_plans --fail
+
+Each benchmark scenario is requested once as a seeded user. Every SELECT
+it runs is passed through EXPLAIN, and plans that read a whole table
+(SQLite "SCAN <table>" without an index, PostgreSQL "Seq Scan") are
+reported. Small catalogue tables are scanned by design and skipped.
+"""
+import re
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+
+from apps.core.benchmark import DEFAULT_SCENARIOS, SCENARIOS, bench_tokens
+
+# Few rows, read in full on purpose
+SMALL_TABLES = {
+    'apps_Gamification_badge', 'apps_Gamification_achievement',
+    'apps_Challenges_challenge', 'apps_Rewards_reward', 'apps_Leaderboard_team',
+    'apps_Emissions_emissionfactor', 'django_content_type',
+}
+
+SQLITE_SCAN = re.compile(r'\bSCAN (?:TABLE )?(\S+)$', re.MULTILINE)
+POSTGRES_SCAN = re.compile(r'Seq Scan on (\S+)')
+
+
+class StatementCapture:
+    """Execute wrapper keeping every SELECT with its parameters"""
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.lstrip().upper().startswith('SELECT') and not many:
+            self.statements.append((sql, params))
+        return execute(sql, params, many, context)
+
+
+def full_scans(sql, params):
+    """Tables read without an index according to the database's plan"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = '\n'.join(row[-1] for row in cursor.fetchall())
+            pattern = SQLITE_SCAN
+        elif connection.vendor == 'postgresql':
+            cursor.execute(f'EXPLAIN {sql}', params)
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+            pattern = POSTGRES_SCAN
+        else:
+            raise CommandError(f'Unsupported database vendor {connection.vendor}')
+    tables = {table.strip('"') for table in pattern.findall(plan)}
+    return tables - SMALL_TABLES, plan
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the queries of the hot endpoints and report full table scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenarios', default=','.join(DEFAULT_SCENARIOS))
+        parser.add_argument('--fail', action='store_true',
+                            help='Exit with an error when any scan is found')
+        parser.add_argument('--show-plans', action='store_true')
+
+    def handle(self, *args, **options):
+        names = [name.strip() for name in options['scenarios'].split(',') if name.strip()]
+        unknown = [name for name in names if name not in SCENARIOS]
+        if unknown:
+            raise CommandError(f'Unknown scenarios: {", ".join(unknown)}')
+
+        tokens = bench_tokens(1)
+        if not tokens:
+            raise CommandError('No benchmark users found, run seed_benchmark_data first')
+
+        client = Client()
+        findings = []
+        allowed_hosts = list(settings.ALLOWED_HOSTS) + ['testserver']
+        with override_settings(ALLOWED_HOSTS=allowed_hosts):
+            for name in names:
+                method, path, _ = SCENARIOS[name]
+                if method != 'GET':
+                    continue
+                capture = StatementCapture()
+                with connection.execute_wrapper(capture):
+                    client.get(path, HTTP_AUTHORIZATION=f'Bearer {tokens[0]}')
+
+                for sql, params in capture.statements:
+                    tables, plan = full_scans(sql, params)
+                    if tables:
+                        findings.append((name, tables, sql))
+                        self.stdout.write(self.style.WARNING(
+                            f'{name}: full scan of {", ".join(sorted(tables))}\n    {sql[:200]}'
+                        ))
+                        if options['show_plans']:
+                            self.stdout.write(f'    {plan}')
+
+        if findings:
+            message = f'{len(findings)} queries scan whole tables'
+            if options['fail']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS('No full table scans on the checked endpoints'))
@@ -0,0 +1,101 @@
+"""
+Bulk-copy every table from one configured database to another
+
+    python manage.py copy_database --source sqlite --target default --flush
+
+The target schema must already exist (run migrate on it first). Rows keep
+their primary keys, and sequences are reset afterwards so new inserts do
+not collide. On PostgreSQL foreign keys are deferred until commit, so
+tables can be copied in any order inside the single transaction.
+"""
+from django.apps import apps
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connections, transaction
+
+
+class Command(BaseCommand):
+    help = 'Copy all rows from the source database alias into the target alias'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', required=True, help='Database alias to read from')
+        parser.add_argument('--target', default='default', help='Database alias to write to')
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--flush', action='store_true',
+                            help='Empty the target first, including rows created by migrate')
+
+    def handle(self, *args, **options):
+        source, target = options['source'], options['target']
+        if source == target:
+            raise CommandError('Source and target must differ')
+        for alias in (source, target):
+            if alias not in connections:
+                raise CommandError(f'Unknown database alias {alias!r}')
+
+        source_tables = set(connections[source].introspection.table_names())
+        target_tables = set(connections[target].introspection.table_names())
+        models = [
+            model for model in apps.get_models(include_auto_created=True)
+            if model._meta.managed and not model._meta.proxy
+            and model._meta.db_table in source_tables
+        ]
+        missing = [model._meta.db_table for model in models if model._meta.db_table not in target_tables]
+        if missing:
+            raise CommandError(f'Target is missing tables {", ".join(missing)}, run migrate first')
+
+        if options['flush']:
+            # Content types and permissions are copied with their source ids
+            call_command('flush', database=target, interactive=False,
+                         inhibit_post_migrate=True, verbosity=0)
+        else:
+            populated = [
+                model._meta.label for model in models
+                if model._base_manager.using(target).exists()
+            ]
+            if populated:
+                raise CommandError(f'Target already has rows in {", ".join(populated)}, use --flush')
+
+        with transaction.atomic(using=target):
+            for model in models:
+                copied = self._copy_model(model, source, target, options['batch_size'])
+                if options['verbosity']:
+                    self.stdout.write(f'{model._meta.label}: {copied} rows')
+
+            connection = connections[target]
+            statements = connection.ops.sequence_reset_sql(no_style(), models)
+            if statements:
+                with connection.cursor() as cursor:
+                    for sql in statements:
+                        cursor.execute(sql)
+
+        self.stdout.write(self.style.SUCCESS(f'Copied {len(models)} tables from {source} to {target}'))
+
+    def _copy_model(self, model, source, target, batch_size):
+        # auto_now(_add) fields would otherwise be overwritten on insert
+        timestamp_fields = [
+            field for field in model._meta.concrete_fields
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+        ]
+        saved = [(field, field.auto_now, field.auto_now_add) for field in timestamp_fields]
+        for field in timestamp_fields:
+            field.auto_now = field.auto_now_add = False
+        try:
+            return self._copy_rows(model, source, target, batch_size)
+        finally:
+            for field, auto_now, auto_now_add in saved:
+                field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+    def _copy_rows(self, model, source, target, batch_size):
+        copied = 0
+        batch = []
+        for obj in model._base_manager.using(source).order_by('pk').iterator(chunk_size=batch_size):
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                model._base_manager.using(target).bulk_create(batch)
+                copied += len(batch)
+                batch = []
+        if batch:
+            model._base_manager.using(target).bulk_create(batch)
+            copied += len(batch)
+        return copied
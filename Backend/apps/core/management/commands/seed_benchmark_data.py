@@ -0,0 +1,40 @@
+"""
+Seed a synthetic, reproducible dataset for the API benchmarks
+
+    python manage.py seed_benchmark_data --users 500 --activities-per-user 300
+"""
+from django.core.management.base import BaseCommand
+
+from apps.core.benchmark import clear_dataset, dataset_size, seed_dataset
+
+
+class Command(BaseCommand):
+    help = 'Create synthetic users, activities, teams, challenges and badges for benchmarking'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--activities-per-user', type=int, default=200)
+        parser.add_argument('--teams', type=int, default=10)
+        parser.add_argument('--challenges', type=int, default=5)
+        parser.add_argument('--badges', type=int, default=10)
+        parser.add_argument('--days', type=int, default=180,
+                            help='Spread activity timestamps over this many past days')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--clear', action='store_true',
+                            help='Remove the existing benchmark dataset first')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            clear_dataset(stdout=self.stdout)
+
+        seed_dataset(
+            users=options['users'],
+            activities_per_user=options['activities_per_user'],
+            teams=options['teams'],
+            challenges=options['challenges'],
+            badges=options['badges'],
+            days=options['days'],
+            seed=options['seed'],
+            stdout=self.stdout,
+        )
+        self.stdout.write(self.style.SUCCESS(f'Dataset: {dataset_size()}'))
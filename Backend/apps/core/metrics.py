@@ -0,0 +1,174 @@
+"""
+In-process request metrics: query counts, SQL time, render time and
+response size per URL name, exported in Prometheus text format or JSON
+"""
+import json
+import threading
+from collections import defaultdict
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRIC_PREFIX = 'carbon_karma'
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised in strict mode when a view runs more queries than budgeted"""
+
+
+class QueryCollector:
+    """Database execute wrapper counting queries and their total duration"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = self.clock()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += self.clock() - started
+
+
+class _ViewStats:
+    __slots__ = (
+        'requests', 'statuses', 'queries', 'max_queries', 'sql_seconds',
+        'request_seconds', 'render_seconds', 'response_bytes', 'buckets',
+        'budget_violations',
+    )
+
+    def __init__(self):
+        self.requests = 0
+        self.statuses = defaultdict(int)
+        self.queries = 0
+        self.max_queries = 0
+        self.sql_seconds = 0.0
+        self.request_seconds = 0.0
+        self.render_seconds = 0.0
+        self.response_bytes = 0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.budget_violations = 0
+
+    def as_dict(self):
+        return {
+            'requests': self.requests,
+            'statuses': dict(self.statuses),
+            'queries_total': self.queries,
+            'queries_max': self.max_queries,
+            'queries_avg': round(self.queries / self.requests, 2) if self.requests else 0,
+            'sql_seconds_total': round(self.sql_seconds, 6),
+            'request_seconds_total': round(self.request_seconds, 6),
+            'render_seconds_total': round(self.render_seconds, 6),
+            'response_bytes_total': self.response_bytes,
+            'budget_violations': self.budget_violations,
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe per-view aggregates for the lifetime of the process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = defaultdict(_ViewStats)
+
+    def record(self, view, status_code, queries, sql_seconds, request_seconds,
+               render_seconds, response_bytes, over_budget=False):
+        with self._lock:
+            stats = self._views[view]
+            stats.requests += 1
+            stats.statuses[status_code] += 1
+            stats.queries += queries
+            stats.max_queries = max(stats.max_queries, queries)
+            stats.sql_seconds += sql_seconds
+            stats.request_seconds += request_seconds
+            stats.render_seconds += render_seconds
+            stats.response_bytes += response_bytes
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if request_seconds <= bound:
+                    stats.buckets[index] += 1
+            if over_budget:
+                stats.budget_violations += 1
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+    def snapshot(self):
+        with self._lock:
+            return {view: stats.as_dict() for view, stats in sorted(self._views.items())}
+
+    def dump_json(self, path):
+        """Write the current snapshot to a local JSON file"""
+        with open(path, 'w') as handle:
+            json.dump(self.snapshot(), handle, indent=2, sort_keys=True)
+
+    def render_prometheus(self):
+        """Render all metrics in the Prometheus text exposition format"""
+        with self._lock:
+            views = sorted(self._views.items())
+            lines = []
+
+            def family(name, kind, help_text, samples):
+                lines.append(f'# HELP {METRIC_PREFIX}_{name} {help_text}')
+                lines.append(f'# TYPE {METRIC_PREFIX}_{name} {kind}')
+                for labels, value in samples:
+                    label_text = ','.join(f'{k}="{_escape(v)}"' for k, v in labels)
+                    lines.append(f'{METRIC_PREFIX}_{name}{{{label_text}}} {value}')
+
+            family('http_requests_total', 'counter', 'Requests handled, by view and status.', [
+                ((('view', view), ('status', code)), count)
+                for view, stats in views for code, count in sorted(stats.statuses.items())
+            ])
+
+            histogram = []
+            for view, stats in views:
+                for bound, count in zip(LATENCY_BUCKETS, stats.buckets):
+                    histogram.append(((('view', view), ('le', bound)), count))
+                histogram.append(((('view', view), ('le', '+Inf')), stats.requests))
+            lines.append(f'# HELP {METRIC_PREFIX}_http_request_duration_seconds Request latency.')
+            lines.append(f'# TYPE {METRIC_PREFIX}_http_request_duration_seconds histogram')
+            for labels, value in histogram:
+                label_text = ','.join(f'{k}="{_escape(v)}"' for k, v in labels)
+                lines.append(
+                    f'{METRIC_PREFIX}_http_request_duration_seconds_bucket{{{label_text}}} {value}'
+                )
+            for view, stats in views:
+                lines.append(
+                    f'{METRIC_PREFIX}_http_request_duration_seconds_sum'
+                    f'{{view="{_escape(view)}"}} {stats.request_seconds}'
+                )
+                lines.append(
+                    f'{METRIC_PREFIX}_http_request_duration_seconds_count'
+                    f'{{view="{_escape(view)}"}} {stats.requests}'
+                )
+
+            family('db_queries_total', 'counter', 'SQL queries executed.', [
+                ((('view', view),), stats.queries) for view, stats in views
+            ])
+            family('db_queries_max', 'gauge', 'Most SQL queries seen in a single request.', [
+                ((('view', view),), stats.max_queries) for view, stats in views
+            ])
+            family('db_query_duration_seconds_total', 'counter', 'Time spent in SQL.', [
+                ((('view', view),), stats.sql_seconds) for view, stats in views
+            ])
+            family('render_duration_seconds_total', 'counter', 'Time spent rendering responses.', [
+                ((('view', view),), stats.render_seconds) for view, stats in views
+            ])
+            family('response_bytes_total', 'counter', 'Response body bytes sent.', [
+                ((('view', view),), stats.response_bytes) for view, stats in views
+            ])
+            family('query_budget_violations_total', 'counter', 'Requests over their query budget.', [
+                ((('view', view),), stats.budget_violations) for view, stats in views
+            ])
+
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,104 @@
+"""
+Middleware for the Core app
+"""
+import logging
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from .metrics import QueryBudgetExceeded, QueryCollector, registry
+
+logger = logging.getLogger(__name__)
+
+UNRESOLVED_VIEW = '<unresolved>'
+
+
+class QueryMetricsMiddleware:
+    """Record query count, SQL time, render time, latency and response size
+    per URL name, and enforce the per-view budgets in QUERY_BUDGETS.
+
+    Over-budget requests are logged, or raise QueryBudgetExceeded when
+    QUERY_BUDGET_STRICT is on (the test runner turns it on).
+
+    Under ASGI it runs natively async, so async views such as the event
+    stream are not pushed through a thread. Sync views and ORM calls of
+    an async request run in the request's thread-sensitive worker thread,
+    whose connections are wrapped instead of the event loop's.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            return self.get_response(request)
+
+        collector = QueryCollector(time.perf_counter)
+        started = time.perf_counter()
+        with self._collect(collector):
+            response = self.get_response(request)
+        return self._record(request, response, collector, started)
+
+    async def __acall__(self, request):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            return await self.get_response(request)
+
+        collector = QueryCollector(time.perf_counter)
+        started = time.perf_counter()
+        stack = await sync_to_async(self._collect)(collector)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self._record(request, response, collector, started)
+
+    @staticmethod
+    def _collect(collector):
+        stack = ExitStack()
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(collector))
+        return stack
+
+    def _record(self, request, response, collector, started):
+        finished = time.perf_counter()
+
+        render_started = getattr(request, '_metrics_render_started', None)
+        render_seconds = finished - render_started if render_started else 0.0
+        response_bytes = 0 if response.streaming else len(response.content)
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match and match.view_name else UNRESOLVED_VIEW
+
+        budget = getattr(settings, 'QUERY_BUDGETS', {}).get(view)
+        over_budget = budget is not None and collector.count > budget
+
+        registry.record(
+            view, response.status_code, collector.count, collector.seconds,
+            finished - started, render_seconds, response_bytes, over_budget
+        )
+
+        if over_budget:
+            message = (
+                f'{view} ran {collector.count} queries, over its budget of {budget} '
+                f'({request.method} {request.path})'
+            )
+            if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook returns
+        request._metrics_render_started = time.perf_counter()
+        return response
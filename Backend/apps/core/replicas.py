@@ -0,0 +1,90 @@
+"""
+Read-replica routing for designated read-only views
+
+Views opt in with @read_from_replica (function views) or ReplicaReadMixin
+(generic views); everything else, and every write, stays on the primary.
+A user whose data changed within REPLICA_READ_YOUR_WRITES_SECONDS keeps
+reading from the primary so they never see their own write missing.
+The window is measured from the user's data version (apps.core.versioning),
+which is bumped on every write to their rows.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from . import versioning
+
+_read_alias = ContextVar('replica_read_alias', default=None)
+
+
+def replica_alias():
+    """The configured replica alias, or None when there is no replica"""
+    alias = settings.REPLICA_DATABASE
+    return alias if alias and alias in settings.DATABASES else None
+
+
+def recently_wrote(user):
+    if user is None or not user.is_authenticated:
+        return False
+    _, last_modified = versioning.get_user_version(user.pk)
+    return time.time() - last_modified < settings.REPLICA_READ_YOUR_WRITES_SECONDS
+
+
+@contextmanager
+def replica_reads(user=None):
+    """Send reads in this block to the replica, unless `user` just wrote"""
+    alias = replica_alias()
+    if alias and recently_wrote(user):
+        alias = None
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def read_from_replica(view_func):
+    """Decorator for @api_view functions, placed directly above the def"""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        with replica_reads(request.user):
+            return view_func(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaReadMixin:
+    """Serve GET requests of a generic view from the replica"""
+
+    def get(self, request, *args, **kwargs):
+        with replica_reads(request.user):
+            return super().get(request, *args, **kwargs)
+
+
+class ReplicaRouter:
+    """Route reads inside replica_reads() to the replica, all writes to the primary"""
+
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        # Uncommitted rows of an open transaction only exist on the primary
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, replica_alias()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica receives its schema through replication
+        if db == replica_alias():
+            return False
+        return None
@@ -0,0 +1,67 @@
+"""
+Signal handlers that bump data versions when the underlying rows change
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+
+from apps.challenges.models import Challenge, ChallengeParticipation
+from apps.gamification.models import (
+    Achievement, Badge, DailyStreak, Notification, UserAchievement, UserBadge
+)
+from apps.rewards.models import Redemption, Reward
+from apps.tracking.models import Activity, ActivityGoal, DailySummary
+from .versioning import BADGES, CHALLENGES, LEADERBOARD, REWARDS, touch_global, touch_users
+
+User = get_user_model()
+
+# Fields shown on the leaderboard; saves touching only other fields leave it valid
+LEADERBOARD_FIELDS = {
+    'username', 'first_name', 'last_name', 'avatar', 'location',
+    'carbon_points', 'total_co2_saved', 'current_streak', 'level',
+}
+
+USER_OWNED_MODELS = (
+    Activity, DailySummary, ActivityGoal,
+    UserBadge, UserAchievement, Notification, DailyStreak,
+    ChallengeParticipation, Redemption,
+)
+
+
+def user_data_changed(sender, instance, **kwargs):
+    touch_users(instance.user_id)
+
+
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    touch_users(instance.pk)
+    if update_fields is None or LEADERBOARD_FIELDS.intersection(update_fields):
+        touch_global(LEADERBOARD)
+
+
+def badges_changed(sender, **kwargs):
+    touch_global(BADGES)
+
+
+def challenges_changed(sender, **kwargs):
+    touch_global(CHALLENGES)
+
+
+def rewards_changed(sender, **kwargs):
+    touch_global(REWARDS)
+
+
+for model in USER_OWNED_MODELS:
+    post_save.connect(user_data_changed, sender=model, dispatch_uid=f'core-version-{model.__name__}')
+    post_delete.connect(user_data_changed, sender=model, dispatch_uid=f'core-version-del-{model.__name__}')
+
+post_save.connect(user_changed, sender=User, dispatch_uid='core-version-user')
+post_delete.connect(user_changed, sender=User, dispatch_uid='core-version-del-user')
+
+for model in (Badge, Achievement):
+    post_save.connect(badges_changed, sender=model, dispatch_uid=f'core-version-{model.__name__}')
+    post_delete.connect(badges_changed, sender=model, dispatch_uid=f'core-version-del-{model.__name__}')
+
+post_save.connect(challenges_changed, sender=Challenge, dispatch_uid='core-version-challenge')
+post_delete.connect(challenges_changed, sender=Challenge, dispatch_uid='core-version-del-challenge')
+
+post_save.connect(rewards_changed, sender=Reward, dispatch_uid='core-version-reward')
+post_delete.connect(rewards_changed, sender=Reward, dispatch_uid='core-version-del-reward')
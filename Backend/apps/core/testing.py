@@ -0,0 +1,62 @@
+"""
+Test runner for a tree where most apps have no migration files yet
+
+    python manage.py test
+
+Apps whose migrations package is empty would get no tables in the test
+database, so their tables are created straight from the models, as
+`migrate --run-syncdb` does for a development database. Query budgets
+are strict during the run: a request over its QUERY_BUDGETS entry fails
+the test instead of logging a warning. Without a configured replica the
+run gets a stand-in: a second connection to the default test database,
+so the replica routing can be exercised.
+"""
+import pkgutil
+from importlib import import_module
+
+from django.apps import apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+def unmigrated_apps():
+    """Labels of installed apps with an empty migrations package"""
+    labels = []
+    for app_config in apps.get_app_configs():
+        try:
+            module = import_module(f'{app_config.name}.migrations')
+        except ImportError:
+            continue
+        names = [name for _, name, _ in pkgutil.iter_modules(module.__path__) if not name.startswith('_')]
+        if not names:
+            labels.append(app_config.label)
+    return labels
+
+
+def add_replica_stand_in():
+    alias = settings.REPLICA_DATABASE
+    if not alias or alias in settings.DATABASES:
+        return
+    primary = settings.DATABASES[DEFAULT_DB_ALIAS]
+    settings.DATABASES[alias] = dict(primary, TEST={'MIRROR': DEFAULT_DB_ALIAS})
+    connections.settings[alias] = connections.configure_settings(
+        {DEFAULT_DB_ALIAS: dict(primary), alias: settings.DATABASES[alias]}
+    )[alias]
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._strict_budgets = override_settings(QUERY_BUDGET_STRICT=True)
+        self._strict_budgets.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._strict_budgets.disable()
+        super().teardown_test_environment(**kwargs)
+
+    def setup_databases(self, **kwargs):
+        add_replica_stand_in()
+        with override_settings(MIGRATION_MODULES={label: None for label in unmigrated_apps()}):
+            return super().setup_databases(**kwargs)
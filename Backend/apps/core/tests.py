@@ -0,0 +1,200 @@
+import unittest
+from datetime import date, datetime, timedelta
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import connection, connections, router, transaction
+from django.http import HttpResponse
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.tracking.models import Activity
+from apps.users.authentication import ClaimsRefreshToken
+from apps.users.models import User
+
+from . import versioning
+from .dates import date_range_filter, day_filter
+from .metrics import QueryBudgetExceeded, registry
+from .middleware import QueryMetricsMiddleware
+from .replicas import replica_alias, replica_reads
+
+
+class VersioningTests(TestCase):
+    def test_touching_a_user_changes_only_their_version(self):
+        first, second = versioning.get_user_version(1), versioning.get_user_version(2)
+        versioning.touch_users(1)
+        self.assertNotEqual(versioning.get_user_version(1), first)
+        self.assertEqual(versioning.get_user_version(2), second)
+
+    def test_touches_inside_a_transaction_are_repeated_on_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            versioning.touch_users(1)
+            during = versioning.get_user_version(1)
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        # A response built before the commit carries a token that is now stale
+        self.assertNotEqual(versioning.get_user_version(1), during)
+
+
+class DateFilterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', password='pass12345')
+
+    def test_windows_follow_local_midnight(self):
+        day = date(2024, 3, 10)
+        Activity.objects.create(
+            user=self.user, activity_type='transport', transport_mode='walk',
+            distance_km=2, description='Walk'
+        )
+        # 00:30 in Kathmandu is still the previous day in UTC
+        Activity.objects.update(timestamp=timezone.make_aware(datetime(2024, 3, 10, 0, 30)))
+        self.assertTrue(Activity.objects.filter(**day_filter(day)).exists())
+        self.assertFalse(Activity.objects.filter(**day_filter(day - timedelta(days=1))).exists())
+        self.assertEqual(
+            Activity.objects.filter(**date_range_filter(day - timedelta(days=1), day)).count(),
+            Activity.objects.filter(timestamp__date__range=(day - timedelta(days=1), day)).count(),
+        )
+
+    @unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN is SQLite syntax')
+    def test_filters_range_scan_the_user_timestamp_index(self):
+        day = timezone.localdate()
+        for lookups in (day_filter(day), date_range_filter(day - timedelta(days=6), day),
+                        date_range_filter(day)):
+            plan = Activity.objects.filter(user=self.user, **lookups).explain()
+            self.assertRegex(plan, r'SEARCH \S+ USING (COVERING )?INDEX \S+ \(user_id=\? AND timestamp>')
+            self.assertNotRegex(plan, r'\bSCAN ')
+
+    @unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN is SQLite syntax')
+    def test_date_lookups_cannot_use_the_index_for_the_window(self):
+        plan = Activity.objects.filter(user=self.user, timestamp__date=timezone.localdate()).explain()
+        self.assertNotIn('timestamp>', plan)
+
+
+class ConditionalGetTests(TestCase):
+    url = '/api/tracking/weekly-summary/'
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', password='pass12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_matching_etag_is_answered_with_304_without_queries(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_writes_change_the_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        Activity.objects.create(
+            user=self.user, activity_type='transport', transport_mode='walk',
+            distance_km=2, description='Walk'
+        )
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['total_activities'], 1)
+
+    def test_if_modified_since(self):
+        last_modified = self.client.get(self.url)['Last-Modified']
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_etags_are_per_user(self):
+        etag = self.client.get(self.url)['ETag']
+        other = APIClient()
+        other.force_authenticate(User.objects.create_user(username='bob', password='pass12345'))
+        self.assertEqual(other.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class QueryMetricsMiddlewareTests(TestCase):
+    def setUp(self):
+        registry.reset()
+        self.user = User.objects.create_user(username='alice', password='pass12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_budgets_are_strict_in_tests(self):
+        self.assertTrue(settings.QUERY_BUDGET_STRICT)
+        with override_settings(QUERY_BUDGETS={'tracking:weekly-summary': 0}):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get('/api/tracking/weekly-summary/')
+        self.assertEqual(registry.snapshot()['tracking:weekly-summary']['budget_violations'], 1)
+
+    def test_requests_are_recorded_by_view_name(self):
+        self.client.get('/api/tracking/weekly-summary/')
+        stats = registry.snapshot()['tracking:weekly-summary']
+        self.assertEqual(stats['requests'], 1)
+        self.assertGreater(stats['queries_total'], 0)
+        self.assertGreater(stats['response_bytes_total'], 0)
+
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'carbon_karma_http_requests_total{view="tracking:weekly-summary",status="200"} 1',
+            response.content.decode()
+        )
+
+    async def test_async_requests_count_queries_of_their_sync_parts(self):
+        token = str(ClaimsRefreshToken.for_user(self.user).access_token)
+        response = await self.async_client.get(
+            '/api/realtime/stream/', headers={'Authorization': f'Bearer {token}'}
+        )
+        self.assertEqual(response.status_code, 200)
+        stats = registry.snapshot()['realtime:event-stream']
+        self.assertEqual(stats['requests'], 1)
+        # The user lookup runs in a worker thread
+        self.assertEqual(stats['queries_total'], 1)
+
+    def test_middleware_is_async_capable(self):
+        self.assertTrue(QueryMetricsMiddleware.async_capable)
+
+        async def get_response(request):
+            return HttpResponse('ok')
+
+        self.assertTrue(iscoroutinefunction(QueryMetricsMiddleware(get_response)))
+
+
+@override_settings(REPLICA_READ_YOUR_WRITES_SECONDS=5)
+class ReplicaRoutingTests(TransactionTestCase):
+    databases = {'default', 'replica'}
+    url = '/api/tracking/daily-summary/'
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', password='pass12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def queries_by_alias(self):
+        primary = CaptureQueriesContext(connections['default'])
+        replica = CaptureQueriesContext(connections['replica'])
+        with primary, replica:
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        return len(primary), len(replica)
+
+    def test_reads_of_designated_views_go_to_the_replica(self):
+        self.assertEqual(replica_alias(), 'replica')
+        with override_settings(REPLICA_READ_YOUR_WRITES_SECONDS=0):
+            self.assertEqual(self.queries_by_alias(), (0, 1))
+
+    def test_users_who_just_wrote_read_from_the_primary(self):
+        # Creating the user bumped their data version a moment ago
+        self.assertEqual(self.queries_by_alias(), (1, 0))
+
+    def test_reads_in_a_transaction_stay_on_the_primary(self):
+        with replica_reads():
+            self.assertEqual(router.db_for_read(User), 'replica')
+            with transaction.atomic():
+                self.assertEqual(router.db_for_read(User), 'default')
+
+    def test_writes_always_go_to_the_primary(self):
+        with replica_reads():
+            self.assertEqual(router.db_for_write(User), 'default')
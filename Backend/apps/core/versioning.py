@@ -0,0 +1,87 @@
+"""
+Data version counters used to validate cached and conditional responses
+
+Every user has a version token that changes whenever any of their data
+changes. Shared data (the leaderboard, the badge catalogue, ...) has a
+named global version, and slices of a user's data that are cached on
+their own (a year of the activity calendar) have a scoped version that
+only their writes change. Tokens live in the default cache, so production
+deployments with several workers need a shared cache backend.
+
+Writers usually touch versions from signal handlers, inside the writing
+transaction. A concurrent read still sees the old rows until the commit,
+and would label them with the new token if the touch happened only then.
+So every touch is applied at once and again when the transaction commits;
+a response built in between carries a token that is already stale.
+"""
+import time
+import uuid
+from functools import partial
+
+from django.core.cache import cache
+from django.db import transaction
+
+USER_VERSION_KEY = 'data-version:user:{}'
+GLOBAL_VERSION_KEY = 'data-version:global:{}'
+USER_SCOPE_VERSION_KEY = 'data-version:user:{}:{}'
+
+LEADERBOARD = 'leaderboard'
+BADGES = 'badges'
+CHALLENGES = 'challenges'
+REWARDS = 'rewards'
+
+
+def _new_version():
+    return (uuid.uuid4().hex[:16], time.time())
+
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        # Cold cache: start a fresh version, which safely invalidates clients
+        cache.add(key, _new_version(), timeout=None)
+        version = cache.get(key) or _new_version()
+    return version
+
+
+def get_user_version(user_id):
+    """Return the (token, last_modified) pair for a user's data"""
+    return _get_version(USER_VERSION_KEY.format(user_id))
+
+
+def get_user_scope_version(user_id, scope):
+    """Return the (token, last_modified) pair for one slice of a user's data"""
+    return _get_version(USER_SCOPE_VERSION_KEY.format(user_id, scope))
+
+
+def get_global_version(name):
+    """Return the (token, last_modified) pair for a piece of shared data"""
+    return _get_version(GLOBAL_VERSION_KEY.format(name))
+
+
+def _set_new_versions(keys):
+    cache.set_many({key: _new_version() for key in keys}, timeout=None)
+
+
+def _touch(keys):
+    """New versions for `keys` now and, inside a transaction, after its commit"""
+    if not keys:
+        return
+    _set_new_versions(keys)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(partial(_set_new_versions, keys))
+
+
+def touch_users(*user_ids):
+    """Mark the data of the given users as changed"""
+    _touch({USER_VERSION_KEY.format(user_id) for user_id in user_ids})
+
+
+def touch_user_scopes(user_id, *scopes):
+    """Mark slices of a user's data as changed"""
+    _touch({USER_SCOPE_VERSION_KEY.format(user_id, scope) for scope in scopes})
+
+
+def touch_global(*names):
+    """Mark shared data as changed"""
+    _touch({GLOBAL_VERSION_KEY.format(name) for name in names})
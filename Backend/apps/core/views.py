@@ -0,0 +1,23 @@
+"""
+Views for Core app
+"""
+from django.conf import settings
+from django.http import Http404, HttpResponse, JsonResponse
+
+from .metrics import registry
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def metrics(request):
+    """
+    GET /metrics
+    Request metrics in Prometheus text format, or JSON with ?format=json.
+    Only served to addresses listed in METRICS_ALLOWED_IPS.
+    """
+    if not settings.METRICS_ENABLED or request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        raise Http404
+
+    if request.GET.get('format') == 'json':
+        return JsonResponse(registry.snapshot())
+    return HttpResponse(registry.render_prometheus(), content_type=PROMETHEUS_CONTENT_TYPE)
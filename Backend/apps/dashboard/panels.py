@@ -0,0 +1,127 @@
+"""
+Dashboard panels built from querysets shared across the whole request
+"""
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from apps.challenges.summaries import build_challenge_stats, participation_totals
+from apps.core import versioning
+from apps.gamification.serializers import UserBadgeSerializer
+from apps.gamification.summaries import build_gamification_summary, earned_badges
+from apps.leaderboard.summaries import build_global_leaderboard
+from apps.tracking.serializers import WeeklySummarySerializer
+from apps.tracking.summaries import (
+    activity_rows, build_activity_stats, build_weekly_summary, current_week_bounds
+)
+from apps.users.summaries import build_dashboard_stats
+
+
+DEFAULT_LEADERBOARD_LIMIT = 10
+MAX_LEADERBOARD_LIMIT = 100
+
+
+class DashboardContext:
+    """Per-request data shared between panels, each loaded at most once"""
+
+    def __init__(self, request, leaderboard_limit=DEFAULT_LEADERBOARD_LIMIT):
+        self.request = request
+        self.user = request.user
+        # Parsed and clamped by the view
+        self.leaderboard_limit = leaderboard_limit
+
+    def param(self, name):
+        """A query parameter as the panels use it, for the cache key"""
+        if name == 'leaderboard_limit':
+            return self.leaderboard_limit
+        return self.request.query_params.get(name, '')
+
+    @cached_property
+    def activity_rows(self):
+        # One query covering both the calendar week and the last seven days
+        week_start, _ = current_week_bounds()
+        since = min(week_start, timezone.localdate() - timedelta(days=7))
+        return activity_rows(self.user, since)
+
+    @cached_property
+    def participation_totals(self):
+        return participation_totals(self.user)
+
+    @cached_property
+    def earned_badges(self):
+        return earned_badges(self.user)
+
+
+def profile_panel(context):
+    return build_dashboard_stats(
+        context.user, rows=context.activity_rows, totals=context.participation_totals
+    )
+
+
+def stats_panel(context):
+    return build_activity_stats(context.user)
+
+
+def weekly_panel(context):
+    summary = build_weekly_summary(context.user, rows=context.activity_rows)
+    return WeeklySummarySerializer(summary).data
+
+
+def gamification_panel(context):
+    return build_gamification_summary(context.user, badges=context.earned_badges)
+
+
+def challenges_panel(context):
+    return build_challenge_stats(context.user, totals=context.participation_totals)
+
+
+def leaderboard_panel(context):
+    params = context.request.query_params
+    return build_global_leaderboard(
+        context.user,
+        limit=context.leaderboard_limit,
+        metric=params.get('metric', 'points'),
+    )
+
+
+def badges_panel(context):
+    return UserBadgeSerializer(context.earned_badges, many=True).data
+
+
+# name -> (builder, data version scopes, query params the panel depends on)
+PANELS = {
+    'profile': (profile_panel, ('user', versioning.CHALLENGES), ()),
+    'stats': (stats_panel, ('user',), ()),
+    'weekly': (weekly_panel, ('user',), ()),
+    'gamification': (gamification_panel, ('user', versioning.BADGES), ()),
+    'challenges': (challenges_panel, ('user', versioning.CHALLENGES), ()),
+    'leaderboard': (leaderboard_panel, ('user', versioning.LEADERBOARD), ('leaderboard_limit', 'metric')),
+    'badges': (badges_panel, ('user',), ()),
+}
+
+
+def _cache_key(context, name, scopes, params):
+    parts = [timezone.localdate().isoformat()]
+    for scope in scopes:
+        if scope == 'user':
+            parts.append(versioning.get_user_version(context.user.pk)[0])
+        else:
+            parts.append(versioning.get_global_version(scope)[0])
+    parts.extend(f'{param}={context.param(param)}' for param in params)
+    digest = hashlib.md5('|'.join(parts).encode(), usedforsecurity=False).hexdigest()
+    return f'dashboard:{name}:{context.user.pk}:{digest}'
+
+
+def render_panel(context, name):
+    """Return a panel's data, served from cache while its data versions hold"""
+    builder, scopes, params = PANELS[name]
+    key = _cache_key(context, name, scopes, params)
+    data = cache.get(key)
+    if data is None:
+        data = builder(context)
+        cache.set(key, data, timeout=settings.DASHBOARD_PANEL_CACHE_TIMEOUT)
+    return data
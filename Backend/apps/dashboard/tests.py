@@ -0,0 +1,68 @@
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.tracking.models import Activity
+from apps.users.models import User
+
+from .panels import MAX_LEADERBOARD_LIMIT, PANELS
+
+
+class DashboardTests(TestCase):
+    url = '/api/dashboard/'
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='alice', password='pass12345')
+        Activity.objects.create(
+            user=self.user, activity_type='transport', transport_mode='walk',
+            distance_km=2, description='Walk'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_returns_every_panel(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertLessEqual(len(queries), settings.QUERY_BUDGETS['dashboard:dashboard'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data), set(PANELS))
+        self.assertEqual(response.data['weekly']['total_activities'], 1)
+        self.assertEqual(response.data['stats']['all_time']['total_activities'], 1)
+
+    def test_panel_selection(self):
+        response = self.client.get(self.url, {'panels': 'weekly,badges'})
+        self.assertEqual(set(response.data), {'weekly', 'badges'})
+
+    def test_unknown_panels_are_rejected(self):
+        response = self.client.get(self.url, {'panels': 'weekly,nope'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('nope', response.data['error'])
+
+    def test_leaderboard_limit_is_validated_and_clamped(self):
+        response = self.client.get(self.url, {'panels': 'leaderboard', 'leaderboard_limit': 'abc'})
+        self.assertEqual(response.status_code, 400)
+
+        with mock.patch('apps.dashboard.panels.build_global_leaderboard', return_value={}) as build:
+            self.client.get(self.url, {'panels': 'leaderboard', 'leaderboard_limit': '100000000'})
+        self.assertEqual(build.call_args.kwargs['limit'], MAX_LEADERBOARD_LIMIT)
+
+    def test_panels_are_cached_until_the_data_changes(self):
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            # Without If-None-Match the body is rebuilt from the panel cache
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 0)
+
+        Activity.objects.create(
+            user=self.user, activity_type='food', meal_type='vegetarian',
+            servings=1, description='Lunch'
+        )
+        response = self.client.get(self.url, {'panels': 'weekly'})
+        self.assertEqual(response.data['weekly']['total_activities'], 2)
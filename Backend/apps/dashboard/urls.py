@@ -0,0 +1,11 @@
+"""
+URL configuration for Dashboard app
+"""
+from django.urls import path
+from . import views
+
+app_name = 'dashboard'
+
+urlpatterns = [
+    path('', views.dashboard, name='dashboard'),
+]
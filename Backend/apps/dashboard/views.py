@@ -0,0 +1,55 @@
+"""
+Views for Dashboard app
+"""
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from apps.core import versioning
+from apps.core.conditional import conditional_on_user_data
+from apps.core.replicas import read_from_replica
+from .panels import (
+    DEFAULT_LEADERBOARD_LIMIT, MAX_LEADERBOARD_LIMIT, PANELS, DashboardContext, render_panel
+)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@conditional_on_user_data(
+    'user', versioning.LEADERBOARD, versioning.BADGES, versioning.CHALLENGES
+)
+@read_from_replica
+def dashboard(request):
+    """
+    GET /api/dashboard/?panels=weekly,badges&leaderboard_limit=10
+    All dashboard panels in one response. Without ?panels every panel
+    is returned: profile, stats, weekly, gamification, challenges,
+    leaderboard and badges.
+    """
+    requested = request.query_params.get('panels')
+    if requested:
+        names = [name.strip() for name in requested.split(',') if name.strip()]
+    else:
+        names = list(PANELS)
+
+    unknown = [name for name in names if name not in PANELS]
+    if unknown:
+        return Response(
+            {'error': f'Unknown panels: {", ".join(unknown)}', 'available': list(PANELS)},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        leaderboard_limit = min(
+            max(int(request.query_params.get('leaderboard_limit', DEFAULT_LEADERBOARD_LIMIT)), 1),
+            MAX_LEADERBOARD_LIMIT
+        )
+    except ValueError:
+        return Response(
+            {'error': 'leaderboard_limit must be an integer'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    context = DashboardContext(request, leaderboard_limit)
+    return Response({name: render_panel(context, name) for name in names})
@@ -18,6 +18,8 @@ class UserBadgeAdmin(admin.ModelAdmin):
     search_fields = ('user__username', 'badge__name')
     date_hierarchy = 'earned_at'
     ordering = ('-earned_at',)
+    list_select_related = ('user', 'badge')
+    raw_id_fields = ('user',)
 
 @admin.register(Achievement)
 class AchievementAdmin(admin.ModelAdmin):
@@ -31,6 +33,8 @@ class UserAchievementAdmin(admin.ModelAdmin):
     list_filter = ('is_completed', 'completed_at')
     search_fields = ('user__username', 'achievement__title')
     date_hierarchy = 'completed_at'
+    list_select_related = ('user', 'achievement')
+    raw_id_fields = ('user',)
     
     def progress_percentage(self, obj):
         return f"{obj.progress_percentage:.1f}%"
@@ -40,13 +44,16 @@ class NotificationAdmin(admin.ModelAdmin):
     list_display = ('user', 'notification_type', 'title', 'is_read', 'created_at')
     list_filter = ('notification_type', 'is_read', 'created_at')
     search_fields = ('user__username', 'title', 'message')
-    date_hierarchy = 'created_at'
     ordering = ('-created_at',)
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
+    show_full_result_count = False
 
 @admin.register(DailyStreak)
 class DailyStreakAdmin(admin.ModelAdmin):
     list_display = ('user', 'date', 'streak_day', 'activities_count', 'co2_saved')
     list_filter = ('date',)
     search_fields = ('user__username',)
-    date_hierarchy = 'date'
-    ordering = ('-date',)
\ No newline at end of file
+    ordering = ('-date',)
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
\ No newline at end of file
@@ -158,6 +158,10 @@ class Notification(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Serves the list and, with a row filter, the unread counts
+            models.Index(fields=['user', '-created_at'], name='notification_user_idx'),
+        ]
         
     def __str__(self):
         return f"{self.user.username} - {self.title}"
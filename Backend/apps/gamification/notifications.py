@@ -0,0 +1,28 @@
+"""
+Bulk notification delivery
+
+bulk_create skips the post_save handlers, so this does their work for the
+whole batch: bump the owners' data versions and push live events.
+"""
+from apps.core.versioning import touch_users
+
+from .models import Notification
+
+BATCH_SIZE = 500
+
+
+def bulk_notify(notifications):
+    """Insert unsaved Notification objects in batches, returns them saved"""
+    from apps.realtime.events import has_subscribers, publish_to_user, user_channel
+    from .serializers import NotificationSerializer
+
+    created = Notification.objects.bulk_create(notifications, batch_size=BATCH_SIZE)
+    touch_users(*(notification.user_id for notification in created))
+
+    for notification in created:
+        # Serializing every row is wasted work for users who are not connected
+        if notification.pk and has_subscribers(user_channel(notification.user_id)):
+            publish_to_user(
+                notification.user_id, 'notification', NotificationSerializer(notification).data
+            )
+    return created
@@ -0,0 +1,72 @@
+"""
+Summary builders shared by the gamification endpoints and the dashboard
+"""
+from django.core.cache import cache
+
+from apps.core.versioning import BADGES, get_global_version
+from .models import Badge, UserBadge, Achievement, UserAchievement, Notification
+from .serializers import UserBadgeSerializer
+
+
+def catalog_totals():
+    """Number of active badges and achievements, cached until either changes"""
+    token, _ = get_global_version(BADGES)
+    key = f'gamification:catalog-totals:{token}'
+    totals = cache.get(key)
+    if totals is None:
+        totals = {
+            'badges': Badge.objects.filter(is_active=True).count(),
+            'achievements': Achievement.objects.filter(is_active=True).count(),
+        }
+        cache.set(key, totals, timeout=60 * 60)
+    return totals
+
+
+def earned_badges(user):
+    """All of a user's badges, newest first, with the badge joined in"""
+    return list(
+        UserBadge.objects.filter(user=user).select_related('badge').order_by('-earned_at')
+    )
+
+
+def build_gamification_summary(user, badges=None):
+    """Level, badge, achievement, streak and notification overview"""
+    if badges is None:
+        badges = earned_badges(user)
+
+    totals = catalog_totals()
+    total_badges = totals['badges']
+    earned = len(badges)
+    total_achievements = totals['achievements']
+    completed_achievements = UserAchievement.objects.filter(
+        user=user,
+        is_completed=True
+    ).count()
+
+    unread_notifications = Notification.objects.filter(
+        user=user,
+        is_read=False
+    ).count()
+
+    return {
+        'level': user.level,
+        'points': user.carbon_points,
+        'points_to_next_level': user.points_to_next_level,
+        'level_progress': user.level_progress,
+        'badges': {
+            'total': total_badges,
+            'earned': earned,
+            'percentage': round((earned / total_badges * 100) if total_badges > 0 else 0, 1),
+            'recent': UserBadgeSerializer(badges[:5], many=True).data
+        },
+        'achievements': {
+            'total': total_achievements,
+            'completed': completed_achievements,
+            'percentage': round((completed_achievements / total_achievements * 100) if total_achievements > 0 else 0, 1)
+        },
+        'streak': {
+            'current': user.current_streak,
+            'longest': user.longest_streak
+        },
+        'unread_notifications': unread_notifications
+    }
@@ -7,11 +7,16 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.db.models import Q
 
+from apps.core.conditional import ConditionalUserDataMixin, conditional_on_user_data
+from apps.core.replicas import read_from_replica
+from apps.core.versioning import BADGES, touch_users
+
 from .models import Badge, UserBadge, Achievement, UserAchievement, Notification, DailyStreak
 from .serializers import (
     BadgeSerializer, UserBadgeSerializer, AchievementSerializer,
     UserAchievementSerializer, NotificationSerializer, DailyStreakSerializer
 )
+from .summaries import build_gamification_summary
 
 class BadgeListView(generics.ListAPIView):
     """
@@ -22,7 +27,7 @@ class BadgeListView(generics.ListAPIView):
     serializer_class = BadgeSerializer
     permission_classes = [IsAuthenticated]
 
-class UserBadgesView(generics.ListAPIView):
+class UserBadgesView(ConditionalUserDataMixin, generics.ListAPIView):
     """
     GET /api/gamification/my-badges/
     Get current user's earned badges
@@ -98,6 +103,8 @@ def mark_all_notifications_read(request):
         user=request.user,
         is_read=False
     ).update(is_read=True)
+    if count:
+        touch_users(request.user.id)
     
     return Response({
         'message': f'{count} notifications marked as read'
@@ -158,55 +165,14 @@ def streak_history(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional_on_user_data('user', BADGES)
+@read_from_replica
 def gamification_summary(request):
     """
     GET /api/gamification/summary/
     Get comprehensive gamification summary
     """
-    user = request.user
-    
-    # Get badges
-    total_badges = Badge.objects.filter(is_active=True).count()
-    earned_badges = UserBadge.objects.filter(user=user).count()
-    
-    # Get achievements
-    total_achievements = Achievement.objects.filter(is_active=True).count()
-    completed_achievements = UserAchievement.objects.filter(
-        user=user,
-        is_completed=True
-    ).count()
-    
-    # Get unread notifications
-    unread_notifications = Notification.objects.filter(
-        user=user,
-        is_read=False
-    ).count()
-    
-    # Recent badges (last 5)
-    recent_badges = UserBadge.objects.filter(user=user).order_by('-earned_at')[:5]
-    
-    return Response({
-        'level': user.level,
-        'points': user.carbon_points,
-        'points_to_next_level': user.points_to_next_level,
-        'level_progress': user.level_progress,
-        'badges': {
-            'total': total_badges,
-            'earned': earned_badges,
-            'percentage': round((earned_badges / total_badges * 100) if total_badges > 0 else 0, 1),
-            'recent': UserBadgeSerializer(recent_badges, many=True).data
-        },
-        'achievements': {
-            'total': total_achievements,
-            'completed': completed_achievements,
-            'percentage': round((completed_achievements / total_achievements * 100) if total_achievements > 0 else 0, 1)
-        },
-        'streak': {
-            'current': user.current_streak,
-            'longest': user.longest_streak
-        },
-        'unread_notifications': unread_notifications
-    })
+    return Response(build_gamification_summary(request.user))
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -2,6 +2,8 @@
 Admin configuration for Leaderboard app
 """
 from django.contrib import admin
+from django.db.models import Count
+
 from .models import Team
 
 @admin.register(Team)
@@ -13,6 +15,7 @@ class TeamAdmin(admin.ModelAdmin):
     list_filter = ('is_public', 'created_at')
     search_fields = ('name', 'description', 'created_by__username')
     filter_horizontal = ('members',)
+    list_select_related = ('created_by',)
     readonly_fields = ('total_points', 'total_co2_saved', 'created_at', 'updated_at')
     
     fieldsets = (
@@ -33,7 +36,11 @@ class TeamAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(members_total=Count('members'))
+    
     def member_count(self, obj):
-        return obj.member_count
+        return obj.members_total
     member_count.short_description = 'Members'
+    member_count.admin_order_field = 'members_total'
     
\ No newline at end of file
@@ -0,0 +1,63 @@
+"""
+Summary builders shared by the leaderboard endpoints and the dashboard
+"""
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+METRIC_FIELDS = {
+    'points': 'carbon_points',
+    'co2_saved': 'total_co2_saved',
+    'streak': 'current_streak',
+}
+
+
+def build_global_leaderboard(user, limit=50, timeframe='all', metric='points'):
+    """Top users by metric, plus the requesting user's own rank.
+
+    Timeframes other than 'all' are accepted but still rank on all-time
+    totals until per-period aggregates exist.
+    """
+    field = METRIC_FIELDS.get(metric, 'carbon_points')
+    current_user_id = user.id if user is not None and user.is_authenticated else None
+
+    users = User.objects.order_by(f'-{field}').only(
+        'id', 'username', 'first_name', 'last_name', 'avatar',
+        'carbon_points', 'total_co2_saved', 'current_streak', 'level'
+    )[:limit]
+
+    leaderboard_data = []
+    for rank, entry in enumerate(users, start=1):
+        leaderboard_data.append({
+            'rank': rank,
+            'user_id': entry.id,
+            'name': entry.get_full_name() or entry.username,
+            'username': entry.username,
+            'avatar': entry.avatar.url if entry.avatar else None,
+            'total_points': entry.carbon_points,
+            'total_co2_saved': round(entry.total_co2_saved, 2),
+            'current_streak': entry.current_streak,
+            'level': entry.level,
+            'is_current_user': entry.id == current_user_id
+        })
+
+    # Find current user's rank
+    user_rank = None
+    for entry in leaderboard_data:
+        if entry['is_current_user']:
+            user_rank = entry['rank']
+            break
+
+    if user_rank is None and current_user_id is not None:
+        # User not in top limit, calculate their rank
+        user_rank = User.objects.filter(
+            **{f'{field}__gt': getattr(user, field)}
+        ).count() + 1
+
+    return {
+        'results': leaderboard_data,
+        'your_rank': user_rank,
+        'total_users': User.objects.count(),
+        'timeframe': timeframe,
+        'metric': metric
+    }
@@ -0,0 +1,124 @@
+"""
+Pub/sub brokers for the live event stream
+
+The in-process broker is enough for a single ASGI worker. Multi-worker
+deployments point REALTIME_BROKER_URL at a Redis (or Redis-compatible)
+server so events published by one worker reach subscribers on the others.
+"""
+import asyncio
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryBroker:
+    """Fan events out to subscribers living in this process"""
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def publish(self, channel, message):
+        """Deliver a message to every local subscriber of a channel.
+
+        Safe to call from synchronous views running in worker threads.
+        """
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(self._offer, queue, message)
+
+    @staticmethod
+    def _offer(queue, message):
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Slow consumer, drop the event rather than block publishers
+            logger.warning('Dropping realtime event for a slow subscriber')
+
+    def has_subscribers(self, channel):
+        return bool(self._subscribers.get(channel))
+
+    async def subscribe(self, channels):
+        """Yield messages published on any of the given channels"""
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        entry = (loop, queue)
+
+        with self._lock:
+            for channel in channels:
+                self._subscribers.setdefault(channel, set()).add(entry)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            with self._lock:
+                for channel in channels:
+                    listeners = self._subscribers.get(channel)
+                    if listeners is not None:
+                        listeners.discard(entry)
+                        if not listeners:
+                            del self._subscribers[channel]
+
+
+class RedisBroker:
+    """Relay events through Redis pub/sub so every worker sees them"""
+
+    def __init__(self, url):
+        try:
+            import redis
+            import redis.asyncio
+        except ImportError:
+            raise ImproperlyConfigured(
+                'REALTIME_BROKER_URL requires the "redis" package to be installed.'
+            )
+        self.url = url
+        self._client = redis.Redis.from_url(url)
+        self._async_redis = redis.asyncio
+
+    def publish(self, channel, message):
+        self._client.publish(channel, json.dumps(message, default=str))
+
+    def has_subscribers(self, channel):
+        # Subscribers may live on other workers, so always assume someone listens
+        return True
+
+    async def subscribe(self, channels):
+        client = self._async_redis.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(*channels)
+        try:
+            async for item in pubsub.listen():
+                if item.get('type') == 'message':
+                    yield json.loads(item['data'])
+        finally:
+            await pubsub.unsubscribe(*channels)
+            await pubsub.close()
+            await client.close()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Return the process-wide broker configured in settings"""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                url = getattr(settings, 'REALTIME_BROKER_URL', '')
+                if url:
+                    _broker = RedisBroker(url)
+                else:
+                    _broker = InMemoryBroker(
+                        queue_size=getattr(settings, 'REALTIME_QUEUE_SIZE', 100)
+                    )
+    return _broker
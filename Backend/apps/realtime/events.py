@@ -0,0 +1,78 @@
+"""
+Helpers for publishing live events to subscribed clients
+"""
+import logging
+
+from django.db import transaction
+
+from .broker import get_broker
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_CHANNEL = 'leaderboard'
+
+
+def user_channel(user_id):
+    """Channel carrying events private to a single user"""
+    return f'user:{user_id}'
+
+
+def has_subscribers(channel):
+    return get_broker().has_subscribers(channel)
+
+
+def publish_event(channel, event, data):
+    """Publish an event once the surrounding transaction commits"""
+    message = {'event': event, 'data': data}
+
+    def send():
+        try:
+            get_broker().publish(channel, message)
+        except Exception:
+            logger.exception('Failed to publish realtime event %s', event)
+
+    transaction.on_commit(send)
+
+
+def publish_to_user(user_id, event, data):
+    publish_event(user_channel(user_id), event, data)
+
+
+def publish_user_points(user, leaderboard=True, rank=True):
+    """Leaderboard entry and rank events for a user whose points moved"""
+    if leaderboard and has_subscribers(LEADERBOARD_CHANNEL):
+        publish_event(LEADERBOARD_CHANNEL, 'leaderboard', {
+            'user_id': user.id,
+            'username': user.username,
+            'carbon_points': user.carbon_points,
+            'total_co2_saved': round(user.total_co2_saved, 2),
+            'level': user.level,
+        })
+
+    # The rank costs a count query, only pay for it when someone is listening
+    if rank and has_subscribers(user_channel(user.id)):
+        position = type(user).objects.filter(carbon_points__gt=user.carbon_points).count() + 1
+        publish_to_user(user.id, 'rank', {
+            'rank': position,
+            'carbon_points': user.carbon_points,
+        })
+
+
+def publish_points_changed(user_ids):
+    """publish_user_points() for points changed with a queryset update().
+
+    update() skips User.save() and with it the post_save handler. Rows are
+    only read when the leaderboard or one of the users has a listener.
+    """
+    from django.contrib.auth import get_user_model
+
+    user_ids = set(user_ids)
+    to_leaderboard = has_subscribers(LEADERBOARD_CHANNEL)
+    ranked = {user_id for user_id in user_ids if has_subscribers(user_channel(user_id))}
+    if not to_leaderboard and not ranked:
+        return
+    users = get_user_model().objects.filter(id__in=user_ids if to_leaderboard else ranked).only(
+        'id', 'username', 'carbon_points', 'total_co2_saved', 'level'
+    )
+    for user in users:
+        publish_user_points(user, rank=user.id in ranked)
@@ -0,0 +1,30 @@
+"""
+Signal handlers that turn model changes into live events
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from apps.gamification.models import Notification
+from .events import publish_to_user, publish_user_points
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Notification)
+def notification_created(sender, instance, created, **kwargs):
+    """Push new notifications to the owner's stream"""
+    if not created:
+        return
+
+    from apps.gamification.serializers import NotificationSerializer
+    publish_to_user(instance.user_id, 'notification', NotificationSerializer(instance).data)
+
+
+@receiver(post_save, sender=User)
+def user_points_changed(sender, instance, created, update_fields=None, **kwargs):
+    """Push rank changes when a user's points move"""
+    if created or (update_fields is not None and 'carbon_points' not in update_fields):
+        return
+
+    publish_user_points(instance)
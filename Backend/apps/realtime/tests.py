@@ -0,0 +1,157 @@
+import asyncio
+import threading
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.challenges.models import Challenge
+from apps.challenges.progress import _award_completions
+from apps.gamification.models import Notification
+from apps.users.authentication import ClaimsRefreshToken
+from apps.users.models import User
+
+from .broker import InMemoryBroker
+from .events import LEADERBOARD_CHANNEL, user_channel
+from .tickets import issue_ticket
+
+
+class RecordingBroker:
+    def __init__(self):
+        self.published = []
+
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+
+    def has_subscribers(self, channel):
+        return True
+
+
+class InMemoryBrokerTests(SimpleTestCase):
+    async def test_delivers_messages_published_from_other_threads(self):
+        broker = InMemoryBroker()
+        subscription = broker.subscribe(['user:1'])
+        first = asyncio.ensure_future(subscription.__anext__())
+        await asyncio.sleep(0)
+        self.assertTrue(broker.has_subscribers('user:1'))
+
+        thread = threading.Thread(target=broker.publish, args=('user:1', {'event': 'rank', 'data': 1}))
+        thread.start()
+        thread.join()
+        broker.publish('user:2', {'event': 'rank', 'data': 2})
+
+        self.assertEqual(await asyncio.wait_for(first, 1), {'event': 'rank', 'data': 1})
+        await subscription.aclose()
+        self.assertFalse(broker.has_subscribers('user:1'))
+
+    async def test_slow_subscribers_drop_events_instead_of_blocking(self):
+        broker = InMemoryBroker(queue_size=1)
+        subscription = broker.subscribe(['user:1'])
+        first = asyncio.ensure_future(subscription.__anext__())
+        await asyncio.sleep(0)
+        for number in range(3):
+            broker.publish('user:1', {'event': 'n', 'data': number})
+        await asyncio.sleep(0)
+        self.assertEqual((await asyncio.wait_for(first, 1))['data'], 0)
+        await subscription.aclose()
+
+
+class EventStreamTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', password='pass12345')
+        self.token = str(ClaimsRefreshToken.for_user(self.user).access_token)
+
+    async def test_rejects_missing_token(self):
+        response = await self.async_client.get('/api/realtime/stream/')
+        self.assertEqual(response.status_code, 401)
+
+    async def test_access_tokens_are_not_read_from_the_url(self):
+        response = await self.async_client.get('/api/realtime/stream/', {'token': self.token})
+        self.assertEqual(response.status_code, 401)
+
+    def test_tickets_are_issued_to_authenticated_users(self):
+        client = APIClient()
+        self.assertEqual(client.post('/api/realtime/ticket/').status_code, 401)
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        response = client.post('/api/realtime/ticket/')
+        self.assertEqual(response.status_code, 201)
+        self.assertGreater(len(response.data['ticket']), 20)
+
+    async def test_tickets_work_once(self):
+        ticket = await sync_to_async(issue_ticket)(self.user.id)
+        first = await self.async_client.get('/api/realtime/stream/', {'ticket': ticket})
+        self.assertEqual(first.status_code, 200)
+        await aiter(first.streaming_content).aclose()
+        second = await self.async_client.get('/api/realtime/stream/', {'ticket': ticket})
+        self.assertEqual(second.status_code, 401)
+
+    async def test_streams_events_of_the_users_channels(self):
+        broker = InMemoryBroker()
+        with mock.patch('apps.realtime.views.get_broker', return_value=broker):
+            ticket = await sync_to_async(issue_ticket)(self.user.id)
+            response = await self.async_client.get(
+                '/api/realtime/stream/', {'ticket': ticket, 'leaderboard': 'true'}
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+            stream = aiter(response.streaming_content)
+
+            self.assertEqual(await anext(stream), b'retry: 5000\n\n')
+            self.assertIn(b'event: ready', await anext(stream))
+            # The stream subscribes in a task of its own
+            for _ in range(100):
+                if broker.has_subscribers(LEADERBOARD_CHANNEL):
+                    break
+                await asyncio.sleep(0)
+            self.assertTrue(broker.has_subscribers(user_channel(self.user.id)))
+            broker.publish(LEADERBOARD_CHANNEL, {'event': 'leaderboard', 'data': {'user_id': 7}})
+            chunk = await asyncio.wait_for(anext(stream), 1)
+            self.assertEqual(chunk, b'event: leaderboard\ndata: {"user_id": 7}\n\n')
+            await stream.aclose()
+
+
+class SignalTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', password='pass12345')
+        self.broker = RecordingBroker()
+        patcher = mock.patch('apps.realtime.events.get_broker', return_value=self.broker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_notifications_are_published_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Notification.objects.create(
+                user=self.user, notification_type='system', title='Hello', message='World'
+            )
+            self.assertEqual(self.broker.published, [])
+        channel, message = self.broker.published[0]
+        self.assertEqual(channel, user_channel(self.user.id))
+        self.assertEqual(message['event'], 'notification')
+        self.assertEqual(message['data']['title'], 'Hello')
+
+    def test_point_changes_publish_leaderboard_and_rank(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.carbon_points = 50
+            self.user.save(update_fields=['carbon_points'])
+        events = {message['event']: message['data'] for _, message in self.broker.published}
+        self.assertEqual(events['leaderboard']['carbon_points'], 50)
+        self.assertEqual(events['rank'], {'rank': 1, 'carbon_points': 50})
+
+    def test_bulk_challenge_rewards_publish_leaderboard_and_rank(self):
+        challenge = Challenge.objects.create(
+            name='Walk more', description='Walk', challenge_type='individual',
+            target_type='activities_count', target_value=1, reward_points=40,
+            start_date=timezone.localdate(), end_date=timezone.localdate(),
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            _award_completions(challenge, [self.user.id])
+        events = {message['event']: message['data'] for _, message in self.broker.published}
+        self.assertEqual(events['leaderboard']['carbon_points'], 40)
+        self.assertEqual(events['rank'], {'rank': 1, 'carbon_points': 40})
+
+    def test_other_saves_publish_nothing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save(update_fields=['bio'])
+        self.assertEqual(self.broker.published, [])
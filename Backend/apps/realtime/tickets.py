@@ -0,0 +1,33 @@
+"""
+Short-lived, single-use tickets for the event stream
+
+EventSource cannot send an Authorization header, and an access token in
+the stream URL ends up in access logs, proxy logs and browser history.
+The client trades its token for a ticket with an authenticated POST and
+opens the stream with ?ticket=. A ticket expires after
+REALTIME_TICKET_SECONDS and only the first stream that presents it is
+let in, so a logged URL is useless. Tickets live in the default cache,
+which must be shared by the workers that issue and serve them.
+"""
+import secrets
+
+from django.conf import settings
+from django.core.cache import cache
+
+TICKET_KEY = 'realtime:ticket:{}'
+
+
+def issue_ticket(user_id):
+    ticket = secrets.token_urlsafe(32)
+    cache.set(TICKET_KEY.format(ticket), user_id, timeout=settings.REALTIME_TICKET_SECONDS)
+    return ticket
+
+
+def redeem_ticket(ticket):
+    """The user id the ticket was issued for, or None; a ticket works once"""
+    key = TICKET_KEY.format(ticket)
+    user_id = cache.get(key)
+    # Of two concurrent redeemers only one deletes the key
+    if user_id is None or not cache.delete(key):
+        return None
+    return user_id
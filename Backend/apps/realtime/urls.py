@@ -0,0 +1,12 @@
+"""
+URL configuration for Realtime app
+"""
+from django.urls import path
+from . import views
+
+app_name = 'realtime'
+
+urlpatterns = [
+    path('ticket/', views.stream_ticket, name='stream-ticket'),
+    path('stream/', views.event_stream, name='event-stream'),
+]
@@ -0,0 +1,120 @@
+"""
+Views for Realtime app
+"""
+import asyncio
+import json
+from contextlib import suppress
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from .broker import get_broker
+from .events import LEADERBOARD_CHANNEL, user_channel
+from .tickets import issue_ticket, redeem_ticket
+
+KEEPALIVE_SECONDS = 15
+
+
+def _authenticate(request):
+    """Resolve the user from a ?ticket= parameter or the Authorization header.
+
+    Browsers' EventSource cannot send custom headers, so browsers open the
+    stream with a ticket from the ticket endpoint; access tokens are never
+    read from the query string.
+    """
+    ticket = request.GET.get('ticket')
+    if ticket is not None:
+        user_id = redeem_ticket(ticket)
+        if user_id is None:
+            return None
+        return get_user_model().objects.filter(pk=user_id, is_active=True).first()
+
+    authenticator = JWTAuthentication()
+    header = authenticator.get_header(request)
+    if header is None:
+        return None
+    raw_token = authenticator.get_raw_token(header)
+    if raw_token is None:
+        return None
+
+    try:
+        validated_token = authenticator.get_validated_token(raw_token)
+        return authenticator.get_user(validated_token)
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def stream_ticket(request):
+    """
+    POST /api/realtime/ticket/
+    Issue a single-use ticket for opening the event stream
+    """
+    return Response({
+        'ticket': issue_ticket(request.user.id),
+        'expires_in': settings.REALTIME_TICKET_SECONDS,
+    }, status=status.HTTP_201_CREATED)
+
+
+def _format_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def _event_source(channels):
+    subscription = get_broker().subscribe(channels)
+    pending = asyncio.ensure_future(subscription.__anext__())
+
+    yield 'retry: 5000\n\n'
+    yield _format_event('ready', {'channels': channels})
+    try:
+        while True:
+            done, _ = await asyncio.wait({pending}, timeout=KEEPALIVE_SECONDS)
+            if not done:
+                # Comment line keeps proxies from closing an idle connection
+                yield ': keepalive\n\n'
+                continue
+
+            message = pending.result()
+            pending = asyncio.ensure_future(subscription.__anext__())
+            yield _format_event(message['event'], message['data'])
+    finally:
+        pending.cancel()
+        with suppress(asyncio.CancelledError, StopAsyncIteration):
+            await pending
+        await subscription.aclose()
+
+
+async def event_stream(request):
+    """
+    GET /api/realtime/stream/?ticket=<ticket>&leaderboard=true
+    Stream rank changes, notifications and challenge completions as
+    server-sent events. Must be served through the ASGI application.
+    """
+    user = await sync_to_async(_authenticate)(request)
+    if user is None:
+        return JsonResponse(
+            {'error': 'Authentication credentials were not provided or are invalid.'},
+            status=401
+        )
+
+    channels = [user_channel(user.id)]
+    if request.GET.get('leaderboard') == 'true':
+        channels.append(LEADERBOARD_CHANNEL)
+
+    response = StreamingHttpResponse(
+        _event_source(channels),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
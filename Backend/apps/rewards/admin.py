@@ -2,7 +2,24 @@
 Admin configuration for Rewards app
 """
 from django.contrib import admin
-from .models import Reward, Redemption
+from django.db import transaction
+from django.utils import timezone
+
+from apps.gamification.models import Notification
+from apps.gamification.notifications import bulk_notify
+from .inventory import set_stock
+from .models import Reward, Redemption, RedemptionCode, Reservation, StockShard
+from .stats import rebuild_redemption_stats
+
+class StockShardInline(admin.TabularInline):
+    model = StockShard
+    fields = ('shard', 'available')
+    readonly_fields = ('shard', 'available')
+    extra = 0
+    can_delete = False
+    
+    def has_add_permission(self, request, obj=None):
+        return False
 
 @admin.register(Reward)
 class RewardAdmin(admin.ModelAdmin):
@@ -13,6 +30,20 @@ class RewardAdmin(admin.ModelAdmin):
     list_filter = ('category', 'is_active', 'available_in_nepal', 'delivery_available')
     search_fields = ('title', 'description', 'partner_name')
     ordering = ('points_required',)
+    readonly_fields = ('redemption_count',)
+    actions = ['recount_redemptions']
+    inlines = [StockShardInline]
+    
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # Stock entered here is the number of units available right now
+        if not change or 'stock' in form.changed_data:
+            set_stock(obj)
+    
+    @admin.action(description='Recount redemptions')
+    def recount_redemptions(self, request, queryset):
+        count = Reward.recount_redemptions(queryset)
+        self.message_user(request, f'Recounted redemptions of {count} rewards.')
     
     fieldsets = (
         ('Basic Information', {
@@ -22,12 +53,15 @@ class RewardAdmin(admin.ModelAdmin):
             'fields': ('points_required', 'partner_name', 'partner_logo')
         }),
         ('Availability', {
-            'fields': ('is_active', 'stock', 'available_in_nepal', 'delivery_available')
+            'fields': ('is_active', 'stock', 'partner_codes', 'available_in_nepal', 'delivery_available')
         }),
         ('Terms & Conditions', {
             'fields': ('terms',),
             'classes': ('collapse',)
         }),
+        ('Statistics', {
+            'fields': ('redemption_count',)
+        }),
     )
 
 @admin.register(Redemption)
@@ -65,31 +99,84 @@ class RedemptionAdmin(admin.ModelAdmin):
         }),
     )
     
+    list_select_related = ('user', 'reward')
+    raw_id_fields = ('user',)
+    show_full_result_count = False
+    
     actions = ['approve_redemptions', 'mark_as_delivered', 'mark_as_completed']
     
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # Free-form edits of the counted fields; creation is counted by the signal
+        if change and {'status', 'points_spent', 'user'}.intersection(form.changed_data):
+            rebuild_redemption_stats({obj.user_id, form.initial.get('user', obj.user_id)})
+    
+    def _advance(self, queryset, from_status, to_status, timestamp_field, title, message):
+        """Move every selected redemption in from_status with one UPDATE and
+        notify the owners in bulk. Returns the number of rows changed."""
+        now = timezone.now()
+        with transaction.atomic():
+            selected = queryset.filter(status=from_status)
+            rows = list(selected.values_list('id', 'user_id', 'reward__title'))
+            if not rows:
+                return 0
+            count = Redemption.objects.filter(
+                id__in=[row[0] for row in rows], status=from_status
+            ).update(status=to_status, updated_at=now, **{timestamp_field: now})
+            # One aggregate and one upsert, whatever the mix of owners
+            rebuild_redemption_stats({user_id for _, user_id, _ in rows})
+            bulk_notify([
+                Notification(
+                    user_id=user_id,
+                    notification_type='reward',
+                    title=title,
+                    message=message.format(reward=reward_title),
+                    related_id=redemption_id,
+                )
+                for redemption_id, user_id, reward_title in rows
+            ])
+        return count
+    
+    @admin.action(description='Approve selected redemptions')
     def approve_redemptions(self, request, queryset):
-        from django.utils import timezone
-        count = queryset.filter(status='pending').update(
-            status='approved',
-            approved_at=timezone.now()
+        count = self._advance(
+            queryset, 'pending', 'approved', 'approved_at',
+            'Redemption Approved', 'Your redemption of {reward} has been approved.'
         )
         self.message_user(request, f'{count} redemptions approved.')
-    approve_redemptions.short_description = 'Approve selected redemptions'
     
+    @admin.action(description='Mark as delivered')
     def mark_as_delivered(self, request, queryset):
-        from django.utils import timezone
-        count = queryset.filter(status='approved').update(
-            status='delivered',
-            delivered_at=timezone.now()
+        count = self._advance(
+            queryset, 'approved', 'delivered', 'delivered_at',
+            'Reward Delivered', 'Your {reward} has been delivered.'
         )
         self.message_user(request, f'{count} redemptions marked as delivered.')
-    mark_as_delivered.short_description = 'Mark as delivered'
     
+    @admin.action(description='Mark as completed')
     def mark_as_completed(self, request, queryset):
-        from django.utils import timezone
-        count = queryset.filter(status='delivered').update(
-            status='completed',
-            completed_at=timezone.now()
+        count = self._advance(
+            queryset, 'delivered', 'completed', 'completed_at',
+            'Redemption Completed', 'Your redemption of {reward} is complete.'
         )
         self.message_user(request, f'{count} redemptions marked as completed.')
-    mark_as_completed.short_description = 'Mark as completed'
\ No newline at end of file
+
+@admin.register(Reservation)
+class ReservationAdmin(admin.ModelAdmin):
+    list_display = ('user', 'reward', 'status', 'shard', 'expires_at', 'created_at')
+    list_filter = ('status',)
+    search_fields = ('user__username', 'reward__title')
+    list_select_related = ('user', 'reward')
+    raw_id_fields = ('user', 'redemption')
+    readonly_fields = ('created_at',)
+    show_full_result_count = False
+
+@admin.register(RedemptionCode)
+class RedemptionCodeAdmin(admin.ModelAdmin):
+    list_display = ('code', 'source', 'reward', 'assigned_at', 'redemption')
+    list_filter = ('source', ('assigned_at', admin.EmptyFieldListFilter))
+    search_fields = ('code',)
+    list_select_related = ('reward', 'redemption')
+    raw_id_fields = ('reward', 'redemption')
+    readonly_fields = ('created_at',)
+    show_full_result_count = False
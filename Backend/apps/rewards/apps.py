@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class RewardsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.rewards'
-    label = 'apps_Rewards'
\ No newline at end of file
+    label = 'apps_Rewards'
+
+    def ready(self):
+        from . import signals  # noqa: F401
\ No newline at end of file
@@ -0,0 +1,72 @@
+"""
+Shared reward catalog with a per-user overlay
+
+The catalog body is the same for everyone, so it is serialized once and
+cached until a reward is edited or sells out or comes back (the REWARDS
+data version). Stock and redemption counts move with every redemption,
+so they are kept out of that body: they are read in one query into a
+cache that expires after COUNTERS_CACHE_TIMEOUT and merged in. What
+differs per user, their balance and which rewards they can afford, is a
+small overlay computed from the cached entries.
+"""
+from django.core.cache import cache
+
+from apps.core.versioning import REWARDS, get_global_version
+
+from .models import Reward
+from .serializers import RewardSerializer
+
+CATALOG_CACHE_TIMEOUT = 60 * 60
+COUNTERS_CACHE_TIMEOUT = 60
+
+COUNTER_FIELDS = ('stock', 'redemption_count')
+
+
+def _catalog_rewards():
+    return Reward.objects.filter(is_active=True, available_in_nepal=True)
+
+
+def _counters(token):
+    """{reward id: {counter field: value}} for the catalog rewards"""
+    key = f'rewards:counters:{token}'
+    counters = cache.get(key)
+    if counters is None:
+        counters = {
+            row.pop('id'): row for row in _catalog_rewards().values('id', *COUNTER_FIELDS)
+        }
+        cache.set(key, counters, timeout=COUNTERS_CACHE_TIMEOUT)
+    return counters
+
+
+def catalog_entries():
+    """Serialized active rewards, cheapest first, as plain dicts without can_afford"""
+    token, _ = get_global_version(REWARDS)
+    key = f'rewards:catalog:{token}'
+    entries = cache.get(key)
+    if entries is None:
+        rewards = _catalog_rewards().order_by('points_required', 'id')
+        entries = []
+        for row in RewardSerializer(rewards, many=True).data:
+            row = dict(row)
+            row.pop('can_afford')
+            for field in COUNTER_FIELDS:
+                row.pop(field)
+            entries.append(row)
+        cache.set(key, entries, timeout=CATALOG_CACHE_TIMEOUT)
+
+    counters = _counters(token)
+    return [
+        dict(entry, **counters.get(entry['id'], {'stock': 0, 'redemption_count': 0}))
+        for entry in entries
+    ]
+
+
+def user_overlay(user, entries):
+    """The caller's balance and the ids among `entries` they can afford"""
+    if not user.is_authenticated:
+        return {'balance': None, 'affordable_ids': []}
+    balance = user.carbon_points
+    return {
+        'balance': balance,
+        'affordable_ids': [entry['id'] for entry in entries if entry['points_required'] <= balance],
+    }
@@ -0,0 +1,132 @@
+"""
+Redemption code pool
+
+Codes are generated (or loaded from partners) ahead of time, checked
+against the pool and existing redemptions in one lookup per batch, and
+stored in RedemptionCode. allocate_code() hands a free one out with a
+conditional UPDATE, so two redemptions can never get the same code and
+inserting a Redemption never retries on the unique index.
+"""
+import random
+import secrets
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Redemption, RedemptionCode
+
+# No 0/O or 1/I/L, so codes survive being read out or typed in
+CODE_ALPHABET = 'ABCDEFGHJKMNPQRSTUVWXYZ23456789'
+CODE_LENGTH = 8
+CODE_MAX_LENGTH = RedemptionCode._meta.get_field('code').max_length
+
+# Free codes read per allocation; claimants pick among them at random
+ALLOCATE_CANDIDATES = 16
+
+
+class CodePoolExhausted(Exception):
+    pass
+
+
+def taken_codes(codes):
+    """The subset of `codes` already in the pool or on a redemption"""
+    codes = list(codes)
+    return set(
+        RedemptionCode.objects.filter(code__in=codes).values_list('code', flat=True)
+    ) | set(
+        Redemption.objects.filter(redemption_code__in=codes).values_list('redemption_code', flat=True)
+    )
+
+
+def generate_codes(count):
+    """Add `count` fresh generated codes to the shared pool, returns how many were stored"""
+    stored = 0
+    while stored < count:
+        size = min(count - stored, settings.REDEMPTION_CODE_BATCH)
+        batch = {''.join(secrets.choice(CODE_ALPHABET) for _ in range(CODE_LENGTH)) for _ in range(size)}
+        batch -= taken_codes(batch)
+        # ignore_conflicts covers a concurrent replenish picking the same code
+        RedemptionCode.objects.bulk_create(
+            [RedemptionCode(code=code) for code in batch], ignore_conflicts=True
+        )
+        stored += len(batch)
+    return stored
+
+
+def free_generated_count():
+    return RedemptionCode.objects.filter(reward__isnull=True, assigned_at__isnull=True).count()
+
+
+def replenish(minimum=None):
+    """Top the generated pool up to `minimum` free codes, returns how many were added"""
+    minimum = settings.REDEMPTION_CODE_POOL_MIN if minimum is None else minimum
+    missing = minimum - free_generated_count()
+    return generate_codes(missing) if missing > 0 else 0
+
+
+def load_partner_codes(reward, codes):
+    """Store partner-supplied codes for `reward`, returns (loaded, rejected codes).
+
+    Codes already known anywhere, repeated in the input, blank or too long
+    are rejected. The reward is switched over to its partner codes.
+    """
+    seen = set()
+    rejected = []
+    candidates = []
+    for code in codes:
+        code = code.strip()
+        if not code or len(code) > CODE_MAX_LENGTH or code in seen:
+            rejected.append(code)
+            continue
+        seen.add(code)
+        candidates.append(code)
+
+    loaded = 0
+    batch_size = settings.REDEMPTION_CODE_BATCH
+    for offset in range(0, len(candidates), batch_size):
+        batch = candidates[offset:offset + batch_size]
+        taken = taken_codes(batch)
+        rejected.extend(code for code in batch if code in taken)
+        fresh = [
+            RedemptionCode(code=code, reward=reward, source='partner')
+            for code in batch if code not in taken
+        ]
+        RedemptionCode.objects.bulk_create(fresh, ignore_conflicts=True)
+        loaded += len(fresh)
+
+    if loaded and not reward.partner_codes:
+        reward.partner_codes = True
+        reward.save(update_fields=['partner_codes'])
+    return loaded, rejected
+
+
+def _claim(pool):
+    candidates = list(pool.filter(assigned_at__isnull=True).order_by('id')[:ALLOCATE_CANDIDATES])
+    random.shuffle(candidates)
+    now = timezone.now()
+    for candidate in candidates:
+        if RedemptionCode.objects.filter(pk=candidate.pk, assigned_at__isnull=True).update(assigned_at=now):
+            candidate.assigned_at = now
+            return candidate
+    return None if not candidates else _claim(pool)
+
+
+def allocate_code(reward):
+    """Take a free code for a redemption of `reward`, returns the RedemptionCode.
+
+    Rewards with partner codes use only those and raise CodePoolExhausted
+    when they run out; everything else draws from the generated pool,
+    which is topped up on the spot if the replenish job fell behind.
+    """
+    if reward.partner_codes:
+        code = _claim(RedemptionCode.objects.filter(reward=reward))
+        if code is None:
+            raise CodePoolExhausted(reward.pk)
+        return code
+
+    pool = RedemptionCode.objects.filter(reward__isnull=True)
+    code = _claim(pool)
+    if code is None:
+        generate_codes(settings.REDEMPTION_CODE_BATCH)
+        code = _claim(pool)
+    return code
@@ -0,0 +1,239 @@
+"""
+Sharded stock and expiring reservations for limited rewards
+
+A limited reward's available units live in REWARD_STOCK_SHARDS StockShard
+rows. Claiming a unit is one conditional UPDATE on a random shard
+(available > 0), so concurrent claimants rarely meet on the same row and
+a shard can never go below zero. A claim becomes a held Reservation that
+is confirmed into a Redemption or, once REWARD_HOLD_SECONDS pass, swept
+back into stock by expire_reservations().
+
+Reward.stock stays the number shown in the catalog and checked by
+Reward.is_available. Writing it on every claim or confirm would queue
+all redeemers of a reward on its row, so the redeem path only writes it
+when the shards run dry or refill from dry (refresh_availability); the
+exact count is copied over by the sweeper's refresh_stock(). Rewards
+with stock -1 are unlimited and have no shards.
+"""
+import random
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from apps.core.versioning import REWARDS, touch_global
+
+from .models import Redemption, Reservation, Reward, StockShard
+
+SWEEP_CHUNK_SIZE = 1000
+
+
+class OutOfStock(Exception):
+    pass
+
+
+class ReservationExpired(Exception):
+    pass
+
+
+def _split(total, shards):
+    base, extra = divmod(max(total, 0), shards)
+    return [base + (1 if index < extra else 0) for index in range(shards)]
+
+
+def _shard_rows(reward_id, total):
+    return [
+        StockShard(reward_id=reward_id, shard=index, available=available)
+        for index, available in enumerate(_split(total, settings.REWARD_STOCK_SHARDS))
+    ]
+
+
+def set_stock(reward):
+    """Replace a reward's shards with its current Reward.stock (admin edits)"""
+    with transaction.atomic():
+        StockShard.objects.filter(reward=reward).delete()
+        if reward.stock >= 0:
+            StockShard.objects.bulk_create(_shard_rows(reward.pk, reward.stock))
+
+
+def _decrement(reward_id, shard):
+    return StockShard.objects.filter(
+        reward_id=reward_id, shard=shard, available__gt=0
+    ).update(available=F('available') - 1)
+
+
+def _take_unit(reward):
+    """Claim one unit from a random shard, returns the shard or None when sold out"""
+    shard = random.randrange(settings.REWARD_STOCK_SHARDS)
+    if _decrement(reward.pk, shard):
+        return shard
+
+    # Missed: try the shards that still had stock a moment ago
+    candidates = list(
+        StockShard.objects.filter(reward=reward, available__gt=0).values_list('shard', flat=True)
+    )
+    random.shuffle(candidates)
+    for shard in candidates:
+        if _decrement(reward.pk, shard):
+            return shard
+
+    if not candidates and not StockShard.objects.filter(reward=reward).exists():
+        # First claim since the reward was created outside the admin
+        StockShard.objects.bulk_create(_shard_rows(reward.pk, reward.stock), ignore_conflicts=True)
+        return _take_unit(reward)
+    return None
+
+
+def reserve(reward, user):
+    """Hold one unit of `reward` for `user`, returns the Reservation.
+
+    A user holds at most one unit of a reward at a time, which the
+    reservation_one_held constraint enforces; asking again returns the
+    live hold. Raises OutOfStock when nothing is left.
+    """
+    now = timezone.now()
+    held = Reservation.objects.filter(user=user, reward=reward, status='held')
+    existing = held.first()
+    if existing is not None:
+        if existing.expires_at > now:
+            return existing
+        # Past its time but not swept yet: expire it here to make room
+        if held.filter(pk=existing.pk).update(status='expired') and existing.shard is not None:
+            return_units(Counter({(reward.pk, existing.shard): 1}))
+
+    shard = None
+    if reward.stock != -1:
+        shard = _take_unit(reward)
+        if shard is None:
+            refresh_availability(reward.pk)
+            raise OutOfStock(reward.pk)
+
+    try:
+        with transaction.atomic():
+            return Reservation.objects.create(
+                reward=reward, user=user, shard=shard,
+                expires_at=now + timedelta(seconds=settings.REWARD_HOLD_SECONDS),
+            )
+    except IntegrityError:
+        # A concurrent request from the same user got the hold first
+        if shard is not None:
+            return_units(Counter({(reward.pk, shard): 1}))
+        return held.get()
+
+
+def confirm(reservation, **redemption_fields):
+    """Turn a live hold into a Redemption, raises ReservationExpired otherwise"""
+    claimed = Reservation.objects.filter(
+        pk=reservation.pk, status='held', expires_at__gt=timezone.now()
+    ).update(status='confirmed')
+    if not claimed:
+        raise ReservationExpired(reservation.pk)
+
+    redemption = Redemption.objects.create(
+        user_id=reservation.user_id, reward_id=reservation.reward_id, **redemption_fields
+    )
+    Reservation.objects.filter(pk=reservation.pk).update(redemption=redemption)
+    reservation.status = 'confirmed'
+    reservation.redemption = redemption
+    if reservation.shard is not None:
+        refresh_availability(reservation.reward_id)
+    return redemption
+
+
+def return_units(units):
+    """Put units back into stock; `units` counts them by (reward_id, shard)"""
+    for (reward_id, shard), count in units.items():
+        if shard is not None and StockShard.objects.filter(reward_id=reward_id, shard=shard).update(
+            available=F('available') + count
+        ):
+            continue
+        # The shard is gone (stock was reset) or unknown: use any shard
+        first = StockShard.objects.filter(reward_id=reward_id).order_by('shard').values_list('shard', flat=True).first()
+        if first is not None:
+            StockShard.objects.filter(reward_id=reward_id, shard=first).update(available=F('available') + count)
+        else:
+            # Shards not created yet; they will be built from Reward.stock
+            Reward.objects.filter(pk=reward_id, stock__gte=0).update(stock=F('stock') + count)
+
+
+def release(reservation):
+    """Give up a live hold early, returns whether it was still held"""
+    released = Reservation.objects.filter(pk=reservation.pk, status='held').update(status='released')
+    if released and reservation.shard is not None:
+        return_units(Counter({(reservation.reward_id, reservation.shard): 1}))
+        refresh_availability(reservation.reward_id)
+    return bool(released)
+
+
+def restore_redeemed_unit(redemption):
+    """Return the unit of a cancelled limited-stock redemption"""
+    if redemption.reward.stock == -1:
+        return
+    reservation = Reservation.objects.filter(redemption=redemption).only('shard').first()
+    shard = reservation.shard if reservation is not None else None
+    return_units(Counter({(redemption.reward_id, shard): 1}))
+    refresh_availability(redemption.reward_id)
+
+
+def refresh_availability(reward_id):
+    """Write Reward.stock only if the shards ran dry or refilled from dry, returns whether it did"""
+    total = StockShard.objects.filter(reward_id=reward_id).aggregate(total=Sum('available'))['total']
+    if total is None:
+        return False
+    rewards = Reward.objects.filter(pk=reward_id)
+    if total == 0:
+        crossed = rewards.filter(stock__gt=0).update(stock=0)
+    else:
+        crossed = rewards.filter(stock=0).update(stock=total)
+    if crossed:
+        touch_global(REWARDS)
+    return bool(crossed)
+
+
+def refresh_stock(reward_ids=None):
+    """Copy shard totals into Reward.stock where they differ, returns the count
+
+    Only a reward selling out or coming back changes the cached catalog;
+    other counts reach it through its short-lived counters cache.
+    """
+    totals = StockShard.objects.order_by().values('reward_id').annotate(total=Sum('available'))
+    if reward_ids is not None:
+        totals = totals.filter(reward_id__in=reward_ids)
+    changed = crossed = 0
+    for row in totals:
+        rewards = Reward.objects.filter(pk=row['reward_id'], stock__gte=0).exclude(stock=row['total'])
+        crossing = rewards.filter(stock__gt=0) if row['total'] == 0 else rewards.filter(stock=0)
+        crossed += crossing.update(stock=row['total'])
+        changed += rewards.update(stock=row['total'])
+    if crossed:
+        touch_global(REWARDS)
+    return changed + crossed
+
+
+def expire_reservations(now=None, chunk_size=SWEEP_CHUNK_SIZE):
+    """Expire holds past their time and return their units, returns the count"""
+    now = now or timezone.now()
+    expired = 0
+    rewards = set()
+    while True:
+        with transaction.atomic():
+            rows = list(
+                Reservation.objects.select_for_update(skip_locked=True)
+                .filter(status='held', expires_at__lte=now)
+                .order_by('expires_at')
+                .values_list('id', 'reward_id', 'shard')[:chunk_size]
+            )
+            if not rows:
+                break
+            Reservation.objects.filter(id__in=[row[0] for row in rows]).update(status='expired')
+            return_units(Counter(
+                (reward_id, shard) for _, reward_id, shard in rows if shard is not None
+            ))
+        expired += len(rows)
+        rewards.update(reward_id for _, reward_id, _ in rows)
+    if rewards:
+        refresh_stock(rewards)
+    return expired
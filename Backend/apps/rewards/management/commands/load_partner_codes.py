@@ -0,0 +1,37 @@
+"""
+Bulk-load partner voucher codes for a reward
+
+    python manage.py load_partner_codes 12 vouchers.csv
+
+The file holds one code per line (the first CSV column is used, so a
+partner's export can be passed as is). From then on the reward's
+redemptions hand out these codes only.
+"""
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.rewards.codes import load_partner_codes
+from apps.rewards.models import Reward
+
+
+class Command(BaseCommand):
+    help = "Load partner-supplied redemption codes into a reward's code pool"
+
+    def add_arguments(self, parser):
+        parser.add_argument('reward_id', type=int)
+        parser.add_argument('path')
+
+    def handle(self, *args, **options):
+        try:
+            reward = Reward.objects.get(pk=options['reward_id'])
+        except Reward.DoesNotExist:
+            raise CommandError(f"Unknown reward: {options['reward_id']}")
+
+        with open(options['path'], newline='') as handle:
+            codes = [row[0] for row in csv.reader(handle) if row]
+        loaded, rejected = load_partner_codes(reward, codes)
+
+        self.stdout.write(f'{loaded} codes loaded for {reward.title}, {len(rejected)} rejected')
+        for code in rejected[:20]:
+            self.stdout.write(f'  rejected: {code!r}')
@@ -0,0 +1,23 @@
+"""
+Keep the generated redemption code pool topped up
+
+    python manage.py replenish_redemption_codes
+    python manage.py replenish_redemption_codes --minimum 5000
+
+Run from cron; adds codes only when fewer than the minimum are free.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.rewards.codes import free_generated_count, replenish
+
+
+class Command(BaseCommand):
+    help = 'Generate redemption codes until the pool has the minimum number free'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--minimum', type=int, default=settings.REDEMPTION_CODE_POOL_MIN)
+
+    def handle(self, *args, **options):
+        added = replenish(options['minimum'])
+        self.stdout.write(f'{added} codes added, {free_generated_count()} free')
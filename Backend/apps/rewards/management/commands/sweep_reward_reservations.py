@@ -0,0 +1,30 @@
+"""
+Return expired reward holds to stock and refresh the displayed counters
+
+    python manage.py sweep_reward_reservations
+
+Run from cron every minute or so. Holds past REWARD_HOLD_SECONDS are
+expired in chunks and their units go back to their shards; Reward.stock
+is then brought in line with the shard totals and redemption_count with
+the redemption rows. Re-running is safe.
+"""
+from django.core.management.base import BaseCommand
+
+from apps.rewards.inventory import SWEEP_CHUNK_SIZE, expire_reservations, refresh_stock
+from apps.rewards.models import Reward
+
+
+class Command(BaseCommand):
+    help = 'Expire reward reservations past their hold and refresh reward stock'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=SWEEP_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        expired = expire_reservations(chunk_size=options['chunk_size'])
+        refreshed = refresh_stock()
+        recounted = Reward.recount_redemptions()
+        self.stdout.write(
+            f'{expired} reservations expired, stock refreshed on {refreshed} rewards, '
+            f'redemptions recounted on {recounted}'
+        )
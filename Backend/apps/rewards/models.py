@@ -2,8 +2,9 @@
 Rewards models for Carbon Karma
 """
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.conf import settings
-import uuid
+from django.utils import timezone
 
 class Reward(models.Model):
     """Rewards that users can redeem with points"""
@@ -30,6 +31,10 @@ class Reward(models.Model):
     
     is_active = models.BooleanField(default=True)
     stock = models.IntegerField(default=-1, help_text="-1 means unlimited stock")
+    partner_codes = models.BooleanField(
+        default=False,
+        help_text="Redemptions use this reward's partner-supplied codes (manage.py load_partner_codes)"
+    )
     
     # Nepal specific
     available_in_nepal = models.BooleanField(default=True)
@@ -38,6 +43,9 @@ class Reward(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Recounted by the reservation sweeper with recount_redemptions()
+    redemption_count = models.PositiveIntegerField(default=0, editable=False)
+    
     class Meta:
         ordering = ['points_required']
     
@@ -49,10 +57,15 @@ class Reward(models.Model):
         """Check if reward is available for redemption"""
         return self.is_active and (self.stock == -1 or self.stock > 0)
     
-    @property
-    def redemption_count(self):
-        """Get number of times this reward has been redeemed"""
-        return self.redemption_set.count()
+    @classmethod
+    def recount_redemptions(cls, queryset=None):
+        """Rebuild redemption_count from the redemption rows with one UPDATE, returns the rows changed"""
+        counts = Redemption.objects.filter(
+            reward=models.OuterRef('pk')
+        ).order_by().values('reward').annotate(total=models.Count('id')).values('total')
+        actual = Coalesce(models.Subquery(counts), 0)
+        queryset = cls.objects.all() if queryset is None else queryset
+        return queryset.exclude(redemption_count=actual).update(redemption_count=actual)
 
 class Redemption(models.Model):
     """Track user reward redemptions"""
@@ -101,11 +114,155 @@ class Redemption(models.Model):
         return f"{self.user.username} - {self.reward.title} ({self.status})"
     
     def save(self, *args, **kwargs):
-        # Generate redemption code if not exists
+        # Take a code from the pre-checked pool if not exists
+        pooled = None
         if not self.redemption_code:
-            self.redemption_code = str(uuid.uuid4())[:8].upper()
+            from .codes import allocate_code
+            pooled = allocate_code(self.reward)
+            self.redemption_code = pooled.code
         super().save(*args, **kwargs)
+        if pooled is not None:
+            RedemptionCode.objects.filter(pk=pooled.pk).update(redemption=self)
     
     def can_cancel(self):
         """Check if redemption can be cancelled"""
-        return self.status in ['pending', 'approved']
\ No newline at end of file
+        return self.status in ['pending', 'approved']
+
+class RedemptionCode(models.Model):
+    """A pre-generated or partner-supplied code waiting in the pool.
+
+    Codes are checked against the pool and existing redemptions before
+    they are stored, so handing one out never collides. reward is set
+    only for partner codes, which are used by that reward alone.
+    """
+    
+    SOURCE_CHOICES = [
+        ('generated', 'Generated'),
+        ('partner', 'Partner'),
+    ]
+    
+    code = models.CharField(max_length=20, unique=True)
+    reward = models.ForeignKey(
+        Reward,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='partner_code_pool'
+    )
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES, default='generated')
+    assigned_at = models.DateTimeField(null=True, blank=True)
+    redemption = models.OneToOneField(
+        Redemption,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='pooled_code'
+    )
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        indexes = [
+            # Allocation only looks at free codes of one pool
+            models.Index(
+                fields=['reward', 'id'], condition=models.Q(assigned_at__isnull=True),
+                name='redemption_code_free_idx'
+            ),
+        ]
+    
+    def __str__(self):
+        return self.code
+
+class StockShard(models.Model):
+    """One slice of a limited reward's available stock.
+
+    Claims decrement a single shard with a conditional UPDATE, so
+    concurrent claimants spread over several rows instead of queueing on
+    Reward.stock. See apps.rewards.inventory.
+    """
+    
+    reward = models.ForeignKey(Reward, on_delete=models.CASCADE, related_name='stock_shards')
+    shard = models.PositiveSmallIntegerField()
+    available = models.IntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['reward', 'shard']
+    
+    def __str__(self):
+        return f"{self.reward.title} #{self.shard}: {self.available}"
+
+class Reservation(models.Model):
+    """A unit of a reward held for a user until it is confirmed or expires"""
+    
+    STATUS_CHOICES = [
+        ('held', 'Held'),
+        ('confirmed', 'Confirmed'),
+        ('released', 'Released'),
+        ('expired', 'Expired'),
+    ]
+    
+    reward = models.ForeignKey(Reward, on_delete=models.CASCADE, related_name='reservations')
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='reward_reservations'
+    )
+    # The shard the unit came from; None for unlimited rewards
+    shard = models.PositiveSmallIntegerField(null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='held')
+    expires_at = models.DateTimeField()
+    redemption = models.OneToOneField(
+        Redemption,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='reservation'
+    )
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Sweeper: held reservations past their expiry
+            models.Index(fields=['status', 'expires_at'], name='reservation_expiry_idx'),
+            models.Index(fields=['user', 'reward', 'status'], name='reservation_user_idx'),
+        ]
+        constraints = [
+            # One live hold per user and reward; reserve() relies on it
+            models.UniqueConstraint(
+                fields=['user', 'reward'],
+                condition=models.Q(status='held'),
+                name='reservation_one_held',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id} - {self.reward.title} ({self.status})"
+    
+    @property
+    def is_active(self):
+        return self.status == 'held' and self.expires_at > timezone.now()
+
+class UserRedemptionStats(models.Model):
+    """Per-user redemption counters read by the stats endpoint.
+
+    Kept in step by apps.rewards.stats on every redemption state
+    transition; rows are rebuilt from Redemption when missing.
+    """
+    
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='redemption_stats'
+    )
+    total_redemptions = models.PositiveIntegerField(default=0)
+    total_points_spent = models.IntegerField(default=0)
+    pending_redemptions = models.PositiveIntegerField(default=0)
+    completed_redemptions = models.PositiveIntegerField(default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.user_id} - {self.total_redemptions} redemptions"
@@ -2,7 +2,7 @@
 Serializers for Rewards app
 """
 from rest_framework import serializers
-from .models import Reward, Redemption
+from .models import Reward, Redemption, Reservation
 
 class RewardSerializer(serializers.ModelSerializer):
     """Serializer for Reward model"""
@@ -52,9 +52,23 @@ class RedemptionSerializer(serializers.ModelSerializer):
         """Check if redemption can be cancelled"""
         return obj.can_cancel()
 
-class RedeemRewardSerializer(serializers.Serializer):
-    """Serializer for redeeming a reward"""
-    reward_id = serializers.IntegerField()
+class ReservationSerializer(serializers.ModelSerializer):
+    """Serializer for a held reward unit"""
+    
+    class Meta:
+        model = Reservation
+        fields = ('id', 'reward', 'status', 'expires_at', 'redemption', 'created_at')
+        read_only_fields = fields
+
+class DeliverySerializer(serializers.Serializer):
+    """Delivery fields given when a unit is redeemed"""
     delivery_address = serializers.CharField(required=False, allow_blank=True)
-    delivery_phone = serializers.CharField(required=False, allow_blank=True)
-    notes = serializers.CharField(required=False, allow_blank=True)
\ No newline at end of file
+    delivery_phone = serializers.CharField(required=False, allow_blank=True, max_length=15)
+    notes = serializers.CharField(required=False, allow_blank=True)
+
+class ReserveRewardSerializer(serializers.Serializer):
+    """Serializer for holding a unit of a reward"""
+    reward_id = serializers.IntegerField()
+
+class RedeemRewardSerializer(DeliverySerializer, ReserveRewardSerializer):
+    """Serializer for redeeming a reward"""
\ No newline at end of file
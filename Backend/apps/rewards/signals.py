@@ -0,0 +1,25 @@
+"""
+Keep the owners' redemption counters in step with the redemption rows
+
+Reward.redemption_count is not updated here: a per-redemption UPDATE of
+the reward row would queue concurrent redeemers on it. The sweeper
+recounts it (Reward.recount_redemptions), and the catalog reads it
+through a short-lived cache.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Redemption, UserRedemptionStats
+from .stats import record_redemption
+
+
+@receiver(post_save, sender=Redemption)
+def redemption_created(sender, instance, created, **kwargs):
+    if created:
+        record_redemption(instance)
+
+
+@receiver(post_delete, sender=Redemption)
+def redemption_deleted(sender, instance, **kwargs):
+    # Rebuilt on the next read; the user may be being deleted along with it
+    UserRedemptionStats.objects.filter(user_id=instance.user_id).delete()
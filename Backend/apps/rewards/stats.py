@@ -0,0 +1,97 @@
+"""
+Per-user redemption counters
+
+UserRedemptionStats holds what the stats endpoint shows, so reading it is
+one row. Creation and status changes apply F() deltas; a missing row (or
+an arbitrary admin edit) is rebuilt from one conditional aggregate.
+"""
+from collections import Counter, defaultdict
+
+from django.db.models import Count, F, Q, Sum
+
+from .models import Redemption, UserRedemptionStats
+
+# Statuses that have their own counter
+STATUS_COUNTERS = {
+    'pending': 'pending_redemptions',
+    'completed': 'completed_redemptions',
+}
+COUNTER_FIELDS = ['total_redemptions', 'total_points_spent', *STATUS_COUNTERS.values()]
+
+
+def redemption_totals(user_ids):
+    """{user_id: counters} from the redemption rows in one grouped aggregate"""
+    aggregates = {
+        'total_redemptions': Count('id'),
+        'total_points_spent': Sum('points_spent'),
+        **{field: Count('id', filter=Q(status=status)) for status, field in STATUS_COUNTERS.items()},
+    }
+    rows = Redemption.objects.filter(user_id__in=user_ids).order_by().values('user_id').annotate(**aggregates)
+    return {row.pop('user_id'): row for row in rows}
+
+
+def rebuild_redemption_stats(user_ids):
+    """Recompute the counter rows of the given users, returns them by user id"""
+    user_ids = list(user_ids)
+    totals = redemption_totals(user_ids)
+    rows = []
+    for user_id in user_ids:
+        values = totals.get(user_id, {})
+        rows.append(UserRedemptionStats(
+            user_id=user_id, **{field: values.get(field) or 0 for field in COUNTER_FIELDS}
+        ))
+    UserRedemptionStats.objects.bulk_create(
+        rows, update_conflicts=True, unique_fields=['user'], update_fields=COUNTER_FIELDS
+    )
+    return {row.user_id: row for row in rows}
+
+
+def get_redemption_stats(user):
+    """The user's counter row, built on first read"""
+    stats = UserRedemptionStats.objects.filter(user_id=user.pk).first()
+    if stats is None:
+        stats = rebuild_redemption_stats([user.pk])[user.pk]
+    return stats
+
+
+def _apply(deltas_by_user):
+    """Add {user_id: {field: delta}} to existing rows; users without a row are rebuilt"""
+    by_deltas = defaultdict(list)
+    for user_id, deltas in deltas_by_user.items():
+        deltas = tuple(sorted((field, delta) for field, delta in deltas.items() if delta))
+        if deltas:
+            by_deltas[deltas].append(user_id)
+
+    missing = set()
+    for deltas, user_ids in by_deltas.items():
+        existing = set(UserRedemptionStats.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True))
+        UserRedemptionStats.objects.filter(user_id__in=existing).update(
+            **{field: F(field) + delta for field, delta in deltas}
+        )
+        missing.update(set(user_ids) - existing)
+    if missing:
+        rebuild_redemption_stats(missing)
+
+
+def record_redemption(redemption):
+    """Count a newly created redemption"""
+    deltas = {'total_redemptions': 1, 'total_points_spent': redemption.points_spent}
+    if redemption.status in STATUS_COUNTERS:
+        deltas[STATUS_COUNTERS[redemption.status]] = 1
+    _apply({redemption.user_id: deltas})
+
+
+def record_status_change(user_counts, from_status, to_status):
+    """Move `count` redemptions per user from one status to another.
+
+    user_counts maps user ids to how many of their redemptions changed.
+    """
+    deltas_by_user = {}
+    for user_id, count in Counter(user_counts).items():
+        deltas = Counter()
+        if from_status in STATUS_COUNTERS:
+            deltas[STATUS_COUNTERS[from_status]] -= count
+        if to_status in STATUS_COUNTERS:
+            deltas[STATUS_COUNTERS[to_status]] += count
+        deltas_by_user[user_id] = deltas
+    _apply(deltas_by_user)
@@ -1,3 +1,214 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.core.versioning import REWARDS, get_global_version
+from apps.users.models import User
+
+from .codes import CODE_ALPHABET, free_generated_count, load_partner_codes, replenish
+from .inventory import expire_reservations, set_stock
+from .models import Redemption, RedemptionCode, Reservation, Reward, StockShard
+
+
+def make_reward(stock, **fields):
+    reward = Reward.objects.create(**{
+        'title': 'Tote bag', 'description': 'Cotton tote', 'category': 'merchandise',
+        'points_required': 100, 'partner_name': 'Green Shop', 'stock': stock, **fields,
+    })
+    set_stock(reward)
+    return reward
+
+
+class RewardInventoryTests(TestCase):
+    def setUp(self):
+        self.clients = []
+        for number in range(5):
+            user = User.objects.create_user(username=f'user{number}', password='pass12345')
+            user.carbon_points = 1000
+            user.save(update_fields=['carbon_points'])
+            client = APIClient()
+            client.force_authenticate(user)
+            self.clients.append(client)
+
+    def available(self, reward):
+        return StockShard.objects.filter(reward=reward).aggregate(total=Sum('available'))['total']
+
+    def reserve(self, client, reward):
+        return client.post('/api/rewards/reserve/', {'reward_id': reward.pk})
+
+    def test_limited_stock_is_never_oversold(self):
+        reward = make_reward(3)
+        statuses = [
+            client.post('/api/rewards/redeem/', {'reward_id': reward.pk}).status_code
+            for client in self.clients
+        ]
+        self.assertEqual(sorted(statuses), [201, 201, 201, 400, 400])
+        self.assertEqual(Redemption.objects.filter(reward=reward).count(), 3)
+        self.assertEqual(self.available(reward), 0)
+        reward.refresh_from_db()
+        self.assertEqual(reward.stock, 0)
+
+    def test_confirming_the_last_unit_sells_the_reward_out(self):
+        reward = make_reward(1)
+        reservation = self.reserve(self.clients[0], reward).data
+        response = self.clients[0].post(
+            f"/api/rewards/reservations/{reservation['id']}/confirm/", {'delivery_phone': '9800000000'}
+        )
+        self.assertEqual(response.status_code, 201)
+        reward.refresh_from_db()
+        self.assertEqual(reward.stock, 0)
+        self.assertFalse(reward.is_available)
+        self.assertEqual(self.reserve(self.clients[1], reward).status_code, 400)
+
+    def test_released_units_can_be_reserved_again(self):
+        reward = make_reward(1)
+        reservation = self.reserve(self.clients[0], reward).data
+        self.assertEqual(self.reserve(self.clients[1], reward).status_code, 400)
+        reward.refresh_from_db()
+        self.assertEqual(reward.stock, 0)
+
+        response = self.clients[0].post(f"/api/rewards/reservations/{reservation['id']}/release/")
+        self.assertEqual(response.status_code, 200)
+        reward.refresh_from_db()
+        self.assertEqual(reward.stock, 1)
+        self.assertEqual(self.reserve(self.clients[1], reward).status_code, 201)
+
+    def test_reserve_validates_the_reward_id(self):
+        response = self.clients[0].post('/api/rewards/reserve/', {'reward_id': 'abc'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('reward_id', response.data)
+
+    def test_reserving_again_returns_the_live_hold(self):
+        reward = make_reward(3)
+        first = self.reserve(self.clients[0], reward).data
+        self.assertEqual(self.reserve(self.clients[0], reward).data['id'], first['id'])
+        self.assertEqual(self.available(reward), 2)
+
+        # A stale hold the sweeper has not reached is replaced, not doubled
+        Reservation.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        second = self.reserve(self.clients[0], reward).data
+        self.assertNotEqual(second['id'], first['id'])
+        self.assertEqual(self.available(reward), 2)
+        self.assertEqual(Reservation.objects.filter(status='held').count(), 1)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Reservation.objects.create(
+                reward=reward, user=Reservation.objects.get(pk=second['id']).user, expires_at=timezone.now()
+            )
+
+    def test_stock_is_written_only_when_it_sells_out_or_comes_back(self):
+        reward = make_reward(3)
+        version = get_global_version(REWARDS)
+        reservation = self.reserve(self.clients[0], reward).data
+        self.clients[0].post(
+            f"/api/rewards/reservations/{reservation['id']}/confirm/", {'delivery_phone': '9800000000'}
+        )
+        reward.refresh_from_db()
+        self.assertEqual(reward.stock, 3)
+        self.assertEqual(get_global_version(REWARDS), version)
+
+        call_command('sweep_reward_reservations', stdout=StringIO())
+        reward.refresh_from_db()
+        self.assertEqual(reward.stock, 2)
+        self.assertEqual(get_global_version(REWARDS), version)
+
+    def test_expired_holds_go_back_into_stock(self):
+        reward = make_reward(1)
+        self.reserve(self.clients[0], reward)
+        self.assertEqual(expire_reservations(now=timezone.now() + timedelta(days=1)), 1)
+        self.assertEqual(self.available(reward), 1)
+        self.assertEqual(Reservation.objects.get().status, 'expired')
+
+    def test_confirm_validates_the_delivery_fields(self):
+        reward = make_reward(1)
+        reservation = self.reserve(self.clients[0], reward).data
+        url = f"/api/rewards/reservations/{reservation['id']}/confirm/"
+        for body in ({'notes': None}, {'delivery_phone': '9' * 40}):
+            response = self.clients[0].post(url, body, format='json')
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(Reservation.objects.get().status, 'held')
+        self.assertFalse(Redemption.objects.exists())
+
+
+class RewardCatalogTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', password='pass12345')
+        self.user.carbon_points = 1000
+        self.user.save(update_fields=['carbon_points'])
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_redemptions_leave_the_cached_catalog_alone(self):
+        reward = make_reward(-1)
+        self.assertEqual(self.client.get('/api/rewards/').data['results'][0]['redemption_count'], 0)
+        version = get_global_version(REWARDS)
+
+        self.client.post('/api/rewards/redeem/', {'reward_id': reward.pk})
+        self.assertEqual(get_global_version(REWARDS), version)
+        reward.refresh_from_db()
+        self.assertEqual(reward.redemption_count, 0)
+
+        # The sweeper recounts, and the counters cache expires on its own
+        call_command('sweep_reward_reservations', stdout=StringIO())
+        reward.refresh_from_db()
+        self.assertEqual(reward.redemption_count, 1)
+        cache.clear()
+        self.assertEqual(self.client.get('/api/rewards/').data['results'][0]['redemption_count'], 1)
+
+
+@override_settings(REDEMPTION_CODE_BATCH=20)
+class CodePoolTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', password='pass12345')
+        self.user.carbon_points = 1000
+        self.user.save(update_fields=['carbon_points'])
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def redeem(self, reward):
+        return self.client.post('/api/rewards/redeem/', {'reward_id': reward.pk})
+
+    def test_replenish_tops_the_pool_up_with_unique_codes(self):
+        self.assertEqual(replenish(minimum=50), 50)
+        self.assertEqual(replenish(minimum=50), 0)
+        codes = list(RedemptionCode.objects.values_list('code', flat=True))
+        self.assertEqual(len(set(codes)), 50)
+        self.assertTrue(all(set(code) <= set(CODE_ALPHABET) for code in codes))
+
+    def test_redemptions_take_distinct_codes_from_the_pool(self):
+        replenish(minimum=5)
+        reward = make_reward(-1)
+        codes = {self.redeem(reward).data['redemption']['redemption_code'] for _ in range(3)}
+        self.assertEqual(len(codes), 3)
+        self.assertEqual(free_generated_count(), 2)
+        assigned = RedemptionCode.objects.filter(assigned_at__isnull=False)
+        self.assertEqual(set(assigned.values_list('redemption__redemption_code', flat=True)), codes)
+
+    def test_partner_codes_are_checked_before_loading(self):
+        reward = make_reward(-1)
+        other = make_reward(-1, title='Mug')
+        load_partner_codes(other, ['TAKEN-1'])
+        loaded, rejected = load_partner_codes(reward, ['GS-1', 'GS-1', ' ', 'TAKEN-1', 'X' * 30, 'GS-2'])
+        self.assertEqual(loaded, 2)
+        self.assertEqual(sorted(rejected), sorted(['GS-1', '', 'TAKEN-1', 'X' * 30]))
+        reward.refresh_from_db()
+        self.assertTrue(reward.partner_codes)
+
+    def test_exhausted_partner_codes_refuse_the_redemption(self):
+        reward = make_reward(5)
+        load_partner_codes(reward, ['GS-1'])
+        self.assertEqual(self.redeem(reward).data['redemption']['redemption_code'], 'GS-1')
+
+        response = self.redeem(reward)
+        self.assertEqual(response.status_code, 400)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.carbon_points, 1000 - reward.points_required)
+        # The charge and the held unit were rolled back
+        self.assertEqual(Redemption.objects.count(), 1)
+        self.assertEqual(StockShard.objects.filter(reward=reward).aggregate(total=Sum('available'))['total'], 4)
@@ -14,6 +14,9 @@ urlpatterns = [
     
     # Redemptions
     path('redeem/', views.redeem_reward, name='redeem'),
+    path('reserve/', views.reserve_reward, name='reserve'),
+    path('reservations/<int:reservation_id>/confirm/', views.confirm_reservation, name='confirm-reservation'),
+    path('reservations/<int:reservation_id>/release/', views.release_reservation, name='release-reservation'),
     path('my-redemptions/', views.MyRedemptionsView.as_view(), name='my-redemptions'),
     path('redemptions/<int:pk>/', views.RedemptionDetailView.as_view(), name='redemption-detail'),
     path('redemptions/<int:redemption_id>/cancel/', views.cancel_redemption, name='cancel-redemption'),
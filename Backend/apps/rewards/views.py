@@ -5,44 +5,65 @@ from rest_framework import generics, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.db import transaction
 from django.utils import timezone
 
-from .models import Reward, Redemption
+from apps.core.replicas import read_from_replica
+
+from .catalog import catalog_entries, user_overlay
+from .codes import CodePoolExhausted
+from .inventory import OutOfStock, ReservationExpired, confirm, release, reserve, restore_redeemed_unit
+from .models import Reward, Redemption, Reservation
+from .stats import get_redemption_stats, record_status_change
 from .serializers import (
     RewardSerializer,
     RedemptionSerializer,
-    RedeemRewardSerializer
+    DeliverySerializer,
+    RedeemRewardSerializer,
+    ReserveRewardSerializer,
+    ReservationSerializer
 )
 
 class RewardListView(generics.ListAPIView):
     """
     GET /api/rewards/
     List all available rewards
+    
+    Entries come from the shared cached catalog; can_afford and the
+    caller's balance are merged in per request.
     """
     serializer_class = RewardSerializer
     permission_classes = []  # Allow public access
     
-    def get_queryset(self):
-        queryset = Reward.objects.filter(is_active=True, available_in_nepal=True)
+    def list(self, request, *args, **kwargs):
+        entries = catalog_entries()
         
         # Filter by category
-        category = self.request.query_params.get('category')
+        category = request.query_params.get('category')
         if category:
-            queryset = queryset.filter(category=category)
+            entries = [entry for entry in entries if entry['category'] == category]
+        
+        overlay = user_overlay(request.user, entries)
+        affordable = set(overlay['affordable_ids'])
         
         # Filter by affordability
-        affordable_only = self.request.query_params.get('affordable')
-        if affordable_only == 'true':
-            queryset = queryset.filter(
-                points_required__lte=self.request.user.carbon_points
-            )
+        if request.query_params.get('affordable') == 'true':
+            entries = [entry for entry in entries if entry['id'] in affordable]
         
         # Filter by availability
-        available_only = self.request.query_params.get('available')
-        if available_only == 'true':
-            queryset = queryset.exclude(stock=0)
+        if request.query_params.get('available') == 'true':
+            entries = [entry for entry in entries if entry['stock'] != 0]
         
-        return queryset
+        page = self.paginate_queryset(entries)
+        rows = [
+            dict(entry, can_afford=entry['id'] in affordable)
+            for entry in (entries if page is None else page)
+        ]
+        if page is None:
+            return Response(rows)
+        response = self.get_paginated_response(rows)
+        response.data.update(overlay)
+        return response
 
 class RewardDetailView(generics.RetrieveAPIView):
     """
@@ -75,84 +96,216 @@ class RedemptionDetailView(generics.RetrieveAPIView):
     def get_queryset(self):
         return Redemption.objects.filter(user=self.request.user)
 
+def _insufficient_points(user, reward):
+    """Error response when `user` cannot pay for `reward`, else None"""
+    if user.carbon_points >= reward.points_required:
+        return None
+    return Response(
+        {
+            'error': 'Insufficient points',
+            'required': reward.points_required,
+            'available': user.carbon_points,
+            'needed': reward.points_required - user.carbon_points
+        },
+        status=status.HTTP_400_BAD_REQUEST
+    )
+
+def _out_of_stock(reward):
+    """Error response when `reward` has no units left, else None"""
+    if reward.is_available:
+        return None
+    return Response(
+        {'error': 'This reward is currently out of stock'},
+        status=status.HTTP_400_BAD_REQUEST
+    )
+
+def _complete_redemption(user, reservation, data):
+    """Charge the user and confirm their held unit into a Redemption"""
+    reward = reservation.reward
+    
+    # Deduct points from user
+    user.carbon_points -= reward.points_required
+    user.save(update_fields=['carbon_points'])
+    
+    # Create redemption
+    try:
+        redemption = confirm(
+            reservation,
+            points_spent=reward.points_required,
+            delivery_address=data.get('delivery_address', ''),
+            delivery_phone=data.get('delivery_phone', ''),
+            notes=data.get('notes', '')
+        )
+    except CodePoolExhausted:
+        # Every partner voucher is handed out; undo the charge and the hold
+        transaction.set_rollback(True)
+        return Response(
+            {'error': 'This reward is currently out of stock'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    # Create notification
+    from apps.gamification.models import Notification
+    Notification.objects.create(
+        user=user,
+        notification_type='reward',
+        title='Reward Redeemed!',
+        message=f'You successfully redeemed {reward.title}. Redemption code: {redemption.redemption_code}',
+        related_id=redemption.id
+    )
+    
+    return Response({
+        'message': 'Reward redeemed successfully!',
+        'redemption': RedemptionSerializer(redemption).data
+    }, status=status.HTTP_201_CREATED)
+
+def _get_active_reward(reward_id):
+    try:
+        return Reward.objects.get(id=reward_id, is_active=True)
+    except Reward.DoesNotExist:
+        return None
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@transaction.atomic
 def redeem_reward(request):
     """
     POST /api/rewards/redeem/
-    Redeem a reward with points
+    Redeem a reward with points (reserve and confirm in one step)
     """
     serializer = RedeemRewardSerializer(data=request.data)
     if not serializer.is_valid():
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
-    reward_id = serializer.validated_data['reward_id']
-    
     # Get reward
-    try:
-        reward = Reward.objects.get(id=reward_id, is_active=True)
-    except Reward.DoesNotExist:
+    reward = _get_active_reward(serializer.validated_data['reward_id'])
+    if reward is None:
         return Response(
             {'error': 'Reward not found or not available'},
             status=status.HTTP_404_NOT_FOUND
         )
     
     # Check if reward is available
-    if not reward.is_available:
+    error = _out_of_stock(reward)
+    if error is not None:
+        return error
+    
+    # Check if user has enough points
+    error = _insufficient_points(request.user, reward)
+    if error is not None:
+        return error
+    
+    try:
+        reservation = reserve(reward, request.user)
+    except OutOfStock:
         return Response(
             {'error': 'This reward is currently out of stock'},
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    # Check if user has enough points
-    user = request.user
-    if user.carbon_points < reward.points_required:
+    return _complete_redemption(request.user, reservation, serializer.validated_data)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@transaction.atomic
+def reserve_reward(request):
+    """
+    POST /api/rewards/reserve/
+    Hold one unit of a reward for REWARD_HOLD_SECONDS while the user checks out
+    Body: {"reward_id": 3}
+    """
+    serializer = ReserveRewardSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    reward = _get_active_reward(serializer.validated_data['reward_id'])
+    if reward is None:
         return Response(
-            {
-                'error': 'Insufficient points',
-                'required': reward.points_required,
-                'available': user.carbon_points,
-                'needed': reward.points_required - user.carbon_points
-            },
+            {'error': 'Reward not found or not available'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    error = _out_of_stock(reward) or _insufficient_points(request.user, reward)
+    if error is not None:
+        return error
+    
+    try:
+        reservation = reserve(reward, request.user)
+    except OutOfStock:
+        return Response(
+            {'error': 'This reward is currently out of stock'},
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    # Deduct points from user
-    user.carbon_points -= reward.points_required
-    user.save(update_fields=['carbon_points'])
+    return Response(ReservationSerializer(reservation).data, status=status.HTTP_201_CREATED)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@transaction.atomic
+def confirm_reservation(request, reservation_id):
+    """
+    POST /api/rewards/reservations/<id>/confirm/
+    Redeem a held unit; takes the delivery fields of /redeem/
+    """
+    serializer = DeliverySerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
-    # Decrease stock if limited
-    if reward.stock > 0:
-        reward.stock -= 1
-        reward.save(update_fields=['stock'])
+    try:
+        reservation = Reservation.objects.select_related('reward').get(id=reservation_id, user=request.user)
+    except Reservation.DoesNotExist:
+        return Response(
+            {'error': 'Reservation not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
     
-    # Create redemption
-    redemption = Redemption.objects.create(
-        user=user,
-        reward=reward,
-        points_spent=reward.points_required,
-        delivery_address=serializer.validated_data.get('delivery_address', ''),
-        delivery_phone=serializer.validated_data.get('delivery_phone', ''),
-        notes=serializer.validated_data.get('notes', '')
-    )
+    if not reservation.is_active:
+        return Response(
+            {'error': 'This reservation has expired or was already used'},
+            status=status.HTTP_410_GONE
+        )
     
-    # Create notification
-    from apps.gamification.models import Notification
-    Notification.objects.create(
-        user=user,
-        notification_type='reward',
-        title='Reward Redeemed!',
-        message=f'You successfully redeemed {reward.title}. Redemption code: {redemption.redemption_code}',
-        related_id=redemption.id
-    )
+    error = _insufficient_points(request.user, reservation.reward)
+    if error is not None:
+        return error
     
-    return Response({
-        'message': 'Reward redeemed successfully!',
-        'redemption': RedemptionSerializer(redemption).data
-    }, status=status.HTTP_201_CREATED)
+    try:
+        return _complete_redemption(request.user, reservation, serializer.validated_data)
+    except ReservationExpired:
+        # Swept between the check and the claim; undo the charge
+        transaction.set_rollback(True)
+        return Response(
+            {'error': 'This reservation has expired or was already used'},
+            status=status.HTTP_410_GONE
+        )
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@transaction.atomic
+def release_reservation(request, reservation_id):
+    """
+    POST /api/rewards/reservations/<id>/release/
+    Give a held unit back to stock
+    """
+    try:
+        reservation = Reservation.objects.get(id=reservation_id, user=request.user)
+    except Reservation.DoesNotExist:
+        return Response(
+            {'error': 'Reservation not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    if not release(reservation):
+        return Response(
+            {'error': f'Cannot release reservation with status: {reservation.status}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    return Response({'message': 'Reservation released.'})
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@transaction.atomic
 def cancel_redemption(request, redemption_id):
     """
     POST /api/rewards/redemptions/<id>/cancel/
@@ -182,13 +335,13 @@ def cancel_redemption(request, redemption_id):
     user.save(update_fields=['carbon_points'])
     
     # Restore stock if applicable
-    if redemption.reward.stock >= 0:
-        redemption.reward.stock += 1
-        redemption.reward.save(update_fields=['stock'])
+    restore_redeemed_unit(redemption)
     
     # Update redemption status
+    previous_status = redemption.status
     redemption.status = 'cancelled'
     redemption.save(update_fields=['status', 'updated_at'])
+    record_status_change({user.id: 1}, previous_status, 'cancelled')
     
     return Response({
         'message': 'Redemption cancelled successfully. Points have been refunded.',
@@ -223,39 +376,23 @@ def reward_categories(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@read_from_replica
 def redemption_stats(request):
     """
     GET /api/rewards/stats/
     Get user's redemption statistics
     """
     user = request.user
+    stats = get_redemption_stats(user)
     
-    total_redemptions = Redemption.objects.filter(user=user).count()
-    total_points_spent = sum(
-        r.points_spent for r in Redemption.objects.filter(user=user)
-    )
-    
-    pending_redemptions = Redemption.objects.filter(
-        user=user,
-        status='pending'
-    ).count()
-    
-    completed_redemptions = Redemption.objects.filter(
-        user=user,
-        status='completed'
-    ).count()
-    
-    # Affordable rewards count
-    affordable_rewards = Reward.objects.filter(
-        is_active=True,
-        points_required__lte=user.carbon_points
-    ).count()
+    # Affordable rewards in the shared catalog
+    affordable = user_overlay(user, catalog_entries())['affordable_ids']
     
     return Response({
-        'total_redemptions': total_redemptions,
-        'total_points_spent': total_points_spent,
-        'pending_redemptions': pending_redemptions,
-        'completed_redemptions': completed_redemptions,
+        'total_redemptions': stats.total_redemptions,
+        'total_points_spent': stats.total_points_spent,
+        'pending_redemptions': stats.pending_redemptions,
+        'completed_redemptions': stats.completed_redemptions,
         'available_points': user.carbon_points,
-        'affordable_rewards_count': affordable_rewards
-    })
\ No newline at end of file
+        'affordable_rewards_count': len(affordable)
+    })
@@ -0,0 +1,182 @@
+"""
+Per-user activity day bitmaps
+
+Each ActivityCalendar row holds one bit per local day of a year (46
+bytes). The tracking signals set a day's bit when an activity is logged
+and clear it when the last activity of that day is deleted; archiving
+moves rows without touching the bits. Streaks, active-day counts and the
+heatmap are then answered from a user's few rows with integer bit
+operations instead of scanning activities or daily summaries.
+
+rebuild_calendars() recomputes the rows from the activity history for
+data that predates the table or went out of step.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core.dates import day_filter
+
+from .models import Activity, ActivityCalendar
+
+CALENDAR_BYTES = 46  # 366 bits
+
+
+def day_index(day):
+    """Bit position of `day` within its year"""
+    return day.timetuple().tm_yday - 1
+
+
+def days_in_year(year):
+    return (date(year + 1, 1, 1) - date(year, 1, 1)).days
+
+
+def _to_int(days):
+    return int.from_bytes(days, 'little')
+
+
+def _to_bytes(bits):
+    return bits.to_bytes(CALENDAR_BYTES, 'little')
+
+
+def _set_bit(user_id, day, active):
+    """Set or clear one day's bit, returns whether the row changed"""
+    bit = 1 << day_index(day)
+    with transaction.atomic():
+        calendar = ActivityCalendar.objects.select_for_update().filter(
+            user_id=user_id, year=day.year
+        ).first()
+        if calendar is None:
+            if not active:
+                return False
+            calendar, _ = ActivityCalendar.objects.get_or_create(user_id=user_id, year=day.year)
+        bits = _to_int(calendar.days)
+        updated = bits | bit if active else bits & ~bit
+        if updated == bits:
+            return False
+        calendar.days = _to_bytes(updated)
+        calendar.save(update_fields=['days'])
+    return True
+
+
+def mark_active(user_id, day):
+    """Record activity on `day`; a no-op write is skipped"""
+    return _set_bit(user_id, day, True)
+
+
+def mark_inactive(user_id, day):
+    """Clear `day` unless the user still has live or archived activity on it"""
+    if any(queryset.exists() for queryset in Activity.history.querysets(user_id=user_id, **day_filter(day))):
+        return False
+    return _set_bit(user_id, day, False)
+
+
+def rebuild_calendars(user_ids):
+    """Recompute the calendars of the given users from their history, returns the row count"""
+    user_ids = list(user_ids)
+    bits = defaultdict(int)
+    for queryset in Activity.history.querysets(user_id__in=user_ids):
+        for user_id, timestamp in queryset.order_by().values_list('user_id', 'timestamp').iterator():
+            day = timezone.localtime(timestamp).date()
+            bits[user_id, day.year] |= 1 << day_index(day)
+
+    with transaction.atomic():
+        ActivityCalendar.objects.filter(user_id__in=user_ids).delete()
+        ActivityCalendar.objects.bulk_create(
+            ActivityCalendar(user_id=user_id, year=year, days=_to_bytes(value))
+            for (user_id, year), value in bits.items()
+        )
+    return len(bits)
+
+
+def year_bits(user_id, year):
+    """The year's bitmap as an int (0 when the user has no row)"""
+    days = ActivityCalendar.objects.filter(user_id=user_id, year=year).values_list('days', flat=True).first()
+    return _to_int(days) if days is not None else 0
+
+
+def timeline(user_id):
+    """(first day, bits) with every calendar of the user joined into one int.
+
+    Bit n stands for first day + n days, so runs carry across new year.
+    """
+    rows = list(
+        ActivityCalendar.objects.filter(user_id=user_id).order_by('year').values_list('year', 'days')
+    )
+    if not rows:
+        return None, 0
+    first = date(rows[0][0], 1, 1)
+    bits = 0
+    for year, days in rows:
+        bits |= _to_int(days) << (date(year, 1, 1) - first).days
+    return first, bits
+
+
+def longest_run(bits):
+    """Longest run of consecutive set bits"""
+    run = 0
+    while bits:
+        bits &= bits >> 1
+        run += 1
+    return run
+
+
+def last_run(bits):
+    """Length of the run ending at the highest set bit"""
+    if not bits:
+        return 0
+    top = bits.bit_length()
+    gaps = ~bits & ((1 << top) - 1)
+    return top - gaps.bit_length()
+
+
+def _last_day(first, bits):
+    return first + timedelta(days=bits.bit_length() - 1) if bits else None
+
+
+def streaks(user_id):
+    """(current, longest, last active day) from the user's calendars.
+
+    current is the run ending on the last active day, as in
+    User.update_streak and apps.users.stats.streaks.
+    """
+    first, bits = timeline(user_id)
+    return last_run(bits), longest_run(bits), _last_day(first, bits)
+
+
+def count_active_days(bits, start=0, end=None):
+    """Set bits in positions start..end (inclusive)"""
+    if end is not None:
+        bits &= (1 << (end + 1)) - 1
+    return (bits >> start).bit_count()
+
+
+def active_days(user_id, start_date, end_date):
+    """Number of active days between two dates of the same year, inclusive"""
+    return count_active_days(year_bits(user_id, start_date.year), day_index(start_date), day_index(end_date))
+
+
+def heatmap(bits, year):
+    """'0'/'1' per day of `year`, January 1st first"""
+    length = days_in_year(year)
+    return format(bits & ((1 << length) - 1), f'0{length}b')[::-1]
+
+
+def build_activity_days(user_id, year):
+    """Payload of the activity-days endpoint: the year's heatmap and counts
+    plus the all-time streaks, from a single read of the calendars"""
+    first, bits = timeline(user_id)
+    if first is not None and first.year <= year:
+        year_value = bits >> (date(year, 1, 1) - first).days
+    else:
+        year_value = 0
+    return {
+        'year': year,
+        'active_days': count_active_days(year_value, 0, days_in_year(year) - 1),
+        'current_streak': last_run(bits),
+        'longest_streak': longest_run(bits),
+        'last_active_date': _last_day(first, bits),
+        'heatmap': heatmap(year_value, year),
+    }
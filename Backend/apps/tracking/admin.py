@@ -2,7 +2,22 @@
 Admin configuration for Tracking app
 """
 from django.contrib import admin
-from .models import Activity, DailySummary, ActivityGoal
+from django.utils import timezone
+
+from .exports import EXPORT_FIELDS, USER_FIELDS, queryset_rows, streaming_export
+from .activity_days import count_active_days
+from .models import Activity, ActivityCalendar, ArchivedActivity, DailySummary, ActivityGoal
+
+
+@admin.action(description='Export selected activities (CSV)')
+def export_csv(modeladmin, request, queryset):
+    """Stream the selection for analytics; "Select all" exports every
+    user's rows matching the changelist filters"""
+    fields = USER_FIELDS + EXPORT_FIELDS
+    return streaming_export(
+        'csv', fields, queryset_rows(queryset, fields),
+        f'{queryset.model._meta.model_name}-{timezone.localdate().isoformat()}'
+    )
 
 
 @admin.register(Activity)
@@ -14,8 +29,12 @@ class ActivityAdmin(admin.ModelAdmin):
     list_filter = ('activity_type', 'timestamp', 'transport_mode', 'meal_type')
     search_fields = ('user__username', 'description', 'notes')
     readonly_fields = ('co2_impact', 'points_earned', 'timestamp')
-    date_hierarchy = 'timestamp'
+    # No date_hierarchy: its month list is a DISTINCT over the whole table
     ordering = ('-timestamp',)
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
+    show_full_result_count = False
+    actions = [export_csv]
     
     fieldsets = (
         ('Basic Information', {
@@ -51,9 +70,11 @@ class DailySummaryAdmin(admin.ModelAdmin):
     )
     list_filter = ('date',)
     search_fields = ('user__username',)
-    date_hierarchy = 'date'
     ordering = ('-date',)
     readonly_fields = ('created_at', 'updated_at')
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
+    show_full_result_count = False
     
     fieldsets = (
         ('Basic Information', {
@@ -86,7 +107,53 @@ class ActivityGoalAdmin(admin.ModelAdmin):
     list_filter = ('goal_type', 'is_active', 'start_date')
     search_fields = ('user__username',)
     readonly_fields = ('created_at', 'updated_at', 'progress_percentage')
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
     
     def progress_percentage(self, obj):
         return f"{obj.progress_percentage:.1f}%"
-    progress_percentage.short_description = 'Progress'
\ No newline at end of file
+    progress_percentage.short_description = 'Progress'
+
+
+@admin.register(ArchivedActivity)
+class ArchivedActivityAdmin(admin.ModelAdmin):
+    list_display = (
+        'user', 'activity_type', 'description',
+        'co2_impact', 'points_earned', 'timestamp', 'archived_at'
+    )
+    list_filter = ('activity_type', 'timestamp')
+    search_fields = ('user__username', 'description')
+    raw_id_fields = ('user',)
+    list_select_related = ('user',)
+    show_full_result_count = False
+    ordering = ('-timestamp',)
+    actions = [export_csv]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ActivityCalendar)
+class ActivityCalendarAdmin(admin.ModelAdmin):
+    """Read-only; rows are kept by the tracking signals and rebuilt with
+    the rebuild_activity_calendars command"""
+    list_display = ('user', 'year', 'active_days')
+    list_filter = ('year',)
+    search_fields = ('user__username',)
+    raw_id_fields = ('user',)
+    list_select_related = ('user',)
+    show_full_result_count = False
+    exclude = ('days',)
+    readonly_fields = ('user', 'year', 'active_days')
+
+    def active_days(self, obj):
+        return count_active_days(int.from_bytes(obj.days, 'little'))
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -5,3 +5,6 @@ class TrackingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.tracking'
     label = 'apps_Tracking'
+
+    def ready(self):
+        from . import signals  # noqa: F401
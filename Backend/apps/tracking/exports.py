@@ -0,0 +1,131 @@
+"""
+Streaming CSV / NDJSON exports of activity history
+
+Rows are read with values().iterator() and written one at a time
+into a StreamingHttpResponse, so memory stays flat however long the
+history is. Live and archived activities are exported together.
+"""
+import csv
+import json
+from datetime import date
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import renderers
+
+from apps.core.dates import date_range, date_range_filter
+
+from .models import Activity
+
+EXPORT_FIELDS = [
+    'id', 'timestamp', 'activity_type', 'description',
+    'transport_mode', 'distance_km', 'meal_type', 'servings',
+    'energy_type', 'energy_saved_kwh', 'hours', 'waste_type', 'weight_kg',
+    'co2_impact', 'points_earned', 'location', 'notes',
+]
+# Extra leading columns for the all-users admin export
+USER_FIELDS = ['user_id', 'user__username']
+
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class CSVRenderer(renderers.BaseRenderer):
+    """Accepts ?format=csv; exports stream their own body, this only renders errors"""
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data.items() if isinstance(data, dict) else [('detail', data)]
+        return ''.join(f'{key},{value}\n' for key, value in rows).encode(self.charset)
+
+
+class NDJSONRenderer(renderers.BaseRenderer):
+    """Accepts ?format=ndjson; exports stream their own body, this only renders errors"""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return (json.dumps(data, default=str) + '\n').encode(self.charset)
+
+
+class ExportFilterError(ValueError):
+    pass
+
+
+def parse_export_filters(params):
+    """Lookup kwargs from ?start=&end= (YYYY-MM-DD) and ?activity_type=a,b"""
+    filters = {}
+    try:
+        start = date.fromisoformat(params['start']) if params.get('start') else None
+        end = date.fromisoformat(params['end']) if params.get('end') else None
+    except ValueError:
+        raise ExportFilterError('start and end must be dates in YYYY-MM-DD format.')
+    if start and end and start > end:
+        raise ExportFilterError('start must not be after end.')
+    if start:
+        filters.update(date_range_filter(start, end))
+    elif end:
+        filters['timestamp__lt'] = date_range(end, end)[1]
+
+    types = [value for value in params.get('activity_type', '').split(',') if value]
+    if types:
+        valid = {choice for choice, _ in Activity.ACTIVITY_TYPES}
+        unknown = sorted(set(types) - valid)
+        if unknown:
+            raise ExportFilterError(f'Unknown activity_type: {", ".join(unknown)}.')
+        filters['activity_type__in'] = types
+    return filters
+
+
+def history_rows(fields, **filters):
+    """Live and archived rows, oldest first, fetched in chunks"""
+    return queryset_rows(Activity.history.values(*fields, **filters), fields)
+
+
+def queryset_rows(queryset, fields):
+    """Rows of any activity queryset, oldest first, fetched in chunks"""
+    queryset = queryset.values(*fields).order_by('timestamp')
+    return queryset.iterator(chunk_size=settings.ACTIVITY_EXPORT_CHUNK_SIZE)
+
+
+def _value(value):
+    if hasattr(value, 'tzinfo') and value.tzinfo is not None:
+        return timezone.localtime(value).isoformat()
+    return value
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to csv.writer's caller"""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(fields, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([_value(row[field]) for field in fields])
+
+
+def ndjson_lines(fields, rows):
+    for row in rows:
+        yield json.dumps({field: _value(row[field]) for field in fields}, default=str) + '\n'
+
+
+def streaming_export(fmt, fields, rows, filename):
+    """StreamingHttpResponse writing `rows` as csv or ndjson"""
+    lines = csv_lines(fields, rows) if fmt == 'csv' else ndjson_lines(fields, rows)
+    response = StreamingHttpResponse(lines, content_type=CONTENT_TYPES[fmt])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{fmt}"'
+    return response
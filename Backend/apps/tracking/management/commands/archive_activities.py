@@ -0,0 +1,87 @@
+"""
+Move activities older than N months into the archive table
+
+    python manage.py archive_activities --months 12 --chunk-size 2000
+
+Rows move in chunks, each in its own transaction, so the live table and
+its indexes stay small without long write locks. Every affected day gets
+a DailySummary before its rows leave the live table.
+
+Live rows are deleted without per-row delete signals: archived activities
+are still history, so their days stay marked in the activity calendar and
+team challenge contributions are left as they are. Only the data version
+of the affected users is bumped, once per chunk.
+"""
+from datetime import datetime, time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core.versioning import touch_users
+from apps.tracking.models import Activity, ActivityFields, ArchivedActivity, DailySummary
+
+# Columns copied verbatim from the live row
+COPIED_FIELDS = ['id', 'user_id', 'timestamp'] + [
+    field.attname for field in ActivityFields._meta.get_fields() if field.concrete
+]
+
+
+def archive_cutoff(months):
+    """Start of the local month `months` months before the current one"""
+    today = timezone.localdate()
+    month_index = today.year * 12 + today.month - 1 - months
+    first = today.replace(year=month_index // 12, month=month_index % 12 + 1, day=1)
+    return timezone.make_aware(datetime.combine(first, time.min))
+
+
+class Command(BaseCommand):
+    help = 'Archive activities older than the given number of months'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=settings.ACTIVITY_ARCHIVE_MONTHS)
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only report how many rows would move')
+
+    def handle(self, *args, **options):
+        cutoff = archive_cutoff(options['months'])
+        pending = Activity.objects.filter(timestamp__lt=cutoff)
+
+        if options['dry_run']:
+            self.stdout.write(f'{pending.count()} activities before {cutoff:%Y-%m-%d} would be archived')
+            return
+
+        moved = 0
+        while True:
+            with transaction.atomic():
+                chunk = list(
+                    pending.order_by('id').values(*COPIED_FIELDS)[:options['chunk_size']]
+                )
+                if not chunk:
+                    break
+                self._ensure_summaries(chunk)
+                ArchivedActivity.objects.bulk_create(ArchivedActivity(**row) for row in chunk)
+                Activity.objects.filter(id__in=[row['id'] for row in chunk])._raw_delete(Activity.objects.db)
+                touch_users(*{row['user_id'] for row in chunk})
+            moved += len(chunk)
+            self.stdout.write(f'Archived {moved} activities')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Done: {moved} activities before {cutoff:%Y-%m-%d} archived'
+        ))
+
+    def _ensure_summaries(self, rows):
+        days = {(row['user_id'], timezone.localtime(row['timestamp']).date()) for row in rows}
+        existing = set(
+            DailySummary.objects.filter(
+                user_id__in={user_id for user_id, _ in days},
+                date__in={day for _, day in days},
+            ).values_list('user_id', 'date')
+        )
+        missing = days - existing
+        users = get_user_model().objects.in_bulk({user_id for user_id, _ in missing})
+        for user_id, day in missing:
+            DailySummary.update_for_date(users[user_id], day)
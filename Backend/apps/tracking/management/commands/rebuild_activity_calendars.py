@@ -0,0 +1,37 @@
+"""
+Rebuild the activity day bitmaps from the activity history
+
+Run once after deploying the calendars, or to repair them:
+
+    python manage.py rebuild_activity_calendars --chunk-size 500
+    python manage.py rebuild_activity_calendars --user 42 --user 43
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from apps.core.versioning import touch_users
+from apps.tracking.activity_days import rebuild_calendars
+
+
+class Command(BaseCommand):
+    help = 'Recompute ActivityCalendar rows from live and archived activities'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='user_ids',
+                            help='Only rebuild this user (repeatable)')
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        user_ids = options['user_ids'] or list(
+            get_user_model().objects.order_by('id').values_list('id', flat=True)
+        )
+        chunk_size = options['chunk_size']
+        rows = 0
+        for offset in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[offset:offset + chunk_size]
+            rows += rebuild_calendars(chunk)
+            touch_users(*chunk)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {rows} calendars for {len(user_ids)} users'
+        ))
@@ -7,8 +7,10 @@ from django.utils import timezone
 from django.conf import settings
 from django.db import models
 
-class Activity(models.Model):
-    """Model for tracking individual carbon activities"""
+from apps.core.dates import day_filter
+
+class ActivityFields(models.Model):
+    """Columns shared by live and archived activities"""
     
     ACTIVITY_TYPES = [
         ('transport', 'Transportation'),
@@ -58,12 +60,6 @@ class Activity(models.Model):
         ('avoided_plastic', 'Avoided Single-Use Plastic'),
     ]
     
-    user = models.ForeignKey(
-    settings.AUTH_USER_MODEL,
-    on_delete=models.CASCADE,
-    related_name='activities'
-)
-
     activity_type = models.CharField(max_length=20, choices=ACTIVITY_TYPES)
     
     # Transport specific fields
@@ -109,16 +105,80 @@ class Activity(models.Model):
     points_earned = models.IntegerField(default=0)
     
     # Metadata
-    timestamp = models.DateTimeField(auto_now_add=True)
     location = models.CharField(max_length=100, blank=True)
     notes = models.TextField(blank=True)
     
+    class Meta:
+        abstract = True
+
+
+class ActivityHistoryManager(models.Manager):
+    """Live and archived activities queried as one history.
+
+    Django cannot filter a UNION after it is built, so filters are passed
+    up front and applied to both tables.
+    """
+
+    def querysets(self, *args, **filters):
+        return (
+            Activity.objects.filter(*args, **filters),
+            ArchivedActivity.objects.filter(*args, **filters),
+        )
+
+    def values(self, *fields, **filters):
+        """UNION ALL of both tables as dicts, newest first (fields must include timestamp)"""
+        live, archived = self.querysets(**filters)
+        return live.order_by().values(*fields).union(
+            archived.order_by().values(*fields), all=True
+        ).order_by('-timestamp')
+
+    def aggregate_by(self, group_by, aggregates, *args, **filters):
+        """Grouped Sum/Count aggregates over both tables.
+
+        Returns {group values tuple: {name: value}}. Only additive
+        aggregates can be combined across the two tables.
+        """
+        totals = {}
+        for queryset in self.querysets(*args, **filters):
+            rows = queryset.order_by().values(*group_by).annotate(**aggregates)
+            for row in rows:
+                key = tuple(row[field] for field in group_by)
+                merged = totals.setdefault(key, dict.fromkeys(aggregates, 0))
+                for name in aggregates:
+                    merged[name] += row[name] or 0
+        return totals
+
+
+class Activity(ActivityFields):
+    """Model for tracking individual carbon activities"""
+    
+    user = models.ForeignKey(
+    settings.AUTH_USER_MODEL,
+    on_delete=models.CASCADE,
+    related_name='activities'
+)
+    timestamp = models.DateTimeField(auto_now_add=True)
+
+    objects = models.Manager()
+    history = ActivityHistoryManager()
+    
     class Meta:
         ordering = ['-timestamp']
         verbose_name_plural = 'Activities'
         indexes = [
-            models.Index(fields=['user', '-timestamp']),
             models.Index(fields=['activity_type', '-timestamp']),
+            # Covers the per-user summary reads (date window -> type, CO2, points)
+            # so they never touch the table rows; it also serves the per-user
+            # timeline, read backwards for -timestamp
+            models.Index(
+                fields=['user', 'timestamp', 'activity_type', 'co2_impact', 'points_earned'],
+                name='activity_user_summary_idx'
+            ),
+            # Challenge progress and CO2-saved totals only read positive impacts
+            models.Index(
+                fields=['user', 'timestamp'], condition=models.Q(co2_impact__gt=0),
+                name='activity_user_saved_idx'
+            ),
         ]
     
     def __str__(self):
@@ -144,6 +204,31 @@ class Activity(models.Model):
             self.user.update_streak(self.timestamp.date())
             self.user.increment_activities()
 
+class ArchivedActivity(ActivityFields):
+    """Activity moved out of the live table by archive_activities.
+
+    Rows keep their original id and timestamp; DailySummary stays the
+    permanent per-day record for archived periods.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='archived_activities'
+    )
+    timestamp = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-timestamp']
+        verbose_name_plural = 'Archived activities'
+        indexes = [
+            models.Index(fields=['user', '-timestamp']),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.description} ({self.timestamp.date()})"
+
 class DailySummary(models.Model):
     """Daily aggregated summary of user activities"""
     
@@ -189,10 +274,22 @@ class DailySummary(models.Model):
     
     @classmethod
     def update_for_date(cls, user, date):
-        """Update or create daily summary for a specific date"""
-        activities = Activity.objects.filter(
+        """Update or create daily summary for a specific date.
+
+        Totals include archived activities, so rebuilding an archived day
+        keeps its numbers.
+        """
+        by_type = Activity.history.aggregate_by(
+            ('activity_type',),
+            {
+                'count': models.Count('id'),
+                'points': models.Sum('points_earned'),
+                'co2': models.Sum('co2_impact'),
+                'saved': models.Sum('co2_impact', filter=models.Q(co2_impact__gt=0)),
+                'emitted': models.Sum('co2_impact', filter=models.Q(co2_impact__lt=0)),
+            },
             user=user,
-            timestamp__date=date
+            **day_filter(date),
         )
         
         summary, created = cls.objects.get_or_create(
@@ -201,24 +298,43 @@ class DailySummary(models.Model):
         )
         
         # Calculate totals
-        summary.activities_count = activities.count()
-        summary.total_points = sum(a.points_earned for a in activities)
-        
-        co2_values = [a.co2_impact for a in activities]
-        summary.total_co2_saved = sum(v for v in co2_values if v > 0)
-        summary.total_co2_emitted = abs(sum(v for v in co2_values if v < 0))
-        summary.net_co2_impact = sum(co2_values)
+        totals = list(by_type.values())
+        summary.activities_count = sum(row['count'] for row in totals)
+        summary.total_points = sum(row['points'] for row in totals)
+        summary.total_co2_saved = sum(row['saved'] for row in totals)
+        summary.total_co2_emitted = abs(sum(row['emitted'] for row in totals))
+        summary.net_co2_impact = sum(row['co2'] for row in totals)
         
         # Breakdown by type
         for activity_type in ['transport', 'food', 'energy', 'waste']:
-            type_activities = activities.filter(activity_type=activity_type)
-            co2_sum = sum(a.co2_impact for a in type_activities)
-            setattr(summary, f'{activity_type}_co2', co2_sum)
-            setattr(summary, f'{activity_type}_count', type_activities.count())
+            row = by_type.get((activity_type,), {'co2': 0, 'count': 0})
+            setattr(summary, f'{activity_type}_co2', row['co2'])
+            setattr(summary, f'{activity_type}_count', row['count'])
         
         summary.save()
         return summary
 
+class ActivityCalendar(models.Model):
+    """One bit per local day of a year, set when the user logged anything.
+
+    Maintained by apps.tracking.activity_days; bit 0 is January 1st.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='activity_calendars'
+    )
+    year = models.PositiveSmallIntegerField()
+    days = models.BinaryField(default=bytes(46))
+
+    class Meta:
+        unique_together = ['user', 'year']
+        ordering = ['user', 'year']
+
+    def __str__(self):
+        return f"{self.user_id} - {self.year}"
+
 class ActivityGoal(models.Model):
     """User-defined goals for carbon reduction"""
     
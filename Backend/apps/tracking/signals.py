@@ -0,0 +1,32 @@
+"""
+Keep the activity day bitmaps in step with the activity rows, and the
+calendar cache with the daily summaries
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.core.versioning import touch_user_scopes
+
+from .activity_days import mark_active, mark_inactive
+from .models import Activity, DailySummary
+from .summaries import calendar_scope
+
+
+@receiver(post_save, sender=Activity)
+def activity_logged(sender, instance, created, **kwargs):
+    if created:
+        mark_active(instance.user_id, timezone.localtime(instance.timestamp).date())
+
+
+@receiver(post_delete, sender=Activity)
+def activity_deleted(sender, instance, **kwargs):
+    # Archived rows are copied before the live ones are deleted, so their
+    # days stay marked
+    mark_inactive(instance.user_id, timezone.localtime(instance.timestamp).date())
+
+
+@receiver(post_save, sender=DailySummary)
+@receiver(post_delete, sender=DailySummary)
+def daily_summary_changed(sender, instance, **kwargs):
+    touch_user_scopes(instance.user_id, calendar_scope(instance.date.year))
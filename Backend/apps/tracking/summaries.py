@@ -0,0 +1,242 @@
+"""
+Summary builders shared by the tracking endpoints and the dashboard
+"""
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from apps.core.dates import date_range_filter
+from apps.core.versioning import get_user_scope_version
+
+from .models import Activity, DailySummary
+from . import carbon_calculator
+
+ACTIVITY_TYPES = ['transport', 'food', 'energy', 'waste']
+
+CALENDAR_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def current_week_bounds():
+    """Return (week_start, week_end) for the current Monday-Sunday week"""
+    today = timezone.localdate()
+    week_start = today - timedelta(days=today.weekday())
+    return week_start, week_start + timedelta(days=6)
+
+
+def activity_rows(user, start_date, end_date=None):
+    """Fetch the (date, activity_type, co2_impact, points_earned) rows for a
+    date window in a single query. Dates are local dates; the window is
+    filtered as a timestamp range so the (user, timestamp) index is used."""
+    activities = Activity.objects.filter(user=user, **date_range_filter(start_date, end_date))
+
+    return [
+        (timezone.localtime(timestamp).date(), activity_type, co2_impact, points_earned)
+        for timestamp, activity_type, co2_impact, points_earned in activities.values_list(
+            'timestamp', 'activity_type', 'co2_impact', 'points_earned'
+        )
+    ]
+
+
+def build_weekly_summary(user, rows=None):
+    """Totals, daily and category breakdowns for the current week.
+
+    rows may be any superset of the week's activity_rows(), which lets
+    callers share one query between several summaries.
+    """
+    week_start, week_end = current_week_bounds()
+    if rows is None:
+        rows = activity_rows(user, week_start, week_end)
+    rows = [row for row in rows if week_start <= row[0] <= week_end]
+
+    daily = {week_start + timedelta(days=i): [0.0, 0] for i in range(7)}
+    categories = {activity_type: [0.0, 0] for activity_type in ACTIVITY_TYPES}
+    total_co2_saved = 0
+    total_points = 0
+
+    for day, activity_type, co2_impact, points_earned in rows:
+        saved = co2_impact if co2_impact > 0 else 0
+        total_co2_saved += saved
+        total_points += points_earned
+        daily[day][0] += saved
+        daily[day][1] += 1
+        if activity_type in categories:
+            categories[activity_type][0] += saved
+            categories[activity_type][1] += 1
+
+    return {
+        'week_start': week_start,
+        'week_end': week_end,
+        'total_co2_saved': round(total_co2_saved, 2),
+        'total_points': total_points,
+        'total_activities': len(rows),
+        'daily_breakdown': [
+            {'date': day, 'co2_saved': round(co2, 2), 'activities_count': count}
+            for day, (co2, count) in daily.items()
+        ],
+        'category_breakdown': {
+            activity_type: {'co2_saved': round(co2, 2), 'count': count}
+            for activity_type, (co2, count) in categories.items()
+        },
+    }
+
+
+def month_bounds(year, month):
+    """Return (first_day, last_day) of a calendar month"""
+    first_day = date(year, month, 1)
+    next_month = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return first_day, next_month - timedelta(days=1)
+
+
+def build_monthly_summary(user, year, month):
+    """Totals, daily, category and best-day figures for one month from a
+    single range query"""
+    first_day, last_day = month_bounds(year, month)
+    rows = activity_rows(user, first_day, last_day)
+
+    days = (last_day - first_day).days + 1
+    daily = {first_day + timedelta(days=i): [0.0, 0] for i in range(days)}
+    categories = {activity_type: [0.0, 0] for activity_type in ACTIVITY_TYPES}
+    total_co2_saved = 0
+    total_points = 0
+
+    for day, activity_type, co2_impact, points_earned in rows:
+        saved = co2_impact if co2_impact > 0 else 0
+        total_co2_saved += saved
+        total_points += points_earned
+        daily[day][0] += saved
+        daily[day][1] += 1
+        if activity_type in categories:
+            categories[activity_type][0] += saved
+            categories[activity_type][1] += 1
+
+    daily_breakdown = [
+        {'date': day, 'co2_saved': round(co2, 2), 'activities_count': count}
+        for day, (co2, count) in daily.items()
+    ]
+    best_day = {'date': None, 'co2_saved': 0}
+    for entry in daily_breakdown:
+        if entry['co2_saved'] > best_day['co2_saved']:
+            best_day = entry
+
+    return {
+        'month': month,
+        'year': year,
+        'total_co2_saved': round(total_co2_saved, 2),
+        'total_points': total_points,
+        'total_activities': len(rows),
+        'daily_breakdown': daily_breakdown,
+        'category_breakdown': {
+            activity_type: {'co2_saved': round(co2, 2), 'count': count}
+            for activity_type, (co2, count) in categories.items()
+        },
+        'best_day': best_day,
+        'streak_info': {
+            'current_streak': user.current_streak,
+            'longest_streak': user.longest_streak,
+        },
+    }
+
+def build_recent_stats(user, rows=None, days=7):
+    """Activity count and CO2 saved over the last `days` days"""
+    since = timezone.localdate() - timedelta(days=days)
+    if rows is None:
+        rows = activity_rows(user, since)
+    rows = [row for row in rows if row[0] >= since]
+
+    return {
+        'activities_count': len(rows),
+        'co2_saved': round(sum(row[2] for row in rows if row[2] > 0), 2),
+    }
+
+
+def build_activity_stats(user):
+    """All-time stats, per-category totals and favourite activities"""
+    stats = {
+        'all_time': {
+            'total_co2_saved': round(user.total_co2_saved, 2),
+            'total_points': user.carbon_points,
+            'total_activities': user.total_activities,
+            'trees_equivalent': carbon_calculator.co2_to_trees(user.total_co2_saved),
+            'car_miles_saved': carbon_calculator.co2_to_car_miles(user.total_co2_saved),
+        },
+        'by_category': {
+            activity_type: {'count': 0, 'co2_saved': 0, 'points': 0}
+            for activity_type in ACTIVITY_TYPES
+        },
+        'favorite_activities': []
+    }
+
+    # Category stats in one grouped query per table, archive included
+    by_category = Activity.history.aggregate_by(
+        ('activity_type',),
+        {
+            'count': Count('id'),
+            'co2_saved': Sum('co2_impact', filter=Q(co2_impact__gt=0)),
+            'points': Sum('points_earned'),
+        },
+        user=user,
+    )
+    for (activity_type,), row in by_category.items():
+        if activity_type in stats['by_category']:
+            stats['by_category'][activity_type] = {
+                'count': row['count'],
+                'co2_saved': round(row['co2_saved'], 2),
+                'points': row['points'],
+            }
+
+    # Most common activities
+    favorite = Activity.history.aggregate_by(
+        ('activity_type', 'description'), {'count': Count('id')}, user=user
+    )
+    stats['favorite_activities'] = [
+        {'activity_type': activity_type, 'description': description, 'count': row['count']}
+        for (activity_type, description), row in sorted(
+            favorite.items(), key=lambda item: item[1]['count'], reverse=True
+        )[:5]
+    ]
+
+    return stats
+
+
+def calendar_scope(year):
+    """Version scope of one year of a user's daily summaries"""
+    return f'calendar:{year}'
+
+
+def build_year_calendar(user_id, year):
+    """A year of daily summaries as parallel arrays, from one query.
+
+    days holds offsets from January 1st of the days with activity; the
+    other arrays carry that day's values at the same position.
+    """
+    start = date(year, 1, 1)
+    rows = DailySummary.objects.filter(
+        user_id=user_id, date__gte=start, date__lt=date(year + 1, 1, 1), activities_count__gt=0
+    ).order_by('date').values_list('date', 'total_co2_saved', 'activities_count')
+
+    days, co2_saved, counts = [], [], []
+    for day, saved, count in rows:
+        days.append((day - start).days)
+        co2_saved.append(round(saved, 2))
+        counts.append(count)
+    return {
+        'year': year,
+        'start': start,
+        'days': days,
+        'co2_saved': co2_saved,
+        'activities_count': counts,
+        'max_co2_saved': max(co2_saved, default=0),
+    }
+
+
+def year_calendar(user_id, year):
+    """build_year_calendar() served from cache until that year's summaries change"""
+    token, _ = get_user_scope_version(user_id, calendar_scope(year))
+    key = f'tracking:calendar:{user_id}:{year}:{token}'
+    data = cache.get(key)
+    if data is None:
+        data = build_year_calendar(user_id, year)
+        cache.set(key, data, timeout=CALENDAR_CACHE_TIMEOUT)
+    return data
@@ -1,3 +1,110 @@
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.core import versioning
+from apps.users.models import User
+
+from .activity_days import active_days, rebuild_calendars
+from .models import Activity, ArchivedActivity, DailySummary
+
+
+class ActivitySummaryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', password='pass12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def summary(self):
+        return DailySummary.objects.get(user=self.user, date=timezone.localdate())
+
+    def test_new_activities_count_towards_their_local_day(self):
+        # 00:45 on March 10th in Kathmandu is still March 9th in UTC
+        now = datetime(2024, 3, 9, 19, 0, tzinfo=dt_timezone.utc)
+        with mock.patch('django.utils.timezone.now', return_value=now):
+            response = self.client.post('/api/tracking/activities/', {
+                'activity_type': 'transport', 'transport_mode': 'walk',
+                'distance_km': 2, 'description': 'Walk',
+            })
+        self.assertEqual(response.status_code, 201)
+        summary = DailySummary.objects.get(user=self.user)
+        self.assertEqual(summary.date, date(2024, 3, 10))
+        self.assertEqual(summary.activities_count, 1)
+
+    def test_quick_log_updates_the_daily_summary(self):
+        response = self.client.post('/api/tracking/quick-log/', {'template': 'walked_to_work'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.summary().activities_count, 1)
+
+    def test_edits_and_deletes_update_the_daily_summary(self):
+        self.client.post('/api/tracking/quick-log/', {'template': 'recycled_waste'})
+        activity = Activity.objects.get()
+        url = f'/api/tracking/activities/{activity.pk}/'
+
+        response = self.client.patch(url, {'activity_type': 'food', 'meal_type': 'vegan'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.summary().food_count, 1)
+        self.assertEqual(self.summary().waste_count, 0)
+
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(self.summary().activities_count, 0)
+
+
+class ActivityDaysTests(TestCase):
+    url = '/api/tracking/activity-days/'
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', password='pass12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_heatmap_and_streaks(self):
+        self.client.post('/api/tracking/quick-log/', {'template': 'walked_to_work'})
+        today = timezone.localdate()
+        data = self.client.get(self.url).data
+        self.assertEqual(data['active_days'], 1)
+        self.assertEqual(data['current_streak'], 1)
+        self.assertEqual(data['last_active_date'], today)
+        self.assertEqual(data['heatmap'][today.timetuple().tm_yday - 1], '1')
+
+    def test_out_of_range_years_are_rejected(self):
+        for year in ('0', '9999', 'soon'):
+            self.assertEqual(self.client.get(self.url, {'year': year}).status_code, 400)
+
+
+class ArchiveActivitiesTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', password='pass12345')
+        self.old = timezone.now() - timedelta(days=800)
+        for _ in range(20):
+            Activity.objects.create(
+                user=self.user, activity_type='transport', transport_mode='walk',
+                distance_km=2, description='Walk'
+            )
+        Activity.objects.update(timestamp=self.old)
+        rebuild_calendars([self.user.pk])
+
+    def archive(self, chunk_size=2000):
+        call_command('archive_activities', months=12, chunk_size=chunk_size, stdout=StringIO())
+
+    def test_rows_move_with_their_summaries_and_calendar_days(self):
+        version = versioning.get_user_version(self.user.pk)
+        day = timezone.localtime(self.old).date()
+        self.archive()
+
+        self.assertFalse(Activity.objects.exists())
+        self.assertEqual(ArchivedActivity.objects.count(), 20)
+        self.assertEqual(DailySummary.objects.get(user=self.user, date=day).activities_count, 20)
+        self.assertEqual(active_days(self.user.pk, day, day), 1)
+        self.assertNotEqual(versioning.get_user_version(self.user.pk), version)
 
-# Create your tests here.
+    def test_live_rows_are_deleted_without_per_row_queries(self):
+        # One chunk: select, summary lookup and rebuild, insert, delete, and
+        # the select that finds nothing left
+        with self.assertNumQueries(17):
+            self.archive()
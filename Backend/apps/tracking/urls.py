@@ -9,6 +9,7 @@ app_name = 'tracking'
 urlpatterns = [
     # Activities
     path('activities/', views.ActivityListCreateView.as_view(), name='activity-list'),
+    path('activities/export/', views.export_activities, name='activity-export'),
     path('activities/<int:pk>/', views.ActivityDetailView.as_view(), name='activity-detail'),
     
     # Daily Summaries
@@ -22,6 +23,8 @@ urlpatterns = [
     path('weekly-summary/', views.weekly_summary, name='weekly-summary'),
     path('monthly-summary/', views.monthly_summary, name='monthly-summary'),
     path('stats/', views.activity_stats, name='stats'),
+    path('activity-days/', views.activity_days, name='activity-days'),
+    path('calendar/', views.activity_calendar, name='calendar'),
     
     # Quick actions
     path('quick-log/', views.quick_log, name='quick-log'),
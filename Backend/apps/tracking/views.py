@@ -2,12 +2,12 @@
 Views for Tracking app
 """
 from rest_framework import generics, status, filters
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.db import transaction
 from django.db.models import Sum, Count, Q
 from django.utils import timezone
-from datetime import timedelta, datetime
 from django_filters.rest_framework import DjangoFilterBackend
 
 from .models import Activity, DailySummary, ActivityGoal
@@ -19,7 +19,14 @@ from .serializers import (
     WeeklySummarySerializer,
     MonthlySummarySerializer
 )
-from . import carbon_calculator
+from .exports import (
+    CSVRenderer, EXPORT_FIELDS, ExportFilterError, NDJSONRenderer,
+    history_rows, parse_export_filters, streaming_export
+)
+from .activity_days import build_activity_days
+from .summaries import build_activity_stats, build_monthly_summary, build_weekly_summary, year_calendar
+from apps.core.conditional import conditional_on_user_data
+from apps.core.replicas import ReplicaReadMixin, read_from_replica
 
 
 class ActivityListCreateView(generics.ListCreateAPIView):
@@ -42,13 +49,14 @@ class ActivityListCreateView(generics.ListCreateAPIView):
     def get_queryset(self):
         return Activity.objects.filter(user=self.request.user)
     
+    @transaction.atomic
     def perform_create(self, serializer):
         activity = serializer.save(user=self.request.user)
         
         # Update daily summary
         DailySummary.update_for_date(
             self.request.user,
-            activity.timestamp.date()
+            timezone.localtime(activity.timestamp).date()
         )
 
 
@@ -62,8 +70,19 @@ class ActivityDetailView(generics.RetrieveUpdateDestroyAPIView):
     def get_queryset(self):
         return Activity.objects.filter(user=self.request.user)
 
+    @transaction.atomic
+    def perform_update(self, serializer):
+        activity = serializer.save()
+        DailySummary.update_for_date(self.request.user, timezone.localtime(activity.timestamp).date())
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        day = timezone.localtime(instance.timestamp).date()
+        instance.delete()
+        DailySummary.update_for_date(self.request.user, day)
 
-class DailySummaryListView(generics.ListAPIView):
+
+class DailySummaryListView(ReplicaReadMixin, generics.ListAPIView):
     """
     GET /api/tracking/daily-summary/
     """
@@ -101,194 +120,108 @@ class ActivityGoalDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@renderer_classes([CSVRenderer, NDJSONRenderer])
+def export_activities(request):
+    """
+    GET /api/tracking/activities/export/?format=csv|ndjson
+    Stream the user's full activity history, archive included.
+    Optional filters: start, end (YYYY-MM-DD) and activity_type=transport,food
+    """
+    try:
+        filters = parse_export_filters(request.query_params)
+    except ExportFilterError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    rows = history_rows(EXPORT_FIELDS, user=request.user, **filters)
+    return streaming_export(
+        request.accepted_renderer.format, EXPORT_FIELDS, rows,
+        f'activities-{timezone.localdate().isoformat()}'
+    )
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@conditional_on_user_data()
+@read_from_replica
 def weekly_summary(request):
     """
     GET /api/tracking/weekly-summary/
     Get summary for the current week
     """
-    user = request.user
-    today = timezone.now().date()
-    week_start = today - timedelta(days=today.weekday())
-    week_end = week_start + timedelta(days=6)
-    
-    activities = Activity.objects.filter(
-        user=user,
-        timestamp__date__gte=week_start,
-        timestamp__date__lte=week_end
-    )
-    
-    # Calculate totals
-    total_co2_saved = sum(a.co2_impact for a in activities if a.co2_impact > 0)
-    total_points = sum(a.points_earned for a in activities)
-    total_activities = activities.count()
-    
-    # Daily breakdown
-    daily_breakdown = []
-    for i in range(7):
-        day = week_start + timedelta(days=i)
-        day_activities = activities.filter(timestamp__date=day)
-        day_co2 = sum(a.co2_impact for a in day_activities if a.co2_impact > 0)
-        daily_breakdown.append({
-            'date': day,
-            'co2_saved': round(day_co2, 2),
-            'activities_count': day_activities.count()
-        })
-    
-    # Category breakdown
-    category_breakdown = {}
-    for activity_type in ['transport', 'food', 'energy', 'waste']:
-        type_activities = activities.filter(activity_type=activity_type)
-        type_co2 = sum(a.co2_impact for a in type_activities if a.co2_impact > 0)
-        category_breakdown[activity_type] = {
-            'co2_saved': round(type_co2, 2),
-            'count': type_activities.count()
-        }
-    
-    data = {
-        'week_start': week_start,
-        'week_end': week_end,
-        'total_co2_saved': round(total_co2_saved, 2),
-        'total_points': total_points,
-        'total_activities': total_activities,
-        'daily_breakdown': daily_breakdown,
-        'category_breakdown': category_breakdown
-    }
-    
-    serializer = WeeklySummarySerializer(data)
+    serializer = WeeklySummarySerializer(build_weekly_summary(request.user))
     return Response(serializer.data)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional_on_user_data()
+@read_from_replica
 def monthly_summary(request):
     """
     GET /api/tracking/monthly-summary/?month=1&year=2026
     Get summary for a specific month
     """
-    user = request.user
-    
     # Get month and year from query params or use current
-    month = int(request.GET.get('month', timezone.now().month))
-    year = int(request.GET.get('year', timezone.now().year))
-    
-    # Get first and last day of month
-    first_day = datetime(year, month, 1).date()
-    if month == 12:
-        last_day = datetime(year + 1, 1, 1).date() - timedelta(days=1)
-    else:
-        last_day = datetime(year, month + 1, 1).date() - timedelta(days=1)
-    
-    activities = Activity.objects.filter(
-        user=user,
-        timestamp__date__gte=first_day,
-        timestamp__date__lte=last_day
-    )
-    
-    # Calculate totals
-    total_co2_saved = sum(a.co2_impact for a in activities if a.co2_impact > 0)
-    total_points = sum(a.points_earned for a in activities)
-    total_activities = activities.count()
-    
-    # Daily breakdown
-    daily_breakdown = []
-    current_day = first_day
-    best_day = {'date': None, 'co2_saved': 0}
-    
-    while current_day <= last_day:
-        day_activities = activities.filter(timestamp__date=current_day)
-        day_co2 = sum(a.co2_impact for a in day_activities if a.co2_impact > 0)
-        
-        daily_breakdown.append({
-            'date': current_day,
-            'co2_saved': round(day_co2, 2),
-            'activities_count': day_activities.count()
-        })
-        
-        if day_co2 > best_day['co2_saved']:
-            best_day = {
-                'date': current_day,
-                'co2_saved': round(day_co2, 2),
-                'activities_count': day_activities.count()
-            }
-        
-        current_day += timedelta(days=1)
-    
-    # Category breakdown
-    category_breakdown = {}
-    for activity_type in ['transport', 'food', 'energy', 'waste']:
-        type_activities = activities.filter(activity_type=activity_type)
-        type_co2 = sum(a.co2_impact for a in type_activities if a.co2_impact > 0)
-        category_breakdown[activity_type] = {
-            'co2_saved': round(type_co2, 2),
-            'count': type_activities.count()
-        }
-    
-    data = {
-        'month': month,
-        'year': year,
-        'total_co2_saved': round(total_co2_saved, 2),
-        'total_points': total_points,
-        'total_activities': total_activities,
-        'daily_breakdown': daily_breakdown,
-        'category_breakdown': category_breakdown,
-        'best_day': best_day,
-        'streak_info': {
-            'current_streak': user.current_streak,
-            'longest_streak': user.longest_streak
-        }
-    }
+    today = timezone.localdate()
+    month = int(request.GET.get('month', today.month))
+    year = int(request.GET.get('year', today.year))
     
+    data = build_monthly_summary(request.user, year, month)
     serializer = MonthlySummarySerializer(data)
     return Response(serializer.data)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional_on_user_data()
+@read_from_replica
 def activity_stats(request):
     """
     GET /api/tracking/stats/
     Get comprehensive activity statistics
     """
-    user = request.user
-    
-    # All-time stats
-    all_activities = Activity.objects.filter(user=user)
-    
-    stats = {
-        'all_time': {
-            'total_co2_saved': round(user.total_co2_saved, 2),
-            'total_points': user.carbon_points,
-            'total_activities': user.total_activities,
-            'trees_equivalent': carbon_calculator.co2_to_trees(user.total_co2_saved),
-            'car_miles_saved': carbon_calculator.co2_to_car_miles(user.total_co2_saved),
-        },
-        'by_category': {},
-        'favorite_activities': []
-    }
-    
-    # Category stats
-    for activity_type in ['transport', 'food', 'energy', 'waste']:
-        type_activities = all_activities.filter(activity_type=activity_type)
-        type_co2 = sum(a.co2_impact for a in type_activities if a.co2_impact > 0)
-        stats['by_category'][activity_type] = {
-            'count': type_activities.count(),
-            'co2_saved': round(type_co2, 2),
-            'points': sum(a.points_earned for a in type_activities)
-        }
-    
-    # Most common activities
-    from django.db.models import Count
-    favorite = all_activities.values('activity_type', 'description').annotate(
-        count=Count('id')
-    ).order_by('-count')[:5]
-    
-    stats['favorite_activities'] = list(favorite)
-    
-    return Response(stats)
+    return Response(build_activity_stats(request.user))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@conditional_on_user_data()
+@read_from_replica
+def activity_days(request):
+    """
+    GET /api/tracking/activity-days/?year=2026
+    Active-day heatmap of a year with active-day count and streaks
+    """
+    try:
+        year = int(request.GET.get('year', timezone.localdate().year))
+    except ValueError:
+        return Response({'error': 'year must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+    # days_in_year() looks at January 1st of the following year
+    if not 1 <= year < 9999:
+        return Response({'error': 'year is out of range'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(build_activity_days(request.user.id, year))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@conditional_on_user_data()
+def activity_calendar(request):
+    """
+    GET /api/tracking/calendar/?year=2026
+    A year of daily CO2 saved and activity counts for a heatmap, as
+    parallel arrays indexed by day offset
+    """
+    try:
+        year = int(request.GET.get('year', timezone.localdate().year))
+    except ValueError:
+        return Response({'error': 'year must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+    if not 1 <= year < 9999:
+        return Response({'error': 'year is out of range'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(year_calendar(request.user.id, year))
 
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@transaction.atomic
 def quick_log(request):
     """
     POST /api/tracking/quick-log/
@@ -340,7 +273,9 @@ def quick_log(request):
     
     serializer = ActivitySerializer(data=activity_data, context={'request': request})
     if serializer.is_valid():
-        serializer.save()
+        with transaction.atomic():
+            activity = serializer.save()
+            DailySummary.update_for_date(request.user, timezone.localtime(activity.timestamp).date())
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)  
\ No newline at end of file
@@ -3,7 +3,10 @@ Admin configuration for Users app
 """
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User
+
+from apps.core import jobs
+from .models import LoginEvent, User
+from .stats import recalculate_user_stats
 
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
@@ -14,6 +17,8 @@ class UserAdmin(BaseUserAdmin):
     list_filter = ('is_staff', 'is_superuser', 'is_active', 'level', 'preferred_language')
     search_fields = ('username', 'email', 'first_name', 'last_name', 'phone')
     ordering = ('-carbon_points',)
+    show_full_result_count = False
+    actions = ['recalculate_stats']
     
     fieldsets = BaseUserAdmin.fieldsets + (
         ('Profile Information', {
@@ -38,4 +43,20 @@ class UserAdmin(BaseUserAdmin):
                     'fields': ('created_at', 'updated_at')
                 }),
             )
-        return fieldsets
\ No newline at end of file
+        return fieldsets
+    
+    @admin.action(description="Recalculate selected users' stats (background)")
+    def recalculate_stats(self, request, queryset):
+        user_ids = list(queryset.values_list('id', flat=True))
+        jobs.submit(recalculate_user_stats, user_ids)
+        self.message_user(request, f'Recalculating stats of {len(user_ids)} users in the background.')
+
+@admin.register(LoginEvent)
+class LoginEventAdmin(admin.ModelAdmin):
+    list_display = ('user', 'method', 'ip_address', 'created_at')
+    list_filter = ('method',)
+    search_fields = ('user__username', 'ip_address')
+    raw_id_fields = ('user',)
+    list_select_related = ('user',)
+    show_full_result_count = False
+    readonly_fields = ('user', 'method', 'ip_address', 'user_agent', 'created_at')
@@ -5,3 +5,8 @@ class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.users'
     label = 'apps_Users'
+
+    def ready(self):
+        import atexit
+        from .logins import buffer
+        atexit.register(buffer.flush)
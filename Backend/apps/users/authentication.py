@@ -0,0 +1,128 @@
+"""
+JWT authentication that resolves the user without a query per request
+
+Access tokens carry a few identity claims for clients. Read-only
+requests get a user built from a cached snapshot of the user row, which
+lives at most PRINCIPAL_CACHE_TIMEOUT seconds and is dropped by any write
+to the user's data. On a miss the row is loaded, so a deleted or
+deactivated user is refused as soon as the change is saved. Token claims
+are never trusted for who the user is or what they may do: they outlive
+the row by the whole access token lifetime. Unsafe methods always load
+the row.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.fields.files import FieldFile
+from django.utils.translation import gettext_lazy as _
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.core.versioning import get_user_version
+from .logins import record_login
+
+# User fields copied into tokens for clients; authentication ignores them
+USER_CLAIMS = (
+    'username', 'email', 'first_name', 'last_name',
+    'is_active', 'is_staff', 'is_superuser',
+)
+
+# Never cached alongside the rest of the row
+SNAPSHOT_EXCLUDE = {'password'}
+
+PRINCIPAL_CACHE_KEY = 'principal:{}:{}'
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """Refresh token whose access tokens carry USER_CLAIMS"""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim in USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+        return token
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = ClaimsRefreshToken
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        record_login(self.user, self.context.get('request'))
+        return data
+
+
+def principal_cache_key(user_id):
+    """Snapshots are keyed by the data version, so any user write invalidates them"""
+    token, _ = get_user_version(user_id)
+    return PRINCIPAL_CACHE_KEY.format(user_id, token)
+
+
+def cache_snapshot(user, key=None):
+    """Store the loaded fields of a user row for later principals"""
+    snapshot = {}
+    for field in user._meta.concrete_fields:
+        if field.attname in SNAPSHOT_EXCLUDE or field.attname in user.get_deferred_fields():
+            continue
+        value = getattr(user, field.attname)
+        snapshot[field.attname] = value.name if isinstance(value, FieldFile) else value
+    cache.set(
+        key or principal_cache_key(user.pk), snapshot,
+        timeout=settings.PRINCIPAL_CACHE_TIMEOUT
+    )
+
+
+def build_principal(user_id, fields):
+    """Instantiate a User from a snapshot, fields not in it are deferred"""
+    from .models import User
+
+    fields = dict(fields, id=user_id)
+    names = [
+        field.attname for field in User._meta.concrete_fields
+        if field.attname in fields
+    ]
+    return User.from_db('default', names, [fields[name] for name in names])
+
+
+class PrincipalJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication serving safe methods from the user snapshot"""
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        if request.method in SAFE_METHODS:
+            return self.get_principal(validated_token), validated_token
+        return self.get_user(validated_token), validated_token
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        key = principal_cache_key(user_id) if user_id is not None else None
+        user = super().get_user(validated_token)
+        cache_snapshot(user, key)
+        return user
+
+    def get_principal(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        snapshot = cache.get(principal_cache_key(user_id))
+        if snapshot is None:
+            # Checks the row exists and is active, and caches a new snapshot
+            return self.get_user(validated_token)
+
+        principal = build_principal(user_id, snapshot)
+        if not principal.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        return principal
@@ -0,0 +1,108 @@
+"""
+Buffered login bookkeeping
+
+Token issuance appends a LoginEvent to an in-process buffer instead of
+writing User.last_login, so logins never wait on the user row or on the
+insert. A daemon thread, started with the first event, writes the buffer
+with one bulk insert every LOGIN_EVENT_FLUSH_INTERVAL seconds, or as soon
+as it holds LOGIN_EVENT_BATCH_SIZE events, and the buffer is flushed once
+more at process exit. Events of users deleted in the meantime are
+skipped; if the batch still fails, events are inserted one by one so a
+bad row only loses itself. Events still buffered when a worker is killed
+are lost, which is acceptable for bookkeeping data.
+"""
+import logging
+import threading
+
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+
+from .models import LoginEvent, User
+
+logger = logging.getLogger(__name__)
+
+
+class LoginEventBuffer:
+    """Thread-safe buffer of unsaved LoginEvents.
+
+    With background=False nothing is written until flush() is called,
+    except that a full batch is flushed by the caller of add().
+    """
+
+    def __init__(self, background=True):
+        self.background = background
+        self._lock = threading.Lock()
+        self._events = []
+        self._wakeup = threading.Event()
+        self._flusher = None
+
+    def add(self, event):
+        with self._lock:
+            self._events.append(event)
+            full = len(self._events) >= settings.LOGIN_EVENT_BATCH_SIZE
+            if self.background and self._flusher is None:
+                self._flusher = threading.Thread(target=self._run, name='login-event-flusher', daemon=True)
+                self._flusher.start()
+        if full:
+            if self.background:
+                self._wakeup.set()
+            else:
+                self.flush()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(settings.LOGIN_EVENT_FLUSH_INTERVAL)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Login event flush failed')
+            finally:
+                # Do not hold connections open between flushes
+                connections.close_all()
+
+    def flush(self):
+        """Insert every buffered event, returns how many were written"""
+        with self._lock:
+            events, self._events = self._events, []
+        if not events:
+            return 0
+
+        existing = set(
+            User.objects.filter(pk__in={event.user_id for event in events}).values_list('pk', flat=True)
+        )
+        events = [event for event in events if event.user_id in existing]
+        try:
+            with transaction.atomic():
+                LoginEvent.objects.bulk_create(events)
+            return len(events)
+        except DatabaseError:
+            logger.exception('Bulk insert of %d login events failed, inserting one by one', len(events))
+
+        written = 0
+        for event in events:
+            event.pk = None
+            try:
+                with transaction.atomic():
+                    event.save(force_insert=True)
+                written += 1
+            except DatabaseError:
+                logger.exception('Dropped the login event of user %s', event.user_id)
+        return written
+
+    def __len__(self):
+        return len(self._events)
+
+
+buffer = LoginEventBuffer()
+
+
+def record_login(user, request=None, method='password'):
+    """Queue a login event for `user` with the request's device details"""
+    meta = request.META if request is not None else {}
+    buffer.add(LoginEvent(
+        user_id=user.pk,
+        method=method,
+        ip_address=meta.get('REMOTE_ADDR') or None,
+        user_agent=meta.get('HTTP_USER_AGENT', '')[:255],
+    ))
@@ -0,0 +1,34 @@
+"""
+Derive User.last_login from the login event table
+
+Meant to run periodically (e.g. every few minutes from cron):
+
+    python manage.py sync_last_login
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, Max, OuterRef, Q, Subquery
+
+from apps.core.versioning import touch_users
+from apps.users.models import LoginEvent, User
+
+
+class Command(BaseCommand):
+    help = 'Set last_login from the newest LoginEvent of every user'
+
+    def handle(self, *args, **options):
+        events = LoginEvent.objects.filter(user=OuterRef('pk'))
+        latest = events.order_by().values('user').annotate(latest=Max('created_at')).values('latest')
+
+        stale_ids = list(
+            User.objects.alias(
+                has_events=Exists(events),
+                has_newer=Exists(events.filter(created_at__gt=OuterRef('last_login'))),
+            ).filter(
+                Q(last_login__isnull=True, has_events=True) | Q(has_newer=True)
+            ).values_list('pk', flat=True)
+        )
+        if stale_ids:
+            User.objects.filter(pk__in=stale_ids).update(last_login=Subquery(latest))
+            touch_users(*stale_ids)
+
+        self.stdout.write(self.style.SUCCESS(f'Updated last_login for {len(stale_ids)} users'))
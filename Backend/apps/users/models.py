@@ -42,6 +42,12 @@ class User(AbstractUser):
         ordering = ['-created_at']
         verbose_name = 'User'
         verbose_name_plural = 'Users'
+        indexes = [
+            # Leaderboard orderings and rank counts
+            models.Index(fields=['-carbon_points'], name='user_points_idx'),
+            models.Index(fields=['-total_co2_saved'], name='user_co2_saved_idx'),
+            models.Index(fields=['-current_streak'], name='user_streak_idx'),
+        ]
     
     def __str__(self):
         return self.username
@@ -104,4 +110,31 @@ class User(AbstractUser):
         """Calculate progress percentage to next level"""
         current_level_base = (self.level - 1) * 1000
         points_in_current_level = self.carbon_points - current_level_base
-        return (points_in_current_level / 1000) * 100
\ No newline at end of file
+        return (points_in_current_level / 1000) * 100
+
+class LoginEvent(models.Model):
+    """Append-only record of a token issuance.
+
+    Written in batches by apps.users.logins; User.last_login is derived
+    from it by the sync_last_login command.
+    """
+
+    METHODS = [
+        ('password', 'Password'),
+        ('register', 'Registration'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='login_events')
+    method = models.CharField(max_length=20, choices=METHODS, default='password')
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    user_agent = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.method} ({self.created_at})"
@@ -0,0 +1,73 @@
+"""
+Rebuild the denormalized activity stats on User from the source rows
+
+carbon_points and level are left alone: points also come from challenges
+and are spent on rewards, so they cannot be derived from activities.
+"""
+from itertools import groupby
+
+from django.db.models import Count, Q, Sum
+
+from apps.core.versioning import LEADERBOARD, touch_global, touch_users
+
+from .models import User
+
+RECALCULATED_FIELDS = [
+    'total_co2_saved', 'total_activities',
+    'current_streak', 'longest_streak', 'last_activity_date',
+]
+
+
+def streaks(dates):
+    """(current, longest) runs of consecutive days in sorted, unique dates.
+
+    current is the run ending on the last date, matching User.update_streak.
+    """
+    current = longest = 0
+    previous = None
+    for day in dates:
+        current = current + 1 if previous is not None and (day - previous).days == 1 else 1
+        longest = max(longest, current)
+        previous = day
+    return current, longest
+
+
+def recalculate_user_stats(user_ids, chunk_size=500):
+    """Recompute RECALCULATED_FIELDS for the given users in chunks, returns the count"""
+    from apps.tracking.models import Activity, DailySummary
+
+    user_ids = list(user_ids)
+    for offset in range(0, len(user_ids), chunk_size):
+        chunk = user_ids[offset:offset + chunk_size]
+
+        totals = Activity.history.aggregate_by(
+            ('user_id',),
+            {
+                'saved': Sum('co2_impact', filter=Q(co2_impact__gt=0)),
+                'count': Count('id'),
+            },
+            user_id__in=chunk,
+        )
+        # DailySummary outlives archived activities, so it holds every active day
+        days = (
+            DailySummary.objects.filter(user_id__in=chunk, activities_count__gt=0)
+            .order_by('user_id', 'date').values_list('user_id', 'date')
+        )
+        active_days = {
+            user_id: [day for _, day in rows]
+            for user_id, rows in groupby(days.iterator(), key=lambda row: row[0])
+        }
+
+        users = list(User.objects.filter(id__in=chunk).only('id', *RECALCULATED_FIELDS))
+        for user in users:
+            row = totals.get((user.id,), {'saved': 0, 'count': 0})
+            dates = active_days.get(user.id, [])
+            user.total_co2_saved = row['saved']
+            user.total_activities = row['count']
+            user.current_streak, user.longest_streak = streaks(dates)
+            user.last_activity_date = dates[-1] if dates else None
+        User.objects.bulk_update(users, RECALCULATED_FIELDS)
+        touch_users(*chunk)
+
+    touch_global(LEADERBOARD)
+    return len(user_ids)
@@ -0,0 +1,19 @@
+"""
+Summary builders shared by the user endpoints and the dashboard
+"""
+from .serializers import UserProfileSerializer
+
+
+def build_dashboard_stats(user, rows=None, totals=None):
+    """Profile plus this week's activity and active challenge counts"""
+    from apps.challenges.summaries import participation_totals
+    from apps.tracking.summaries import build_recent_stats
+
+    if totals is None:
+        totals = participation_totals(user)
+
+    return {
+        'user': UserProfileSerializer(user).data,
+        'weekly_stats': build_recent_stats(user, rows),
+        'active_challenges_count': totals['in_progress'],
+    }
@@ -1,3 +1,96 @@
-from django.test import TestCase
+import time
+from io import StringIO
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient, APIRequestFactory
+
+from .authentication import ClaimsRefreshToken, PrincipalJWTAuthentication
+from .logins import LoginEventBuffer
+from .models import LoginEvent, User
+
+
+class PrincipalAuthenticationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', password='pass12345')
+        self.client = APIClient()
+        self.header = f'Bearer {ClaimsRefreshToken.for_user(self.user).access_token}'
+        self.client.credentials(HTTP_AUTHORIZATION=self.header)
+
+    def test_read_requests_use_the_cached_snapshot(self):
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=self.header)
+        authentication = PrincipalJWTAuthentication()
+        with self.assertNumQueries(1):
+            authentication.authenticate(request)
+        with self.assertNumQueries(0):
+            user, _ = authentication.authenticate(request)
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(user.username, 'alice')
+
+    def test_deactivated_user_is_refused(self):
+        self.assertEqual(self.client.get('/api/users/profile/').status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/users/profile/').status_code, 401)
+        self.assertEqual(self.client.get('/api/tracking/weekly-summary/').status_code, 401)
+
+    def test_deleted_user_is_refused(self):
+        self.assertEqual(self.client.get('/api/users/profile/').status_code, 200)
+        self.user.delete()
+        self.assertEqual(self.client.get('/api/gamification/notifications/').status_code, 401)
+
+
+class LoginEventBufferTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', password='pass12345')
+
+    def event(self, user_id=None):
+        return LoginEvent(user_id=user_id or self.user.pk, method='password')
+
+    def test_full_batches_are_not_written_by_the_caller(self):
+        buffer = LoginEventBuffer()
+        with override_settings(LOGIN_EVENT_BATCH_SIZE=2, LOGIN_EVENT_FLUSH_INTERVAL=60):
+            with self.assertNumQueries(0):
+                buffer.add(self.event())
+                buffer.add(self.event())
+            self.assertTrue(self.wait_for_events(2))
+
+    def test_quiet_buffers_are_flushed_on_time(self):
+        buffer = LoginEventBuffer()
+        with override_settings(LOGIN_EVENT_BATCH_SIZE=100, LOGIN_EVENT_FLUSH_INTERVAL=0.05):
+            buffer.add(self.event())
+            self.assertTrue(self.wait_for_events(1))
+        self.assertEqual(len(buffer), 0)
+
+    def test_events_of_deleted_users_are_skipped(self):
+        buffer = LoginEventBuffer(background=False)
+        gone = User.objects.create_user(username='bob', password='pass12345')
+        buffer.add(self.event())
+        buffer.add(self.event(gone.pk))
+        gone.delete()
+        self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(list(LoginEvent.objects.values_list('user_id', flat=True)), [self.user.pk])
+
+    def test_a_failing_batch_is_inserted_row_by_row(self):
+        existing = LoginEvent.objects.create(user=self.user)
+        buffer = LoginEventBuffer(background=False)
+        clash = self.event()
+        clash.pk = existing.pk
+        buffer.add(clash)
+        buffer.add(self.event())
+        self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(LoginEvent.objects.count(), 3)
+
+    def test_sync_last_login(self):
+        LoginEvent.objects.create(user=self.user)
+        call_command('sync_last_login', stdout=StringIO())
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.last_login, LoginEvent.objects.get().created_at)
+
+    def wait_for_events(self, count, timeout=2):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if LoginEvent.objects.count() >= count:
+                return True
+            time.sleep(0.01)
+        return False
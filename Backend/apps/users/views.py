@@ -5,10 +5,11 @@ from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model
-from django.db.models import Sum
 
+from apps.core.conditional import ConditionalUserDataMixin, conditional_on_user_data
+from apps.core.replicas import read_from_replica
+from apps.core.versioning import CHALLENGES
 from .serializers import (
     UserRegistrationSerializer,
     UserProfileSerializer,
@@ -16,6 +17,9 @@ from .serializers import (
     UserStatsSerializer,
     ChangePasswordSerializer
 )
+from .authentication import ClaimsRefreshToken
+from .logins import record_login
+from .summaries import build_dashboard_stats
 
 User = get_user_model()
 
@@ -32,7 +36,8 @@ class UserRegistrationView(generics.CreateAPIView):
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
         
-        refresh = RefreshToken.for_user(user)
+        refresh = ClaimsRefreshToken.for_user(user)
+        record_login(user, request, method='register')
         
         return Response({
             'user': UserProfileSerializer(user).data,
@@ -43,7 +48,7 @@ class UserRegistrationView(generics.CreateAPIView):
             'message': 'User registered successfully!'
         }, status=status.HTTP_201_CREATED)
 
-class UserProfileView(generics.RetrieveAPIView):
+class UserProfileView(ConditionalUserDataMixin, generics.RetrieveAPIView):
     """
     Get current user's profile
     """
@@ -73,7 +78,7 @@ class UserProfileUpdateView(generics.UpdateAPIView):
         profile_serializer = UserProfileSerializer(instance)
         return Response(profile_serializer.data)
 
-class UserStatsView(generics.RetrieveAPIView):
+class UserStatsView(ConditionalUserDataMixin, generics.RetrieveAPIView):
     """
     Get current user's stats summary
     """
@@ -110,49 +115,13 @@ class ChangePasswordView(generics.UpdateAPIView):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional_on_user_data('user', CHALLENGES)
+@read_from_replica
 def user_dashboard_stats(request):
     """
     Get comprehensive dashboard statistics for the user
     """
-    user = request.user
-    
-    # Get recent activities count
-    from apps.tracking.models import Activity
-    from django.utils import timezone
-    from datetime import timedelta
-    
-    today = timezone.now().date()
-    week_ago = today - timedelta(days=7)
-    
-    weekly_activities = Activity.objects.filter(
-        user=user,
-        timestamp__date__gte=week_ago
-    ).count()
-    
-    weekly_co2_saved = Activity.objects.filter(
-        user=user,
-        timestamp__date__gte=week_ago,
-        co2_impact__gt=0
-    ).aggregate(
-        total=Sum('co2_impact')
-    )['total'] or 0
-    
-    # Get active challenges count
-    from apps.challenges.models import ChallengeParticipation
-    active_challenges = ChallengeParticipation.objects.filter(
-        user=user,
-        is_completed=False,
-        challenge__is_active=True
-    ).count()
-    
-    return Response({
-        'user': UserProfileSerializer(user).data,
-        'weekly_stats': {
-            'activities_count': weekly_activities,
-            'co2_saved': round(weekly_co2_saved, 2)
-        },
-        'active_challenges_count': active_challenges,
-    })
+    return Response(build_dashboard_stats(request.user))
 
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated])
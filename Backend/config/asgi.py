@@ -3,6 +3,10 @@ ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The live event stream at /api/realtime/stream/ holds connections open, so it
+must be served through this application (e.g. ``uvicorn config.asgi:application``)
+rather than WSGI, where each stream would tie up a worker thread.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
 """
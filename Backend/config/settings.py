@@ -41,9 +41,13 @@ INSTALLED_APPS = [
     'apps.leaderboard.apps.LeaderboardConfig',
     'apps.rewards.apps.RewardsConfig',
     'apps.emissions.apps.EmissionsConfig',
+    'apps.realtime.apps.RealtimeConfig',
+    'apps.core.apps.CoreConfig',
+    'apps.dashboard.apps.DashboardConfig',
 ]
 
 MIDDLEWARE = [
+    'apps.core.middleware.QueryMetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -86,6 +90,42 @@ DATABASES = {
     }
 }
 
+# SQLite concurrency mode: WAL lets readers run alongside the single writer,
+# atomic() blocks take the write lock up front (BEGIN IMMEDIATE) and
+# waiting writers retry for `timeout` seconds instead of failing at once.
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3' and config('SQLITE_TUNING', default=True, cast=bool):
+    DATABASES['default']['ENGINE'] = 'apps.core.backends.sqlite3'
+    DATABASES['default']['OPTIONS'] = {
+        'timeout': config('SQLITE_BUSY_TIMEOUT', default=20, cast=int),
+        'transaction_mode': 'IMMEDIATE',
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'mmap_size': config('SQLITE_MMAP_SIZE', default=128 * 1024 * 1024, cast=int),
+            'cache_size': -20000,
+            'temp_store': 'MEMORY',
+        },
+    }
+
+# Read replica for the heavy read-only endpoints (apps.core.replicas).
+# DB_REPLICA_NAME=db.sqlite3 opens a second connection to the local file
+# (relative to BASE_DIR), which stands in for a real replica in development.
+# Test runs without a replica get the same stand-in (apps.core.testing).
+REPLICA_DATABASE = 'replica'
+REPLICA_READ_YOUR_WRITES_SECONDS = config('REPLICA_READ_YOUR_WRITES_SECONDS', default=5, cast=int)
+DB_REPLICA_NAME = config('DB_REPLICA_NAME', default='')
+if DB_REPLICA_NAME:
+    DATABASES[REPLICA_DATABASE] = dict(
+        DATABASES['default'],
+        NAME=BASE_DIR / DB_REPLICA_NAME if 'sqlite3' in DATABASES['default']['ENGINE'] else DB_REPLICA_NAME,
+        HOST=config('DB_REPLICA_HOST', default=DATABASES['default']['HOST']),
+        OPTIONS=dict(DATABASES['default'].get('OPTIONS', {})),
+        TEST={'MIRROR': 'default'},
+    )
+DATABASE_ROUTERS = ['apps.core.replicas.ReplicaRouter']
+
+TEST_RUNNER = 'apps.core.testing.TestRunner'
+
 # Custom User Model
 AUTH_USER_MODEL = 'apps_Users.User'
 
@@ -108,7 +148,7 @@ AUTH_PASSWORD_VALIDATORS = [
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.users.authentication.PrincipalJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -130,7 +170,8 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=30),
     'ROTATE_REFRESH_TOKENS': False,
     'BLACKLIST_AFTER_ROTATION': True,
-    'UPDATE_LAST_LOGIN': True,
+    # last_login is derived from LoginEvent rows, see apps.users.logins
+    'UPDATE_LAST_LOGIN': False,
     
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
@@ -145,8 +186,17 @@ SIMPLE_JWT = {
     
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
+    'TOKEN_OBTAIN_SERIALIZER': 'apps.users.authentication.ClaimsTokenObtainPairSerializer',
 }
 
+# Seconds a user row snapshot may stand in for the database on read requests.
+# Snapshots are also dropped as soon as any of the user's data changes.
+PRINCIPAL_CACHE_TIMEOUT = config('PRINCIPAL_CACHE_TIMEOUT', default=60, cast=int)
+
+# Login events are buffered per process and bulk inserted
+LOGIN_EVENT_BATCH_SIZE = config('LOGIN_EVENT_BATCH_SIZE', default=50, cast=int)
+LOGIN_EVENT_FLUSH_INTERVAL = config('LOGIN_EVENT_FLUSH_INTERVAL', default=30, cast=int)
+
 # CORS Settings
 CORS_ALLOWED_ORIGINS = config(
     'CORS_ALLOWED_ORIGINS',
@@ -191,6 +241,71 @@ CACHES = {
     }
 }
 
+# Activities older than this many months move to the archive table
+# (manage.py archive_activities); DailySummary keeps their daily totals.
+ACTIVITY_ARCHIVE_MONTHS = config('ACTIVITY_ARCHIVE_MONTHS', default=12, cast=int)
+
+# Finalized challenges are archived this many days after they end
+# (manage.py process_challenge_lifecycle, run from cron)
+CHALLENGE_ARCHIVE_DAYS = config('CHALLENGE_ARCHIVE_DAYS', default=30, cast=int)
+
+# Limited reward stock is split over this many rows (apps.rewards.inventory),
+# and a reserved unit returns to stock if not confirmed within the hold
+REWARD_STOCK_SHARDS = config('REWARD_STOCK_SHARDS', default=8, cast=int)
+REWARD_HOLD_SECONDS = config('REWARD_HOLD_SECONDS', default=600, cast=int)
+
+# Redemption code pool (apps.rewards.codes): replenish_redemption_codes
+# tops the generated pool up to REDEMPTION_CODE_POOL_MIN free codes
+REDEMPTION_CODE_POOL_MIN = config('REDEMPTION_CODE_POOL_MIN', default=1000, cast=int)
+REDEMPTION_CODE_BATCH = config('REDEMPTION_CODE_BATCH', default=500, cast=int)
+
+# Rows fetched per database round trip by the streaming activity exports
+ACTIVITY_EXPORT_CHUNK_SIZE = config('ACTIVITY_EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
+# In-process background jobs started from the admin, see apps.core.jobs
+BACKGROUND_JOB_WORKERS = config('BACKGROUND_JOB_WORKERS', default=2, cast=int)
+BACKGROUND_JOBS_INLINE = config('BACKGROUND_JOBS_INLINE', default=False, cast=bool)
+
+# Composite dashboard: seconds a rendered panel may be served from cache.
+# Panels are also invalidated as soon as their underlying data changes.
+DASHBOARD_PANEL_CACHE_TIMEOUT = config('DASHBOARD_PANEL_CACHE_TIMEOUT', default=300, cast=int)
+
+# Request metrics, exposed at /metrics to the addresses below
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+METRICS_ALLOWED_IPS = config('METRICS_ALLOWED_IPS', default='127.0.0.1,::1').split(',')
+# Write a JSON snapshot of the metrics here when the process exits
+METRICS_JSON_PATH = config('METRICS_JSON_PATH', default='')
+
+# Maximum SQL queries per request, by URL name. Exceeding a budget logs a
+# warning, or raises QueryBudgetExceeded when QUERY_BUDGET_STRICT is on.
+QUERY_BUDGET_STRICT = config('QUERY_BUDGET_STRICT', default=False, cast=bool)
+QUERY_BUDGETS = {
+    'users:profile': 2,
+    'users:dashboard-stats': 4,
+    'tracking:weekly-summary': 3,
+    'tracking:monthly-summary': 3,
+    'tracking:stats': 6,
+    'tracking:activity-days': 1,
+    'tracking:calendar': 1,
+    'gamification:summary': 6,
+    'challenges:challenge-stats': 3,
+    'challenges:challenge-list': 5,
+    'challenges:challenge-leaderboard': 10,
+    'challenges:team-challenge-leaderboard': 10,
+    'rewards:reward-list': 2,
+    'rewards:stats': 7,
+    'leaderboard:global-leaderboard': 4,
+    'dashboard:dashboard': 14,
+}
+
+# Realtime event stream
+# Leave empty for the in-process broker (single worker). Set to a Redis URL,
+# e.g. redis://localhost:6379/0, when running several ASGI workers.
+REALTIME_BROKER_URL = config('REALTIME_BROKER_URL', default='')
+REALTIME_QUEUE_SIZE = config('REALTIME_QUEUE_SIZE', default=100, cast=int)
+# Lifetime of the single-use stream tickets (apps.realtime.tickets)
+REALTIME_TICKET_SECONDS = config('REALTIME_TICKET_SECONDS', default=30, cast=int)
+
 # Logging Configuration
 LOGGING = {
     'version': 1,
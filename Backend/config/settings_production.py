@@ -0,0 +1,85 @@
+"""
+Production settings for Carbon Karma: PostgreSQL with persistent connections
+
+Select with DJANGO_SETTINGS_MODULE=config.settings_production. Every value
+is read from the environment (or .env) like the base settings.
+
+Connections:
+    DB_CONN_MAX_AGE         seconds a connection is kept open between
+                            requests (default 60, 0 closes after each one)
+    DB_STATEMENT_TIMEOUT    milliseconds before PostgreSQL cancels a
+                            statement (default 5000, 0 disables)
+    DB_POOL_MIN_SIZE /
+    DB_POOL_MAX_SIZE        enable the built-in psycopg pool when set
+                            (requires Django 5.1+, replaces CONN_MAX_AGE)
+
+Migrating an existing db.sqlite3:
+    1. Start a local PostgreSQL, e.g.
+       docker run -d -p 5432:5432 -e POSTGRES_PASSWORD=carbon -e POSTGRES_DB=carbon_karma postgres:16
+    2. Create the schema:
+       DB_NAME=carbon_karma DB_USER=postgres DB_PASSWORD=carbon \\
+       DJANGO_SETTINGS_MODULE=config.settings_production python manage.py migrate --run-syncdb
+    3. Copy the rows, which also resets the PostgreSQL sequences:
+       SQLITE_SOURCE=db.sqlite3 (same DB_* variables) \\
+       DJANGO_SETTINGS_MODULE=config.settings_production python manage.py copy_database --source sqlite --flush
+"""
+import django
+from decouple import config
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, REPLICA_DATABASE
+
+DEBUG = config('DEBUG', default=False, cast=bool)
+
+STATEMENT_TIMEOUT_MS = config('DB_STATEMENT_TIMEOUT', default=5000, cast=int)
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': config('DB_NAME', default='carbon_karma'),
+        'USER': config('DB_USER', default='postgres'),
+        'PASSWORD': config('DB_PASSWORD', default=''),
+        'HOST': config('DB_HOST', default='localhost'),
+        'PORT': config('DB_PORT', default='5432'),
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+        # Persistent connections are pinged before reuse, so a restarted
+        # server costs one reconnect instead of a failed request
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'connect_timeout': config('DB_CONNECT_TIMEOUT', default=5, cast=int),
+            'options': f'-c statement_timeout={STATEMENT_TIMEOUT_MS}',
+        },
+    }
+}
+
+DB_POOL_MAX_SIZE = config('DB_POOL_MAX_SIZE', default=0, cast=int)
+if DB_POOL_MAX_SIZE:
+    if django.VERSION < (5, 1):
+        from django.core.exceptions import ImproperlyConfigured
+        raise ImproperlyConfigured('DB_POOL_MAX_SIZE needs Django 5.1 or later, use DB_CONN_MAX_AGE')
+    # The pool owns connection reuse; Django refuses CONN_MAX_AGE with it
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+        'max_size': DB_POOL_MAX_SIZE,
+        'timeout': config('DB_POOL_TIMEOUT', default=10, cast=int),
+    }
+
+# Streaming replica for the read-only endpoints, see apps.core.replicas
+DB_REPLICA_HOST = config('DB_REPLICA_HOST', default='')
+if DB_REPLICA_HOST:
+    DATABASES[REPLICA_DATABASE] = dict(
+        DATABASES['default'],
+        HOST=DB_REPLICA_HOST,
+        PORT=config('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+        OPTIONS=dict(DATABASES['default']['OPTIONS']),
+        TEST={'MIRROR': 'default'},
+    )
+
+# Read-only source for `manage.py copy_database --source sqlite`
+SQLITE_SOURCE = config('SQLITE_SOURCE', default='')
+if SQLITE_SOURCE:
+    DATABASES['sqlite'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / SQLITE_SOURCE,
+    }
@@ -7,6 +7,8 @@ from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
+from apps.core import views as core_views
+
 urlpatterns = [
     # Admin
     path('admin/', admin.site.urls),
@@ -23,6 +25,11 @@ urlpatterns = [
     path('api/leaderboard/', include('apps.leaderboard.urls')),
     path('api/rewards/', include('apps.rewards.urls')),
     path('api/emissions/', include('apps.emissions.urls')),
+    path('api/realtime/', include('apps.realtime.urls')),
+    path('api/dashboard/', include('apps.dashboard.urls')),
+    
+    # Monitoring
+    path('metrics', core_views.metrics, name='metrics'),
 ]
 
 # Serve media files in development
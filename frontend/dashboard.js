@@ -54,15 +54,42 @@ document.addEventListener('DOMContentLoaded', () => {
     if (!checkAuth()) return;
     
     // Load user data
-    loadUserProfile();
-    loadDashboardStats();
+    loadDashboard();
     loadChallenges();
-    loadLeaderboard();
     loadRewards();
     loadActivityHistory();
     loadNotifications();
+    subscribeToLiveUpdates();
 });
 
+// Live updates pushed by the server instead of polling
+async function subscribeToLiveUpdates() {
+    if (!window.EventSource) return;
+
+    // The stream is opened with a single-use ticket so the access token
+    // never appears in a URL
+    const response = await apiRequest('/realtime/ticket/', { method: 'POST' });
+    if (!response.ok) return;
+    const { ticket } = await response.json();
+    const source = new EventSource(
+        `http://localhost:8000/api/realtime/stream/?leaderboard=true&ticket=${encodeURIComponent(ticket)}`
+    );
+    // A used ticket cannot reopen the stream; reconnect with a fresh one
+    source.onerror = () => {
+        source.close();
+        setTimeout(subscribeToLiveUpdates, 5000);
+    };
+
+    source.addEventListener('notification', () => loadNotifications());
+    source.addEventListener('leaderboard', () => loadLeaderboard());
+    source.addEventListener('rank', () => loadDashboardStats());
+    source.addEventListener('challenge_completed', (event) => {
+        const data = JSON.parse(event.data);
+        showPopupMessage(`Challenge completed: ${data.challenge_name}! +${data.reward_points} points`);
+        loadChallenges();
+    });
+}
+
 // Carbon Calculator
 const carbonForm = document.getElementById('carbonCalculatorForm');
 const resultsContainer = document.getElementById('calculationResults');
@@ -880,6 +907,21 @@ document.querySelector('.export-btn')?.addEventListener('click', () => {
     link.click();
 });
 
+// Load profile, weekly stats and leaderboard panels in one request
+async function loadDashboard() {
+    try {
+        const response = await apiRequest('/dashboard/?panels=profile,leaderboard');
+        if (response.ok) {
+            const data = await response.json();
+            updateDashboardStats(data.profile.user);
+            updateDashboardWithStats(data.profile);
+            displayLeaderboard(data.leaderboard);
+        }
+    } catch (error) {
+        console.error('Failed to load dashboard:', error);
+    }
+}
+
 // Load user profile
 async function loadUserProfile() {
     try {